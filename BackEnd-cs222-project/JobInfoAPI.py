@@ -1,142 +1,544 @@
+import os
 import math
+import logging
 import time
+import asyncio
+import weakref
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import httpx
 import requests
+from requests.adapters import HTTPAdapter
+from backApp import metrics
+from backApp.caching import TwoTierCache
+from backApp.ranking import rank_jobs
+from backApp.ratelimit import RateLimited, TokenBucket, backoff_delay, parse_retry_after
 
-def search_jobs(keyword, location="gb", results_per_page=5, max_pages=10, start_page=1):
-    base_url = f"https://api.adzuna.com/v1/api/jobs/{location}/search"
+logger = logging.getLogger("minorrec.adzuna")
+# full result pages; sampled, see LOGGING in settings
+payload_logger = logging.getLogger("minorrec.adzuna.payload")
+jobs_logger = logging.getLogger("minorrec.jobs")
+
+# Overridable so benchmarks can point at a local stand-in (see `manage.py benchmark`)
+ADZUNA_BASE_URL = os.environ.get('ADZUNA_BASE_URL', 'https://api.adzuna.com/v1/api/jobs')
+
+# Upper bound on concurrent Adzuna requests per worker process
+MAX_FETCH_WORKERS = 8
+# The async views are bounded by connections rather than threads
+ASYNC_MAX_CONNECTIONS = 100
+ADZUNA_TIMEOUT = 10.0
+
+# Adzuna pages are cached per (keyword, location, results_per_page, page):
+# in memory per worker, and in SQLite so restarts stay warm
+ADZUNA_CACHE_TTL = 30 * 60
+ADZUNA_CACHE_SIZE = 4096
+ADZUNA_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'adzuna_cache.sqlite3')
+
+page_cache = metrics.register_cache(
+    TwoTierCache("adzuna_pages", ADZUNA_CACHE_PATH, maxsize=ADZUNA_CACHE_SIZE, ttl=ADZUNA_CACHE_TTL)
+)
+
+# Shared by every thread and, through the same SQLite file, every worker on the host.
+# A request waits at most ADZUNA_MAX_WAIT seconds for a token or a 429 to clear,
+# then gives up on that page and the batch returns what it already has.
+ADZUNA_REQUESTS_PER_MINUTE = 25
+ADZUNA_BURST = 5
+ADZUNA_MAX_RETRIES = 3
+ADZUNA_MAX_WAIT = 3.0
+
+rate_limiter = TokenBucket(ADZUNA_REQUESTS_PER_MINUTE / 60, ADZUNA_BURST, path=ADZUNA_CACHE_PATH, name="adzuna")
+
+_pool_lock = threading.Lock()
+_session = None
+_executor = None
+_async_clients = weakref.WeakKeyDictionary()
+
+def get_session():
+    """One keep-alive connection pool per worker process, shared by every thread"""
+    global _session
+    if _session is None:
+        with _pool_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=2, pool_maxsize=MAX_FETCH_WORKERS)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+def get_async_client():
+    """One httpx.AsyncClient per event loop, so an ASGI worker keeps one pool for all requests"""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=ASYNC_MAX_CONNECTIONS, max_keepalive_connections=MAX_FETCH_WORKERS),
+            timeout=ADZUNA_TIMEOUT,
+        )
+        _async_clients[loop] = client
+    return client
+
+def get_executor():
+    """Bounded thread pool used for concurrent page fetches"""
+    global _executor
+    if _executor is None:
+        with _pool_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=MAX_FETCH_WORKERS, thread_name_prefix="adzuna-fetch")
+    return _executor
+
+def fetch_page(keyword, location="gb", results_per_page=5, page=1):
+    """Fetch and decode a single Adzuna results page, served from page_cache when possible"""
+    cache_key = ("adzuna", keyword, location, results_per_page, page)
+    if page_cache is not None:
+        data = page_cache.get(cache_key)
+        if data is not None:
+            return data
+    data = _request_page(keyword, location, results_per_page, page)
+    if page_cache is not None:
+        page_cache.set(cache_key, data)
+    return data
+
+def _page_request(keyword, location, results_per_page, page):
+    url = f"{ADZUNA_BASE_URL}/{location}/search/{page}"
     params = {
         "app_id": "c2d89fa6",
         "app_key": "525d9055cfdd816aecad958df88e32ea",
         "results_per_page": results_per_page,
         "what": keyword,
     }
-    jobs = []
-    page = start_page
-    total_pages = float('inf')  # Will be updated after first request
-
-    while page <= max_pages:
-        url = f"{base_url}/{page}"
-        print(f"Sending Adzuna API request to URL: {url}, keyword: {keyword}, location: {location}, page: {page}/{total_pages if total_pages != float('inf') else 'unknown'}")
-        try:
-            response = requests.get(url, params=params)
-            print(f"Adzuna API response status: {response.status_code}")
-            if response.status_code == 429:
-                print("Rate limit exceeded. Waiting before retrying...")
-                time.sleep(60)  # Wait 60 seconds before retrying
-                continue
-            response.raise_for_status()
-            data = response.json()
-            print(f"Adzuna API response data: {data}")
-            current_results = data.get("results", [])
-            jobs.extend(current_results)
-
-            # Calculate total pages after the first request
-            if page == start_page:
-                total_count = data.get("count", 0)
-                total_pages = math.ceil(total_count / results_per_page)
-                print(f"Total jobs: {total_count}, Total pages: {total_pages}")
-
-            # Break if no more results or all pages fetched
-            if not current_results or page >= total_pages:
-                break
+    return url, params
 
-            page += 1
-        except requests.RequestException as e:
-            print(f"Error fetching jobs for page {page}: {e}")
-            break
+def _throttle_delay(response, attempt, deadline):
+    """
+    (seconds to back off, whether to retry) after a 429. The caller shares
+    the delay with every worker through rate_limiter either way; only an
+    actual retry is logged as one and counted in upstream_retries_total.
+    """
+    retry_after = parse_retry_after(response.headers.get("Retry-After"))
+    delay = max(retry_after or 0.0, backoff_delay(attempt))
+    if attempt < ADZUNA_MAX_RETRIES and time.monotonic() + delay <= deadline:
+        metrics.upstream_retry("adzuna")
+        logger.warning("Adzuna rate limit exceeded, retry %d/%d in %.1fs", attempt + 1, ADZUNA_MAX_RETRIES, delay)
+        return delay, True
+    logger.warning("Adzuna rate limit exceeded, giving up after %d attempts, partial results (retry after %.1fs)", attempt + 1, delay)
+    return delay, False
 
-    next_page = page if jobs and page <= max_pages and page <= total_pages else None
-    print(f"Fetched {len(jobs)} jobs for keyword '{keyword}'")
-    return jobs, next_page, total_pages
+def _request_page(keyword, location, results_per_page, page):
+    """Request one Adzuna results page over the pooled session"""
+    url, params = _page_request(keyword, location, results_per_page, page)
+    deadline = time.monotonic() + ADZUNA_MAX_WAIT
+    for attempt in range(ADZUNA_MAX_RETRIES + 1):
+        wait = rate_limiter.try_acquire() if rate_limiter is not None else 0.0
+        if wait:
+            if time.monotonic() + wait > deadline:
+                raise RateLimited(wait)
+            time.sleep(wait)
+            metrics.observe_span("adzuna_rate_limit_wait", wait)
+            continue
+        logger.debug("Adzuna request %s keyword=%r location=%s page=%d", url, keyword, location, page)
+        with metrics.upstream_call("adzuna") as call:
+            response = get_session().get(url, params=params, timeout=ADZUNA_TIMEOUT)
+            call.status = response.status_code
+        logger.debug("Adzuna response %d for keyword=%r page=%d", response.status_code, keyword, page)
+        if response.status_code == 429:
+            delay, retry = _throttle_delay(response, attempt, deadline)
+            if rate_limiter is not None:
+                rate_limiter.block_for(delay)
+            if not retry:
+                raise RateLimited(delay)
+            time.sleep(delay)
+            metrics.observe_span("adzuna_backoff", delay)
+            continue
+        response.raise_for_status()
+        data = response.json()
+        payload_logger.debug("Adzuna page %d for keyword=%r: %s", page, keyword, data)
+        return data
+    raise RateLimited(backoff_delay(ADZUNA_MAX_RETRIES))
 
-def get_career_choices_for_major_minor(major, minor, location="gb", results_per_page=5, max_pages=10, jobs_per_batch=5, current_keyword_index=0, current_page=1):
-    major_keywords = get_keywords(major)
-    minor_keywords = get_keywords(minor)
-    
-    all_keywords = list(set(minor_keywords + major_keywords))
+def search_keywords(major, minor):
+    """Keywords to search for a major/minor pair, in a stable order so cursors stay valid"""
+    all_keywords = list(dict.fromkeys(get_keywords(minor) + get_keywords(major)))
     if not all_keywords:
         all_keywords = [f"{major} jobs"]  # Fallback if no keywords are found
+    return all_keywords
 
-    print(f"All keywords to search: {all_keywords}")
-    
-    jobs = []
-    seen_urls = set()  # To avoid duplicate jobs based on URL
-    keyword_index = current_keyword_index
-    page = current_page
-
-    # Continue fetching until we have jobs_per_batch unique jobs or run out of keywords/pages
-    while keyword_index < len(all_keywords) and len(jobs) < jobs_per_batch:
-        keyword = all_keywords[keyword_index]
-        keyword_jobs, next_page, total_pages = search_jobs(
-            keyword, location, results_per_page, max_pages, page
-        )
+def _page_count(data, results_per_page):
+    return math.ceil(data.get("count", 0) / results_per_page)
+
+def iter_pages(keywords, location="gb", results_per_page=5, max_pages=10, keyword_index=0, page=1):
+    """
+    Lazily yield (keyword_index, page, results, last_page) in cursor order,
+    one upstream request per page pulled. last_page is the final page worth
+    requesting for that keyword, as far as is known after this page.
+    """
+    for index in range(keyword_index, len(keywords)):
+        current = page if index == keyword_index else 1
+        while current <= max_pages:
+            try:
+                data = fetch_page(keywords[index], location, results_per_page, current)
+            except RateLimited as e:
+                e.position = (index, current)
+                raise
+            except requests.RequestException as e:
+                logger.warning("Error fetching jobs for keyword=%r page %d: %s", keywords[index], current, e)
+                break
+            results = data.get("results", [])
+            last_page = min(max_pages, _page_count(data, results_per_page)) if results else current
+            yield index, current, results, last_page
+            if current >= last_page:
+                break
+            current += 1
+
+def iter_pages_concurrently(keywords, location="gb", results_per_page=5, max_pages=10, keyword_index=0, page=1, wanted=None):
+    """
+    iter_pages with requests in flight ahead of the consumer, across pages
+    and keywords. Pages are still yielded in cursor order; speculative
+    requests past a keyword's last page, or left over when the consumer
+    stops, are cancelled.
+
+    `wanted` is how many results the consumer needs, counting the ones it
+    skips on the first page. Only enough pages to cover it are requested up
+    front; after that one page at a time, as the consumer asks for more
+    because dedup dropped some. Without it up to MAX_FETCH_WORKERS pages are
+    in flight.
+    """
+    executor = get_executor()
+    plan = (
+        (index, current)
+        for index in range(keyword_index, len(keywords))
+        for current in range(page if index == keyword_index else 1, max_pages + 1)
+    )
+    last_pages = {}
+    window = deque()
+    remaining = [wanted]
+
+    def window_size():
+        if remaining[0] is None:
+            return MAX_FETCH_WORKERS
+        return min(MAX_FETCH_WORKERS, max(1, math.ceil(remaining[0] / results_per_page)))
+
+    def refill():
+        while len(window) < window_size():
+            position = next(plan, None)
+            if position is None:
+                return
+            index, current = position
+            if current > last_pages.get(index, max_pages):
+                continue
+            window.append((index, current, executor.submit(fetch_page, keywords[index], location, results_per_page, current)))
+
+    try:
+        refill()
+        while window:
+            index, current, future = window.popleft()
+            if current > last_pages.get(index, max_pages):
+                future.cancel()
+                refill()
+                continue
+            try:
+                data = future.result()
+            except RateLimited as e:
+                e.position = (index, current)
+                raise
+            except requests.RequestException as e:
+                logger.warning("Error fetching jobs for keyword=%r page %d: %s", keywords[index], current, e)
+                last_pages[index] = current - 1
+                refill()
+                continue
+            results = data.get("results", [])
+            last_page = min(max_pages, _page_count(data, results_per_page)) if results else current
+            last_pages[index] = min(last_pages.get(index, max_pages), last_page)
+            if remaining[0] is not None:
+                remaining[0] -= len(results)
+            yield index, current, results, last_pages[index]
+            refill()
+    finally:
+        for _, _, future in window:
+            future.cancel()
+
+def iter_results(pages, offset=0):
+    """
+    Flatten pages into (job, cursor) pairs, where cursor is the exact
+    (keyword_index, page, offset) to resume from after that job. The first
+    `offset` results of the first page were already served and are skipped.
+    A RateLimited escaping from `pages` gets the cursor of the page it hit.
+    """
+    first = True
+    pages = iter(pages)
+    while True:
+        try:
+            index, current, results, last_page = next(pages)
+        except StopIteration:
+            return
+        except RateLimited as e:
+            index, current = e.position
+            e.cursor = (index, current, offset if first else 0)
+            raise
+        skip, first = (offset if first else 0), False
+        for position in range(skip, len(results)):
+            if position + 1 < len(results):
+                cursor = (index, current, position + 1)
+            elif current < last_page:
+                cursor = (index, current + 1, 0)
+            else:
+                cursor = (index + 1, 1, 0)
+            yield results[position], cursor
+
+def unique_jobs(items, seen_urls=None):
+    """Drop jobs without a redirect_url or whose url was already seen"""
+    seen_urls = set() if seen_urls is None else seen_urls
+    for job, cursor in items:
+        job_url = job.get("redirect_url", "")
+        if job_url and job_url not in seen_urls:
+            seen_urls.add(job_url)
+            yield job, cursor
+
+def format_job(job):
+    return {
+        "title": job.get("title", "N/A"),
+        "location": job.get("location", {}).get("display_name", "N/A"),
+        "company": job.get("company", {}).get("display_name", "N/A"),
+        "description": job.get("description", "No description available"),
+        "url": job.get("redirect_url", ""),
+    }
+
+def job_pipeline(keywords, location="gb", results_per_page=5, max_pages=10, keyword_index=0, page=1, offset=0, concurrent=False, seen_urls=None, jobs_per_batch=None):
+    """fetch page -> dedupe by redirect_url -> format, yielding (job, cursor) lazily"""
+    if concurrent:
+        # no more pages in flight than the batch can use
+        wanted = jobs_per_batch + offset if jobs_per_batch is not None else None
+        pages = iter_pages_concurrently(keywords, location, results_per_page, max_pages, keyword_index, page, wanted)
+    else:
+        pages = iter_pages(keywords, location, results_per_page, max_pages, keyword_index, page)
+    try:
+        for job, cursor in unique_jobs(iter_results(pages, offset), seen_urls):
+            yield format_job(job), cursor
+    finally:
+        pages.close()
 
-        # Format and deduplicate jobs
-        for job in keyword_jobs:
-            if len(jobs) >= jobs_per_batch:
+def batch_jobs(pipeline, jobs_per_batch):
+    """
+    Yield jobs until the batch is full, then stop so no further upstream
+    requests are made. Returns (cursor, retry_after) as the generator's
+    value; cursor is None once every keyword is exhausted. If Adzuna stays
+    throttled past ADZUNA_MAX_WAIT the batch ends early with the cursor of
+    the page that was refused and retry_after set, instead of blocking.
+    """
+    cursor = None
+    exhausted = True
+    retry_after = None
+    count = 0
+    try:
+        for job, cursor in pipeline:
+            yield job
+            count += 1
+            if count >= jobs_per_batch:
+                exhausted = False
                 break
-            job_url = job.get("redirect_url", "")
-            if job_url and job_url not in seen_urls:
-                seen_urls.add(job_url)
-                jobs.append({
-                    "title": job.get("title", "N/A"),
-                    "location": job.get("location", {}).get("display_name", "N/A"),
-                    "company": job.get("company", {}).get("display_name", "N/A"),
-                    "description": job.get("description", "No description available"),
-                    "url": job_url or f"https://www.adzuna.co.uk/search?what={keyword.replace(' ', '+')}"
-                })
-
-        # If no more pages for this keyword, move to the next keyword
-        if next_page is None or page >= total_pages or page >= max_pages:
-            keyword_index += 1
-            page = 1
-        else:
-            page = next_page
-
-    has_more = keyword_index < len(all_keywords) or (page is not None and page <= max_pages)
-
-    jobs.sort(key=lambda job: keyword_score(job, all_keywords), reverse=True)
-    
+    except RateLimited as e:
+        jobs_logger.info("Adzuna rate limited, ending batch after %d jobs: %s", count, e)
+        cursor, exhausted, retry_after = e.cursor, False, e.retry_after
+    finally:
+        pipeline.close()
+    return (None if exhausted else cursor), retry_after
+
+def collect_jobs(pipeline, jobs_per_batch):
+    """batch_jobs drained into a list: (jobs, cursor, retry_after)"""
+    jobs = []
+    batch = batch_jobs(pipeline, jobs_per_batch)
+    while True:
+        try:
+            jobs.append(next(batch))
+        except StopIteration as stop:
+            return (jobs, *stop.value)
+
+def keyword_groups(major, minor, all_keywords):
+    """Query vectors for rank_jobs: the major's and the minor's keywords"""
+    groups = [keywords for keywords in (get_keywords(major), get_keywords(minor)) if keywords]
+    return groups or [all_keywords]
+
+def batch_summary(jobs, cursor, retry_after, all_keywords, groups):
+    """The job_recommendations response body: jobs ranked by BM25 relevance plus the next cursor"""
+    has_more = cursor is not None and cursor[0] < len(all_keywords)
+    with metrics.span("ranking"):
+        ranked = rank_jobs(jobs, groups)
     return {
-        "jobs": jobs,
-        "next_keyword_index": keyword_index if has_more else None,
-        "next_page": page,
+        "jobs": ranked,
+        "next_keyword_index": cursor[0] if has_more else None,
+        "next_page": cursor[1] if has_more else None,
+        "next_offset": cursor[2] if has_more else None,
         "has_more": has_more,
-        "total_keywords": len(all_keywords)
+        "total_keywords": len(all_keywords),
+        "rate_limited": retry_after is not None,
+        "retry_after": math.ceil(retry_after) if retry_after is not None else None
     }
 
-def get_keywords(field):
-    # Map majors to related keywords
-    keywords_map = {
-        "Computer Science": ["software", "developer", "programming", "engineer"],
-        "Biology": ["research", "biologist", "biotech", "lab", "scientist"],
-        "Business": ["management", "finance", "marketing", "consulting"],
-        "Business Analytics": ["data analyst", "business intelligence", "analytics"],
-        "Math": ["mathematician", "quantitative analyst", "actuary"],
-        "Data Science": ["data scientist", "machine learning", "data engineer"],
-        "Economics": ["economist", "financial analyst", "policy analyst"],
-        "Statistics": ["statistician", "data analyst", "quantitative researcher"],
-        "Spanish": ["translator", "interpreter", "language teacher"],
-        "Physics": ["physicist", "research scientist", "engineer"],
-        "Aerospace Engineering": ["aerospace", "engineer", "aviation"],
-        "Agricultural and Biological Engineering": ["agricultural", "bioengineering", "engineer"],
-        "Bioengineering": ["biomedical", "bioengineer", "medical device"],
-        "Chemical Engineering": ["chemical", "process engineer", "petrochemical"],
-        "Civil Engineering": ["civil", "structural engineer", "construction"],
-        "Computer Engineering": ["hardware", "embedded systems", "engineer"],
-        "Electrical Engineering": ["electrical", "circuit design", "power systems"],
-        "Engineering Mechanics": ["mechanical", "structural analysis", "engineer"],
-        "Engineering Physics": ["applied physics", "engineer", "research"],
-        "Industrial Engineering": ["industrial", "operations", "supply chain"],
-        "Materials Science and Engineering": ["materials", "metallurgy", "engineer"],
-        "Mechanical Engineering": ["mechanical", "design engineer", "manufacturing"],
-        "Nuclear, Plasma, and Radiological Engineering": ["nuclear", "radiological", "engineer"],
-        "Systems Engineering and Design": ["systems", "design engineer", "integration"],
-        "Engineering Undeclared": ["engineer", "general engineering"]
-    }
-    
-    return keywords_map.get(field, [])  # Return empty list if field not found
+def get_career_choices_for_major_minor(major, minor, location="gb", results_per_page=5, max_pages=10, jobs_per_batch=5, current_keyword_index=0, current_page=1, concurrent=False, current_offset=0, seen_urls=None):
+    all_keywords = search_keywords(major, minor)
+    jobs_logger.debug("Keywords to search: %s", all_keywords)
 
-def keyword_score(job, keywords):
-    content = (job.get("title", "") + job.get("description", "")).lower()
-    return sum(kw.lower() in content for kw in keywords)
\ No newline at end of file
+    pipeline = job_pipeline(
+        all_keywords, location, results_per_page, max_pages,
+        current_keyword_index, current_page, current_offset, concurrent, seen_urls, jobs_per_batch,
+    )
+    jobs, cursor, retry_after = collect_jobs(pipeline, jobs_per_batch)
+    return batch_summary(jobs, cursor, retry_after, all_keywords, keyword_groups(major, minor, all_keywords))
+
+def stream_career_choices_for_major_minor(major, minor, location="gb", results_per_page=5, max_pages=10, jobs_per_batch=5, current_keyword_index=0, current_page=1, concurrent=False, current_offset=0, seen_urls=None):
+    """
+    get_career_choices_for_major_minor as a stream of events: ("job", job)
+    as soon as each job's page arrives, then ("summary", response body)
+    with the batch ranked and the next cursor.
+    """
+    all_keywords = search_keywords(major, minor)
+    jobs_logger.debug("Keywords to stream: %s", all_keywords)
+
+    pipeline = job_pipeline(
+        all_keywords, location, results_per_page, max_pages,
+        current_keyword_index, current_page, current_offset, concurrent, seen_urls, jobs_per_batch,
+    )
+    jobs = []
+    batch = batch_jobs(pipeline, jobs_per_batch)
+    try:
+        while True:
+            try:
+                job = next(batch)
+            except StopIteration as stop:
+                cursor, retry_after = stop.value
+                break
+            jobs.append(job)
+            yield "job", job
+    finally:
+        batch.close()
+    yield "summary", batch_summary(jobs, cursor, retry_after, all_keywords, keyword_groups(major, minor, all_keywords))
+
+async def fetch_page_async(keyword, location="gb", results_per_page=5, page=1):
+    """
+    fetch_page for async views: same cache and rate limiter, awaiting instead
+    of blocking. Their SQLite I/O runs in worker threads so a slow lock never
+    stalls the event loop.
+    """
+    cache_key = ("adzuna", keyword, location, results_per_page, page)
+    if page_cache is not None:
+        data = await page_cache.aget(cache_key)
+        if data is not None:
+            return data
+    data = await _request_page_async(keyword, location, results_per_page, page)
+    if page_cache is not None:
+        await page_cache.aset(cache_key, data)
+    return data
+
+async def _request_page_async(keyword, location, results_per_page, page):
+    url, params = _page_request(keyword, location, results_per_page, page)
+    deadline = time.monotonic() + ADZUNA_MAX_WAIT
+    for attempt in range(ADZUNA_MAX_RETRIES + 1):
+        wait = await asyncio.to_thread(rate_limiter.try_acquire) if rate_limiter is not None else 0.0
+        if wait:
+            if time.monotonic() + wait > deadline:
+                raise RateLimited(wait)
+            await asyncio.sleep(wait)
+            metrics.observe_span("adzuna_rate_limit_wait", wait)
+            continue
+        logger.debug("Async Adzuna request %s keyword=%r location=%s page=%d", url, keyword, location, page)
+        with metrics.upstream_call("adzuna") as call:
+            response = await get_async_client().get(url, params=params)
+            call.status = response.status_code
+        logger.debug("Adzuna response %d for keyword=%r page=%d", response.status_code, keyword, page)
+        if response.status_code == 429:
+            delay, retry = _throttle_delay(response, attempt, deadline)
+            if rate_limiter is not None:
+                await asyncio.to_thread(rate_limiter.block_for, delay)
+            if not retry:
+                raise RateLimited(delay)
+            await asyncio.sleep(delay)
+            metrics.observe_span("adzuna_backoff", delay)
+            continue
+        response.raise_for_status()
+        return response.json()
+    raise RateLimited(backoff_delay(ADZUNA_MAX_RETRIES))
+
+async def iter_pages_async(keywords, location="gb", results_per_page=5, max_pages=10, keyword_index=0, page=1):
+    """iter_pages as an async generator"""
+    for index in range(keyword_index, len(keywords)):
+        current = page if index == keyword_index else 1
+        while current <= max_pages:
+            try:
+                data = await fetch_page_async(keywords[index], location, results_per_page, current)
+            except RateLimited as e:
+                e.position = (index, current)
+                raise
+            except (httpx.HTTPError, ValueError) as e:
+                logger.warning("Error fetching jobs for keyword=%r page %d: %s", keywords[index], current, e)
+                break
+            results = data.get("results", [])
+            last_page = min(max_pages, _page_count(data, results_per_page)) if results else current
+            yield index, current, results, last_page
+            if current >= last_page:
+                break
+            current += 1
+
+async def get_career_choices_async(major, minor, location="gb", results_per_page=5, max_pages=10, jobs_per_batch=5, current_keyword_index=0, current_page=1, current_offset=0, seen_urls=None):
+    """
+    get_career_choices_for_major_minor for async views. Pages are awaited one
+    at a time and run through the same iter_results -> unique_jobs ->
+    format_job stages, stopping as soon as the batch is full.
+    """
+    all_keywords = search_keywords(major, minor)
+    seen_urls = set() if seen_urls is None else seen_urls
+    pages = iter_pages_async(all_keywords, location, results_per_page, max_pages, current_keyword_index, current_page)
+    jobs = []
+    cursor = None
+    exhausted = True
+    retry_after = None
+    first = True
+    try:
+        async for page_data in pages:
+            for job, cursor in unique_jobs(iter_results([page_data], current_offset if first else 0), seen_urls):
+                jobs.append(format_job(job))
+                if len(jobs) >= jobs_per_batch:
+                    exhausted = False
+                    break
+            first = False
+            if not exhausted:
+                break
+    except RateLimited as e:
+        jobs_logger.info("Adzuna rate limited, ending batch after %d jobs: %s", len(jobs), e)
+        index, current = e.position
+        cursor, exhausted, retry_after = (index, current, current_offset if first else 0), False, e.retry_after
+    finally:
+        await pages.aclose()
+    return batch_summary(jobs, None if exhausted else cursor, retry_after, all_keywords, keyword_groups(major, minor, all_keywords))
+
+# Map majors to related keywords
+MAJOR_KEYWORDS = {
+    "Computer Science": ["software", "developer", "programming", "engineer"],
+    "Biology": ["research", "biologist", "biotech", "lab", "scientist"],
+    "Business": ["management", "finance", "marketing", "consulting"],
+    "Business Analytics": ["data analyst", "business intelligence", "analytics"],
+    "Math": ["mathematician", "quantitative analyst", "actuary"],
+    "Data Science": ["data scientist", "machine learning", "data engineer"],
+    "Economics": ["economist", "financial analyst", "policy analyst"],
+    "Statistics": ["statistician", "data analyst", "quantitative researcher"],
+    "Spanish": ["translator", "interpreter", "language teacher"],
+    "Physics": ["physicist", "research scientist", "engineer"],
+    "Aerospace Engineering": ["aerospace", "engineer", "aviation"],
+    "Agricultural and Biological Engineering": ["agricultural", "bioengineering", "engineer"],
+    "Bioengineering": ["biomedical", "bioengineer", "medical device"],
+    "Chemical Engineering": ["chemical", "process engineer", "petrochemical"],
+    "Civil Engineering": ["civil", "structural engineer", "construction"],
+    "Computer Engineering": ["hardware", "embedded systems", "engineer"],
+    "Electrical Engineering": ["electrical", "circuit design", "power systems"],
+    "Engineering Mechanics": ["mechanical", "structural analysis", "engineer"],
+    "Engineering Physics": ["applied physics", "engineer", "research"],
+    "Industrial Engineering": ["industrial", "operations", "supply chain"],
+    "Materials Science and Engineering": ["materials", "metallurgy", "engineer"],
+    "Mechanical Engineering": ["mechanical", "design engineer", "manufacturing"],
+    "Nuclear, Plasma, and Radiological Engineering": ["nuclear", "radiological", "engineer"],
+    "Systems Engineering and Design": ["systems", "design engineer", "integration"],
+    "Engineering Undeclared": ["engineer", "general engineering"]
+}
+
+def get_keywords(field):
+    return MAJOR_KEYWORDS.get(field, [])  # Return empty list if field not found
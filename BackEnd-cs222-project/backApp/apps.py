@@ -1,6 +1,27 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.test.signals import setting_changed
+
+
+def update_metrics(setting, value, **kwargs):
+    if setting == "METRICS_ENABLED":
+        from . import metrics
+        metrics.configure(value)
 
 
 class BackappConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'backApp'
+
+    def ready(self):
+        from . import metrics
+        metrics.configure(getattr(settings, "METRICS_ENABLED", False))
+        setting_changed.connect(update_metrics)
+
+        # Compile the minor rules and their course -> minors index before the first request
+        from .minor_rules import get_minor_rules
+        get_minor_rules()
+
+        # Configure the Gemini client once per worker rather than per request
+        from .insights import get_model
+        get_model()
@@ -0,0 +1,115 @@
+"""
+Native async versions of the views that wait on upstream APIs.
+
+Served under /api/async/ from the ASGI entry point (e.g. `uvicorn
+minorproject.asgi:application`), these await Adzuna through a shared
+httpx.AsyncClient and Gemini through its async client instead of holding a
+worker thread per request, so one process can keep thousands of slow
+upstream calls in flight. Request and response bodies match the sync
+endpoints. They are plain Django views because DRF views are sync only.
+"""
+import json
+import logging
+from django.core import signing
+from django.http import JsonResponse
+
+from JobInfoAPI import get_career_choices_async
+from .backend import JOB_BATCH, basic_insights, job_request_position, with_cursor
+from .catalog import aget_catalog, catalog_path
+from .insights import generate_insights_async
+from .minor_rules import get_minor_rules
+from . import metrics
+
+logger = logging.getLogger("minorrec.views")
+
+
+def async_api_view(view):
+    """POST-only JSON view, exempt from CSRF like DRF's api_view (Django 4.2's decorators are sync only)"""
+    async def wrapped(request):
+        if request.method != "POST":
+            return JsonResponse({"error": f"Method {request.method} not allowed"}, status=405)
+        try:
+            data = json.loads(request.body or b"{}")
+        except ValueError:
+            return JsonResponse({"error": "Request body must be JSON"}, status=400)
+        if not isinstance(data, dict):
+            return JsonResponse({"error": "Request body must be a JSON object"}, status=400)
+        return await view(request, data)
+
+    wrapped.csrf_exempt = True
+    wrapped.__name__ = view.__name__
+    wrapped.__doc__ = view.__doc__
+    return wrapped
+
+
+@async_api_view
+async def job_recommendations(request, data):
+    major = data.get("major", "")
+    minor = data.get("minor", "")
+    if not major or not minor:
+        return JsonResponse({"error": "Missing required fields: 'major' and 'minor'", "jobs": []}, status=400)
+
+    try:
+        position, seen_urls = job_request_position(data, major, minor)
+    except signing.BadSignature:
+        return JsonResponse({"error": "Invalid or expired cursor", "jobs": []}, status=400)
+    except (TypeError, ValueError):
+        return JsonResponse({"error": "Cursor fields must be integers", "jobs": []}, status=400)
+
+    keyword_index, page, offset = position
+    try:
+        jobs = await get_career_choices_async(
+            major=major,
+            minor=minor,
+            **JOB_BATCH,
+            current_keyword_index=keyword_index,
+            current_page=page,
+            current_offset=offset,
+            seen_urls=seen_urls,
+        )
+    except Exception:
+        logger.exception("Error fetching job recommendations")
+        return JsonResponse({"error": "Failed to fetch job recommendations", "jobs": []}, status=500)
+
+    response = JsonResponse(with_cursor(jobs, major, minor, seen_urls))
+    if jobs["rate_limited"]:
+        response["Retry-After"] = str(jobs["retry_after"])
+    return response
+
+
+@async_api_view
+async def career_insights(request, data):
+    major = data.get("major", "")
+    minor = data.get("minor", "")
+    if not major or not minor:
+        return JsonResponse({"error": "Missing required fields: 'major' and 'minor'"}, status=400)
+
+    try:
+        insights = await generate_insights_async(major, minor)
+    except Exception:
+        logger.exception("Error generating career insights")
+        insights = None
+    if insights is None:
+        return JsonResponse(basic_insights(major, minor))
+    return JsonResponse({"major": major, "minor": minor, "insights": insights, "source": "gemini_api"})
+
+
+@async_api_view
+async def minor_progress(request, data):
+    inputted_classes = data.get("classes", [])
+    major = data.get("major", "")
+    if not inputted_classes or not major:
+        return JsonResponse({"error": "Missing required fields: 'classes' and 'major'"}, status=400)
+
+    try:
+        with metrics.span("catalog_load"):
+            catalog = await aget_catalog()
+    except FileNotFoundError:
+        return JsonResponse({"error": f"CSV file not found at {catalog_path()}"}, status=404)
+
+    with metrics.span("credit_lookup"):
+        credits = {course: catalog.course_credits(course) for course in inputted_classes}
+    rules = get_minor_rules()
+    with metrics.span("rules_evaluate"):
+        current_credit = rules.evaluate(inputted_classes, credits.__getitem__)
+    return JsonResponse({"percentages": rules.percentages(current_credit)})
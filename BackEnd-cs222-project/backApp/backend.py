@@ -1,22 +1,40 @@
-import os
+import hmac
 import json
+import logging
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
-import pandas as pd
-from JobInfoAPI import get_career_choices_for_major_minor
-
-CSV_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'course-catalog.csv')
-
-def get_course_credits(gpaFile, course_name):
-    """Helper function to get credit hours for a course"""
-    try:
-        if not gpaFile["courseName"].eq(course_name).any():
-            return 0
-        firstIndex = (gpaFile["courseName"] == course_name).idxmax()
-        creditRow = int((gpaFile.loc[firstIndex, "Credit Hours"])[0:1])
-        return int(float(str(creditRow).replace(' hours.', ''))) if pd.notna(creditRow) else 0
-    except (KeyError, ValueError):
-        return 0
+from django.conf import settings
+from django.core import signing
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+from JobInfoAPI import get_career_choices_for_major_minor, stream_career_choices_for_major_minor
+from .catalog import get_catalog, catalog_path
+from .minor_rules import get_minor_rules
+from .planner import get_planner
+from .what_if import WhatIf, STATE_VERSION
+from .cached_responses import catalog_payload, payload_response
+from .typeahead import get_course_index
+from .insights import generate_insights
+from .singleflight import SingleFlight
+from .caching import MISSING
+from .cursors import Prefetcher, SeenUrls, decode_cursor, encode_cursor
+from . import metrics
+
+logger = logging.getLogger("minorrec.views")
+
+MAX_SEARCH_LIMIT = 50
+MAX_LOOKUP_COURSES = 500
+
+# Shape of one job_recommendations batch; warm_caches fetches the same pages
+JOB_BATCH = {"location": "gb", "results_per_page": 5, "max_pages": 10, "jobs_per_batch": 5}
+
+# Identical job_recommendations batches in flight at once share one Adzuna sweep. There is
+# no recheck, so this coalesces within a worker only; across workers the sweeps share
+# pages through JobInfoAPI's page cache instead.
+job_flight = SingleFlight("jobs", getattr(settings, "SINGLEFLIGHT_LOCK_DIR", None))
+
+# The batch after the one just served, computed while the user reads
+job_prefetcher = Prefetcher()
 
 @api_view(["GET"])
 def home(request):
@@ -24,40 +42,156 @@ def home(request):
 
 @api_view(["GET", "POST"])
 def classNames(request): 
-    gpaFile = pd.read_csv(CSV_PATH)
-    return Response(gpaFile["courseName"].drop_duplicates().tolist())
+    catalog = get_catalog()
+    return payload_response(request, catalog_payload("classNames", catalog, lambda c: list(c.course_names)))
 
 @api_view(["GET", "POST"])
 def subjectNames(request): 
-    gpaFile = pd.read_csv(CSV_PATH)
-    return Response(gpaFile["Subject"].dropna().drop_duplicates().tolist())
+    catalog = get_catalog()
+    return payload_response(request, catalog_payload("subjectNames", catalog, lambda c: list(c.subject_names)))
+
+@api_view(["GET"])
+def course_search(request):
+    query = request.query_params.get("q", "")
+    try:
+        limit = min(max(int(request.query_params.get("limit", 10)), 0), MAX_SEARCH_LIMIT)
+        offset = max(int(request.query_params.get("offset", 0)), 0)
+    except ValueError:
+        return Response({"error": "'limit' and 'offset' must be integers"}, status=400)
+
+    index = get_course_index(get_catalog())
+    total, results = index.results(query, limit=limit, offset=offset)
+    return Response({"query": query, "total": total, "limit": limit, "offset": offset, "results": results})
+
+def job_request_position(params, major, minor):
+    """((keyword_index, page, offset), SeenUrls) from an opaque cursor, or from the legacy index fields"""
+    token = params.get("cursor")
+    if token:
+        return decode_cursor(token, major, minor, max_age=getattr(settings, "JOB_CURSOR_MAX_AGE", None))
+    position = (
+        int(params.get("current_keyword_index", 0)),
+        int(params.get("current_page", 1)),
+        int(params.get("current_offset", 0)),
+    )
+    return position, SeenUrls()
+
+def with_cursor(result, major, minor, seen_urls):
+    """Add the opaque cursor for the batch after `result`"""
+    position = (result["next_keyword_index"], result["next_page"], result["next_offset"])
+    result["cursor"] = encode_cursor(major, minor, position, seen_urls) if result["has_more"] else None
+    return result
+
+def run_job_batch(major, minor, position, seen_urls):
+    seen_urls = seen_urls.copy()
+    keyword_index, page, offset = position
+    result = get_career_choices_for_major_minor(
+        major=major,
+        minor=minor,
+        **JOB_BATCH,
+        current_keyword_index=keyword_index,
+        current_page=page,
+        current_offset=offset,
+        concurrent=getattr(settings, "ADZUNA_CONCURRENT_FETCH", False),
+        seen_urls=seen_urls,
+    )
+    return with_cursor(result, major, minor, seen_urls)
+
+def prefetch_next_batch(result, major, minor):
+    token = result.get("cursor")
+    if not token or result["rate_limited"] or not getattr(settings, "JOB_PREFETCH", False):
+        return
+    position, seen_urls = decode_cursor(token, major, minor)
+    job_prefetcher.submit(token, lambda: run_job_batch(major, minor, position, seen_urls))
 
 @api_view(["POST"])
 def job_recommendations(request):
     major = request.data.get("major", "")
     minor = request.data.get("minor", "")
-    current_keyword_index = int(request.data.get("current_keyword_index", 0))
-    current_page = int(request.data.get("current_page", 1))
     
     if not major or not minor:
         return Response({"error": "Missing required fields: 'major' and 'minor'", "jobs": []}, status=400)
+
+    try:
+        position, seen_urls = job_request_position(request.data, major, minor)
+    except signing.BadSignature:
+        return Response({"error": "Invalid or expired cursor", "jobs": []}, status=400)
+    except (TypeError, ValueError):
+        return Response({"error": "Cursor fields must be integers", "jobs": []}, status=400)
     
     try:
-        jobs = get_career_choices_for_major_minor(
-            major=major,
-            minor=minor,
-            location="gb",
-            results_per_page=5,
-            max_pages=10,
-            jobs_per_batch=5,
-            current_keyword_index=current_keyword_index,
-            current_page=current_page
-        )
-        return Response(jobs)
-    except Exception as e:
-        print(f"Error fetching job recommendations: {e}")
+        token = request.data.get("cursor")
+        jobs = job_prefetcher.take(token) if token else MISSING
+        if jobs is MISSING:
+            key = token or json.dumps([major, minor, *position])
+            jobs = job_flight.do(key, lambda: run_job_batch(major, minor, position, seen_urls))
+        prefetch_next_batch(jobs, major, minor)
+        response = Response(jobs)
+        if jobs["rate_limited"]:
+            response["Retry-After"] = str(jobs["retry_after"])
+        return response
+    except Exception:
+        logger.exception("Error fetching job recommendations")
         return Response({"error": "Failed to fetch job recommendations", "jobs": []}, status=500)
 
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n".encode("utf-8")
+
+def job_event_stream(events):
+    try:
+        for event, data in events:
+            yield sse_event(event, data)
+    except Exception:
+        logger.exception("Error streaming job recommendations")
+        yield sse_event("error", {"error": "Failed to fetch job recommendations"})
+
+def job_batch_events(major, minor, position, seen_urls):
+    """stream_career_choices_for_major_minor events, with the opaque cursor added to the summary"""
+    keyword_index, page, offset = position
+    events = stream_career_choices_for_major_minor(
+        major=major,
+        minor=minor,
+        **JOB_BATCH,
+        current_keyword_index=keyword_index,
+        current_page=page,
+        current_offset=offset,
+        concurrent=getattr(settings, "ADZUNA_CONCURRENT_FETCH", False),
+        seen_urls=seen_urls,
+    )
+
+    for event, data in events:
+        if event == "summary":
+            prefetch_next_batch(with_cursor(data, major, minor, seen_urls), major, minor)
+        yield event, data
+
+# A plain Django view: EventSource only sends GET with Accept: text/event-stream,
+# which DRF's content negotiation would reject.
+@require_GET
+def job_recommendations_stream(request):
+    major = request.GET.get("major", "")
+    minor = request.GET.get("minor", "")
+    if not major or not minor:
+        return JsonResponse({"error": "Missing required fields: 'major' and 'minor'"}, status=400)
+    try:
+        position, seen_urls = job_request_position(request.GET, major, minor)
+    except signing.BadSignature:
+        return JsonResponse({"error": "Invalid or expired cursor"}, status=400)
+    except ValueError:
+        return JsonResponse({"error": "Cursor fields must be integers"}, status=400)
+
+    token = request.GET.get("cursor")
+    prefetched = job_prefetcher.take(token) if token else MISSING
+    if prefetched is not MISSING:
+        prefetch_next_batch(prefetched, major, minor)
+        events = iter([*(("job", job) for job in prefetched["jobs"]), ("summary", prefetched)])
+    else:
+        events = job_batch_events(major, minor, position, seen_urls)
+
+    response = StreamingHttpResponse(job_event_stream(events), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    # stop nginx-style proxies from buffering the stream
+    response["X-Accel-Buffering"] = "no"
+    return response
+
 @api_view(["POST"])
 def career_insights(request):
     major = request.data.get("major", "")
@@ -67,94 +201,46 @@ def career_insights(request):
         return Response({"error": "Missing required fields: 'major' and 'minor'"}, status=400)
 
     try:
-        # Use AI to generate dynamic career insights
-        import google.generativeai as genai
-        from dotenv import load_dotenv
-
-        # Load environment variables
-        load_dotenv()
-
-        # Configure Gemini API
-        api_key = os.getenv('GEMINI_API_KEY')
-        if not api_key:
+        # Use AI to generate dynamic career insights, served from cache for pairs already answered
+        insights = generate_insights(major, minor)
+        if insights is None:
             # Return basic career insights when no API key
             return get_basic_insights(major, minor)
 
-        genai.configure(api_key=api_key)
-        model = genai.GenerativeModel('gemini-2.0-flash')
-
-        # Create comprehensive prompt for career insights
-        prompt = f"""
-        Generate career insights for someone with a {major} major and {minor} minor from UIUC.
-
-        Provide insights in the following JSON format ONLY (no additional text):
-        {{
-            "jobTypes": ["job1", "job2", "job3", "job4", "job5"],
-            "salaryRange": {{
-                "entry": "$X,XXX",
-                "mid": "$XX,XXX",
-                "senior": "$XXX,XXX+"
-            }},
-            "topLocations": ["location1, ST", "location2, ST", "location3, ST", "location4, ST", "location5, ST"],
-            "topCompanies": ["company1", "company2", "company3", "company4", "company5"],
-            "growthOutlook": "Brief description of industry growth outlook",
-            "keySkills": ["skill1", "skill2", "skill3", "skill4", "skill5"]
-        }}
-
-        Consider:
-        - Realistic salary ranges for recent graduates
-        - Top companies that hire this combination
-        - Best geographic locations for these careers
-        - Industry growth trends
-        - Essential skills for success
-
-        Make the data realistic and specific to the {major} + {minor} combination.
-        """
-
-        # Generate response
-        response = model.generate_content(prompt)
-        response_text = response.text.strip()
-
-        # Clean up response (remove markdown code blocks if present)
-        response_text = response_text.replace('```json', '').replace('```', '').strip()
-
-        # Parse the JSON response
-        parsed_data = json.loads(response_text)
-
-        # Validate the structure
-        required_fields = ['jobTypes', 'salaryRange', 'topLocations', 'topCompanies', 'growthOutlook', 'keySkills']
-        if not all(field in parsed_data for field in required_fields):
-            raise ValueError("Missing required fields in AI response")
-
         return Response({
             "major": major,
             "minor": minor,
-            "insights": parsed_data,
+            "insights": insights,
             "source": "gemini_api"
         })
 
-    except Exception as e:
+    except Exception:
         # Return basic insights if AI fails
+        logger.exception("Error generating career insights")
         return get_basic_insights(major, minor)
 
+# Simple mapping of majors to career categories
+MAJOR_CATEGORIES = {
+    "Advertising": "marketing",
+    "Business": "business",
+    "Computer Science": "technology",
+    "Engineering": "engineering",
+    "Psychology": "social_sciences",
+    "Biology": "sciences",
+    "Mathematics": "mathematics",
+    "Economics": "business",
+    "English": "humanities",
+    "History": "humanities"
+}
+
 def get_basic_insights(major, minor):
     """Return basic career insights when AI is not available"""
-    # Simple mapping of majors to career categories
-    major_categories = {
-        "Advertising": "marketing",
-        "Business": "business",
-        "Computer Science": "technology",
-        "Engineering": "engineering",
-        "Psychology": "social_sciences",
-        "Biology": "sciences",
-        "Mathematics": "mathematics",
-        "Economics": "business",
-        "English": "humanities",
-        "History": "humanities"
-    }
+    return Response(basic_insights(major, minor))
 
+def basic_insights(major, minor):
+    """The get_basic_insights response body"""
     # Get category for major
-    major_category = major_categories.get(major, "general")
+    major_category = MAJOR_CATEGORIES.get(major, "general")
 
     # Basic insights based on major category
     insights_by_category = {
@@ -203,12 +289,12 @@ def get_basic_insights(major, minor):
     # Get insights for this major's category
     insights = insights_by_category.get(major_category, insights_by_category["general"])
 
-    return Response({
+    return {
         "major": major,
         "minor": minor,
         "insights": insights,
         "source": "basic_insights"
-    })
+    }
 
 @api_view(["GET", "POST"])  
 def minor_progress(request):
@@ -219,244 +305,196 @@ def minor_progress(request):
     if not inputted_classes or not major:
         return Response({"error": "Missing required fields: 'classes' and 'major'"}, status=400)
 
-    percentage_complete = {
-        "Business": 0,
-        "Business Analytics": 0,
-        "Biology": 0,
-        "Computer Science": 0,
-        "Math": 0,
-        "Data Science": 0,
-        "Economics": 0,
-        "Statistics": 0, 
-        "Spanish": 0,
-        "Physics": 0
-    }
-
-    credit_hours = {
-        "Business": 18,
-        "Business Analytics": 18,
-        "Biology": 16,
-        "Computer Science": 19,
-        "Math": 19,
-        "Data Science": 21,
-        "Economics": 18,
-        "Statistics": 17, 
-        "Spanish": 18,
-        "Physics": 21
-    }
-
-    minors_required = {
-        "Business": ["BADM 310", "BADM 320", "FIN 221"],
-        "Business Analytics": ["BADM 352", "BADM 356", "BADM 358", "BADM 373", "BADM 374"],  # Fixed typo
-        "Biology": [],
-        "Computer Science": ["CS 124", "CS 128", "CS 173", "CS 225"],
-        "Math": ["MATH 241"],
-        "Data Science": ["STAT 107", "STAT 207", "CS 307"],
-        "Economics": ["ECON 102", "ECON 202", "ECON 203", "ECON 302"],
-        "Statistics": [], 
-        "Spanish": ["SPAN 228"],
-        "Physics": ["PHYS 211", "PHYS 212", "PHYS 225", "PHYS 325"]
-    }
-
-    minors_electives = {
-        "Business": [],
-        "Business Analytics": [],
-        "Biology": [],
-        "Computer Science": [],
-        "Math": [],
-        "Data Science": [],
-        "Economics": [],
-        "Statistics": [], 
-        "Spanish": [],
-        "Physics": []
-    }
-
-    current_credit = {
-        "Business": 0,
-        "Business Analytics": 0,
-        "Biology": 0,
-        "Computer Science": 0,
-        "Math": 0,
-        "Data Science": 0,
-        "Economics": 0,
-        "Statistics": 0, 
-        "Spanish": 0,
-        "Physics": 0
-    }
-
-    # Business electives
-    minors_electives["Business"] = [
-        item for item in inputted_classes 
-        if (item in [
-            "BADM 275", "BADM 300", "BADM 311", "BADM 312", "BADM 313", "BADM 314", 
-            "BADM 323", "BADM 326", "BADM 340", "BADM 350", "BADM 380", "BADM 381", 
-            "BDI 367", "BDI 411", "BDI 475", "BDI 477", "FIN 230", "FIN 241", "FIN 435"
-        ][:2]) 
-        or (item == "ACCY 200" or (item in ["ACCY 201", "ACCY 202"] and all(sub in inputted_classes for sub in ["ACCY 201", "ACCY 202"])))
-    ]
-
-    # Business Analytics electives
-    minors_electives["Business Analytics"] = [
-        item for item in inputted_classes
-        if item in [
-            "BADM 336", "BADM 351", "BADM 361", "BADM 362", "BADM 379", "BADM 453",
-            "ACCY 302", "FIN 464"
-        ]
-    ][:1]
-
-    # Biology
-    minors_electives["Biology"] = [
-        item for item in inputted_classes if item in [
-            "IB 150", "IB 103", "IB 104"
-        ][:1]  
-    ] + [
-        item for item in inputted_classes if item in [
-            "IB 202", "IB 203", "IB 204", "IB 302"
-        ][:2]  
-    ] + [
-        item for item in inputted_classes if item.startswith("IB 3") or item.startswith("IB 4")
-    ][:2]
-    
-
-    # Computer Science electives
-    minors_electives["Computer Science"] = [
-        item for item in inputted_classes 
-        if (item.startswith("CS 3") or item.startswith("CS 4")) 
-        and item not in [
-            "CS 397", "CS 398", "CS 400", "CS 401", "CS 402", "CS 403", 
-            "CS 413", "CS 491", "CS 492", "CS 493", "CS 494", "CS 497", "CS 499"
-        ]
-    ][:2]
-
-    # Math electives
-    minors_electives["Math"] = [
-        item for item in inputted_classes 
-        if item in {
-            "ASRM 406", "MATH 257", "MATH 415", "MATH 416", "MATH 417", "MATH 418", "MATH 427", "MATH 453",
-            "MATH 412", "MATH 413", "MATH 414", "MATH 482", "MATH 284", "MATH 285", "MATH 424", "MATH 425", 
-            "MATH 441", "MATH 442", "MATH 444", "MATH 446", "MATH 447", "MATH 448", "CS 450", "MATH 484", 
-            "MATH 487", "MATH 489", "MATH 347", "MATH 402", "MATH 403", "MATH 423", "MATH 428", "MATH 432", 
-            "MATH 481", "MATH 461", "STAT 400"
-        } 
-        or (item in {"STAT 410", "STAT 420"} and not {"STAT 410", "STAT 420"}.issubset(inputted_classes))
-    ][:5]
-
-    # Data Science electives
-    minors_electives["Data Science"] = [
-        item for item in inputted_classes
-        if item in {
-            "ATMS 207", "CS 416", "CS 441", "GGIS 407", 
-            "IS 357", "IS 417", "IS 445", "LING 406", "MATH 467", "STAT 432", 
-            "STAT 440", "STAT 447", "STAT 480"
-        } or (item in {"CS 225", "CS 277"} and not {"CS 225", "CS 277"}.issubset(inputted_classes))
-    ][:2] + [
-        item for item in inputted_classes 
-        if item in {"IS 467", "IS 477"}
-    ][:1]
-
-    # Economics electives
-    if any(item in inputted_classes for item in ["ECON 411", "ECON 414", "ECON 440", "ECON 450", "ECON 451", "ECON 452", "ECON 480", "ECON 481", "ECON 483", "ECON 482", "ECON 484", "ECON 490"]):
-        minors_electives["Economics"] = [
-            item for item in inputted_classes 
-            if item in {
-                "ECON 411", "ECON 414", "ECON 440", "ECON 450", "ECON 451", "ECON 452", 
-                "ECON 480", "ECON 481", "ECON 483", "ECON 482", "ECON 484", "ECON 490"
-            }
-        ][:2]
-    elif any(item in inputted_classes for item in ["ECON 103", "ECON 303", "ECON 420", "ECON 425", "ECON 452", "ECON 490"]):
-        minors_electives["Economics"] = [
-            "ECON 103", "ECON 303"
-        ] + [
-            item for item in inputted_classes 
-            if item in {"ECON 420", "ECON 425", "ECON 452", "ECON 490"}
-        ][:1]
-    elif any(item in inputted_classes for item in ["ECON 471", "ECON 465", "ECON 490"]):
-        minors_electives["Economics"] = [
-            item for item in inputted_classes 
-            if item in {"ECON 471", "ECON 465", "ECON 490"}
-        ]
-
-    # Statistics electives
-    minors_electives["Statistics"] = [
-        item for item in inputted_classes
-        if item in [
-            "CPSC 241", "ECON 202", "EPSY 280", "PSYC 235", "STAT 100", "STAT 107", "SOC 280"
-        ]
-    ][:1] + [
-        item for item in inputted_classes
-        if item in [
-            "STAT 200", "STAT 207", "STAT 212", "ECON 203"
-        ]
-    ][:1] + [
-        item for item in inputted_classes
-        if item in [
-            "MATH 225", "MATH 257", "MATH 415"
-        ]
-    ][:1] + [
-        item for item in inputted_classes
-        if item in [
-            "STAT 400", "STAT 408", "MATH 461"
-        ]
-    ][:1] + [
-        item for item in inputted_classes
-        if item in [
-            "STAT 409", "STAT 410", "STAT 420", "STAT 424", "STAT 425", "STAT 426", "STAT 427", 
-            "STAT 428", "STAT 429", "STAT 430", "STAT 431", "STAT 432", "STAT 433", "STAT 434", 
-            "STAT 437", "STAT 440", "STAT 443", "STAT 447", "STAT 448", "STAT 480"
-        ]
-    ][:2]
-
-    # Spanish electives
-    minors_electives["Spanish"] = [
-        item for item in inputted_classes if item.startswith("SPAN 2")
-    ][:3] + [
-        item for item in inputted_classes if item.startswith("SPAN 3") or item.startswith("SPAN 4")
-    ][:3]
-
-    # Physics electives
-    minors_electives["Physics"] = [
-        item for item in inputted_classes 
-        if (item.startswith("PHYS 3") or item.startswith("PHYS 4")) and item not in ["PHYS 419", "PHYS 420"]
-    ][:2] + [
-        item for item in inputted_classes if item in ["PHYS 213", "PHYS 214"]
-    ][:1]
-    
     try:
-        print(f"Attempting to load CSV from: {CSV_PATH}")
-        gpaFile = pd.read_csv(CSV_PATH)
-        print(f"CSV loaded successfully. Columns: {gpaFile.columns.tolist()}")
+        with metrics.span("catalog_load"):
+            catalog = get_catalog()
     except FileNotFoundError as e:
-        print(f"FileNotFoundError: {e}")
-        return Response({"error": f"CSV file not found at {CSV_PATH}"}, status=404)
+        logger.error("Course catalog not found: %s", e)
+        return Response({"error": f"CSV file not found at {catalog_path()}"}, status=404)
     except Exception as e:
-        print(f"Unexpected error: {e}")
+        logger.exception("Error loading the course catalog")
         return Response({"error": str(e)}, status=500)
 
-    # Calculate credit hours from electives
-    for minor in minors_electives:
-        for course in minors_electives[minor]:
-            if isinstance(course, list):  # Handle nested lists (e.g., Spanish)
-                courses = course
-            else:
-                courses = [course]
-            for cls in courses:
-                credits = get_course_credits(gpaFile, cls)
-                current_credit[minor] += credits
-
-    # Calculate credit hours from required courses
-    for minor in minors_required:
-        common_elements = list(set(inputted_classes) & set(minors_required[minor]))
-        for cls in common_elements:
-            credits = get_course_credits(gpaFile, cls)
-            current_credit[minor] += credits
-
-    # Calculate the percentage completed
-    for minor in percentage_complete:
-        if credit_hours[minor] > 0:  # Avoid division by zero
-            percentage_complete[minor] = 100 * (current_credit[minor] / credit_hours[minor])
+    with metrics.span("credit_lookup"):
+        credits = {course: catalog.course_credits(course) for course in inputted_classes}
+
+    # One pass over the classes scores every minor, see minor_requirements.json
+    rules = get_minor_rules()
+    with metrics.span("rules_evaluate"):
+        current_credit = rules.evaluate(inputted_classes, credits.__getitem__)
 
     #sorting based on highest completion rate
-    percentage_complete = dict(sorted(percentage_complete.items(), key=lambda item: item[1], reverse=True))
+    percentage_complete = rules.percentages(current_credit)
     return Response({
         "percentages": percentage_complete,
     })
+
+@api_view(["POST"])
+def minor_progress_batch(request):
+    transcripts = request.data.get("transcripts", [])
+
+    if not isinstance(transcripts, list) or not transcripts:
+        return Response({"error": "Missing required field: 'transcripts'"}, status=400)
+    if not all(isinstance(transcript, dict) and isinstance(transcript.get("classes", []), list) for transcript in transcripts):
+        return Response({"error": "Each transcript must be an object with a 'classes' list"}, status=400)
+
+    try:
+        with metrics.span("catalog_load"):
+            catalog = get_catalog()
+    except FileNotFoundError as e:
+        logger.error("Course catalog not found: %s", e)
+        return Response({"error": f"CSV file not found at {catalog_path()}"}, status=404)
+
+    # One students x courses matrix for the whole batch
+    rules = get_minor_rules()
+    with metrics.span("rules_evaluate_batch"):
+        credits = rules.evaluate_batch([transcript.get("classes", []) for transcript in transcripts], catalog.course_credits)
+
+    results = []
+    for transcript, row in zip(transcripts, credits):
+        results.append({
+            "id": transcript.get("id"),
+            "percentages": rules.percentages(dict(zip(rules.names, row.tolist()))),
+        })
+    return Response({"results": results})
+
+def normalize_course(course):
+    return " ".join(course.split()).upper()
+
+@api_view(["GET", "POST"])
+def course_minors(request):
+    """Which minors each course counts toward; ?course= (repeatable) or {"courses": [...]}"""
+    if request.method == "GET":
+        courses = request.query_params.getlist("course")
+    else:
+        courses = request.data.get("courses", [])
+    if not isinstance(courses, list) or not courses or not all(isinstance(course, str) for course in courses):
+        return Response({"error": "Missing required field: 'course' or 'courses'"}, status=400)
+    if len(courses) > MAX_LOOKUP_COURSES:
+        return Response({"error": f"At most {MAX_LOOKUP_COURSES} courses per request"}, status=400)
+
+    rules = get_minor_rules()
+    results = []
+    for course in courses:
+        course = normalize_course(course)
+        results.append({
+            "course": course,
+            "minors": [{"minor": rules.names[index], "requirement": kind} for index, kind in rules.minors_for(course)],
+        })
+    return Response({"results": results})
+
+def load_what_if(request, catalog):
+    """The session's WhatIf, rebuilt from its courses if the catalog or rules changed since"""
+    rules = get_minor_rules()
+    state = request.session.get("what_if")
+    if state is None:
+        return WhatIf(rules, catalog.course_credits)
+    courses = state.get("courses", [])
+    if state.get("v") == STATE_VERSION and state.get("catalog") == catalog.version and state.get("rules") == rules.digest:
+        try:
+            return WhatIf.from_state(rules, catalog.course_credits, state)
+        except (KeyError, TypeError, ValueError):
+            logger.warning("Discarding malformed what-if state")
+    return WhatIf.from_courses(rules, catalog.course_credits, courses if isinstance(courses, list) else [])
+
+def what_if_response(request, catalog, what_if, changed=None, save=True):
+    if save:
+        request.session["what_if"] = what_if.to_state(catalog.version)
+    body = {"courses": what_if.courses, "percentages": what_if.percentages()}
+    if changed is not None:
+        body["changed"] = changed
+    return Response(body)
+
+@api_view(["GET", "POST", "DELETE"])
+def what_if(request):
+    """Session what-if state: GET it, POST {"classes": [...]} to start over, DELETE to clear"""
+    if request.method == "DELETE":
+        request.session.pop("what_if", None)
+        return Response(status=204)
+    if request.method == "POST":
+        classes = request.data.get("classes", [])
+        if not isinstance(classes, list) or not all(isinstance(course, str) for course in classes):
+            return Response({"error": "'classes' must be a list of course names"}, status=400)
+        if len(classes) > MAX_LOOKUP_COURSES:
+            return Response({"error": f"At most {MAX_LOOKUP_COURSES} courses per request"}, status=400)
+
+    try:
+        with metrics.span("catalog_load"):
+            catalog = get_catalog()
+    except FileNotFoundError as e:
+        logger.error("Course catalog not found: %s", e)
+        return Response({"error": f"CSV file not found at {catalog_path()}"}, status=404)
+
+    if request.method == "POST":
+        with metrics.span("rules_evaluate"):
+            state = WhatIf.from_courses(get_minor_rules(), catalog.course_credits, [normalize_course(course) for course in classes])
+        return what_if_response(request, catalog, state)
+    # reading never creates or rewrites a session
+    return what_if_response(request, catalog, load_what_if(request, catalog), save=False)
+
+@api_view(["POST"])
+def what_if_change(request, action):
+    """Add or drop one course ({"course": ...}); only the minors it counts toward are rescored"""
+    course = request.data.get("course")
+    if not isinstance(course, str) or not course.strip():
+        return Response({"error": "Missing required field: 'course'"}, status=400)
+
+    try:
+        with metrics.span("catalog_load"):
+            catalog = get_catalog()
+    except FileNotFoundError as e:
+        logger.error("Course catalog not found: %s", e)
+        return Response({"error": f"CSV file not found at {catalog_path()}"}, status=404)
+
+    state = load_what_if(request, catalog)
+    before = len(state.courses)
+    with metrics.span("what_if_update"):
+        if action == "add":
+            changed = state.add(normalize_course(course))
+        else:
+            changed = state.remove(normalize_course(course))
+    return what_if_response(request, catalog, state, changed, save=len(state.courses) != before)
+
+@api_view(["POST"])
+def minor_plan(request):
+    """Fewest additional credit hours to finish each minor, closest first"""
+    inputted_classes = request.data.get("classes", [])
+    minors = request.data.get("minors")
+
+    if not isinstance(inputted_classes, list) or not all(isinstance(course, str) for course in inputted_classes):
+        return Response({"error": "'classes' must be a list of course names"}, status=400)
+    rules = get_minor_rules()
+    if minors is not None:
+        if not isinstance(minors, list) or not minors:
+            return Response({"error": "'minors' must be a non-empty list of minor names"}, status=400)
+        unknown = sorted(set(minors) - set(rules.names))
+        if unknown:
+            return Response({"error": f"Unknown minors: {', '.join(unknown)}"}, status=400)
+
+    try:
+        with metrics.span("catalog_load"):
+            catalog = get_catalog()
+    except FileNotFoundError as e:
+        logger.error("Course catalog not found: %s", e)
+        return Response({"error": f"CSV file not found at {catalog_path()}"}, status=404)
+
+    with metrics.span("minor_plan"):
+        plans = get_planner(catalog).plan(inputted_classes, set(minors) if minors else None)
+    ordered = sorted(plans.values(), key=lambda plan: (not plan["achievable"], plan["additional_credits"], plan["minor"]))
+    return Response({"plans": ordered})
+
+def metrics_allowed(request):
+    """A valid METRICS_TOKEN bearer token when one is set, else a client address in METRICS_ALLOWED_IPS"""
+    token = getattr(settings, "METRICS_TOKEN", "")
+    if token:
+        return hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}")
+    return request.META.get("REMOTE_ADDR") in getattr(settings, "METRICS_ALLOWED_IPS", ())
+
+@require_GET
+def metrics_view(request):
+    """Prometheus scrape endpoint for this worker process"""
+    if not metrics.enabled():
+        raise Http404("Metrics are disabled")
+    if not metrics_allowed(request):
+        return HttpResponse("Forbidden\n", status=403, content_type="text/plain")
+    return HttpResponse(metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,285 @@
+"""
+End-to-end benchmark harness for `python manage.py benchmark`.
+
+Local stand-ins for Adzuna and Gemini (plain http.server threads with
+configurable latency, error rate and 429 rate) replace the real APIs, and
+every route in backApp/urls.py is driven in-process through Django's test
+clients at a chosen concurrency: sync routes from a thread pool, async
+routes from one event loop. Each scenario reports throughput, latency
+percentiles and how many upstream calls it caused, so results saved as
+JSON can be compared between commits.
+"""
+import json
+import time
+import random
+import asyncio
+import threading
+from abc import ABC, abstractmethod
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import numpy as np
+from django.test import AsyncClient, Client
+
+FAKE_INSIGHTS = {
+    "jobTypes": ["Data Analyst", "Software Engineer", "Research Assistant", "Consultant", "Product Manager"],
+    "salaryRange": {"entry": "$65,000", "mid": "$95,000", "senior": "$140,000+"},
+    "topLocations": ["Chicago, IL", "New York, NY", "Seattle, WA", "Austin, TX", "Boston, MA"],
+    "topCompanies": ["Acme", "Globex", "Initech", "Umbrella", "Hooli"],
+    "growthOutlook": "Steady growth",
+    "keySkills": ["Python", "SQL", "Statistics", "Communication", "Teamwork"],
+}
+
+
+class FakeUpstream(ABC):
+    """A local HTTP server that answers after `latency` seconds, failing or throttling at the given rates"""
+
+    def __init__(self, latency=0.05, error_rate=0.0, throttle_rate=0.0, retry_after=1, seed=0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.counts = Counter()
+        self.lock = threading.Lock()
+        upstream = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                upstream.serve(self)
+
+            def do_POST(self):
+                upstream.serve(self)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.server.server_address
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def snapshot(self):
+        with self.lock:
+            return dict(self.counts)
+
+    def serve(self, handler):
+        with self.lock:
+            roll = self.random.random()
+        time.sleep(self.latency)
+        if roll < self.throttle_rate:
+            status, body, headers = 429, {"error": "rate limited"}, {"Retry-After": str(self.retry_after)}
+        elif roll < self.throttle_rate + self.error_rate:
+            status, body, headers = 500, {"error": "upstream failure"}, {}
+        else:
+            length = int(handler.headers.get("Content-Length") or 0)
+            status, body, headers = 200, self.respond(handler.path, handler.rfile.read(length) if length else b""), {}
+        with self.lock:
+            self.counts["requests"] += 1
+            self.counts[str(status)] += 1
+        payload = json.dumps(body).encode("utf-8")
+        handler.send_response(status)
+        handler.send_header("Content-Type", "application/json")
+        handler.send_header("Content-Length", str(len(payload)))
+        for name, value in headers.items():
+            handler.send_header(name, value)
+        handler.end_headers()
+        handler.wfile.write(payload)
+
+    @abstractmethod
+    def respond(self, path, body):
+        """The JSON body to answer a successful request for `path` with"""
+
+
+class FakeAdzuna(FakeUpstream):
+    """GET /{location}/search/{page}?what=&results_per_page= with `jobs_per_keyword` results per keyword"""
+
+    def __init__(self, jobs_per_keyword=40, **kwargs):
+        super().__init__(**kwargs)
+        self.jobs_per_keyword = jobs_per_keyword
+
+    def respond(self, path, body):
+        url = urlparse(path)
+        page = int(url.path.rstrip("/").rsplit("/", 1)[1])
+        query = parse_qs(url.query)
+        keyword = query.get("what", [""])[0]
+        per_page = int(query.get("results_per_page", ["5"])[0])
+        first = (page - 1) * per_page
+        results = [
+            {
+                "title": f"{keyword.title()} role {i}",
+                "description": f"Work on {keyword} problems with a friendly team. Role {i}.",
+                "redirect_url": f"https://jobs.example/{keyword.replace(' ', '-')}/{i}",
+                "location": {"display_name": "London"},
+                "company": {"display_name": f"Company {i % 7}"},
+            }
+            for i in range(first, min(first + per_page, self.jobs_per_keyword))
+        ]
+        return {"count": self.jobs_per_keyword, "results": results}
+
+
+class FakeGemini(FakeUpstream):
+    """POST /v1beta/models/{model}:generateContent answering with valid insight JSON"""
+
+    def respond(self, path, body):
+        text = "```json\n" + json.dumps(FAKE_INSIGHTS) + "\n```"
+        return {"candidates": [{"content": {"parts": [{"text": text}], "role": "model"}, "finishReason": "STOP", "index": 0}]}
+
+
+class Scenario:
+    """One route: how to build its i-th request and whether it is served by an async view"""
+
+    def __init__(self, name, method, path, payload=None, is_async=False, stream=False):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.payload = payload or (lambda i: None)
+        self.is_async = is_async
+        self.stream = stream
+
+
+def default_scenarios(major, minor, classes):
+    """A scenario for every named route in backApp/urls.py, keyed by its url name"""
+    job = lambda i: {"major": major, "minor": minor}
+    progress = lambda i: {"major": major, "classes": classes[:1 + i % max(len(classes), 1)]}
+    scenarios = [
+        Scenario("home", "GET", "/"),
+        Scenario("classNames", "GET", "/api/classNames/"),
+        Scenario("subjectNames", "GET", "/api/subjectNames/"),
+        Scenario("course_search", "GET", "/api/courses/search/", lambda i: {"q": classes[i % len(classes)][:3] if classes else "", "limit": 10}),
+        Scenario("minor_progress", "POST", "/api/minor_progress/", progress),
+        Scenario("minor_progress_batch", "POST", "/api/minor_progress/batch/",
+                 lambda i: {"transcripts": [{"id": n, **progress(i + n)} for n in range(20)]}),
+        Scenario("minor_plan", "POST", "/api/minor_plan/", lambda i: {"classes": classes[:i % max(len(classes), 1)]}),
+        Scenario("course_minors", "POST", "/api/course_minors/", lambda i: {"courses": classes}),
+        Scenario("what_if", "POST", "/api/what_if/", lambda i: {"classes": classes}),
+        # each worker's client keeps its own session, so these toggle one course at a time
+        Scenario("what_if_add", "POST", "/api/what_if/add/", lambda i: {"course": classes[i % len(classes)] if classes else ""}),
+        Scenario("what_if_remove", "POST", "/api/what_if/remove/", lambda i: {"course": classes[i % len(classes)] if classes else ""}),
+        Scenario("job_recommendations", "POST", "/api/job_recommendations/", job),
+        Scenario("job_recommendations_stream", "GET", "/api/job_recommendations/stream/", job, stream=True),
+        Scenario("career_insights", "POST", "/api/career_insights/", job),
+        Scenario("async_job_recommendations", "POST", "/api/async/job_recommendations/", job, is_async=True),
+        Scenario("async_career_insights", "POST", "/api/async/career_insights/", job, is_async=True),
+        Scenario("async_minor_progress", "POST", "/api/async/minor_progress/", progress, is_async=True),
+        Scenario("metrics", "GET", "/metrics"),
+    ]
+    return {scenario.name: scenario for scenario in scenarios}
+
+
+def unbenchmarked_routes(scenarios):
+    """Named routes in backApp/urls.py that have no scenario, so new endpoints are not silently skipped"""
+    from .urls import urlpatterns
+    return sorted(pattern.name for pattern in urlpatterns if pattern.name and pattern.name not in scenarios)
+
+
+def percentiles(latencies):
+    if not latencies:
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None, "mean_ms": None}
+    values = np.asarray(latencies) * 1000
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {"p50_ms": round(float(p50), 3), "p95_ms": round(float(p95), 3),
+            "p99_ms": round(float(p99), 3), "mean_ms": round(float(values.mean()), 3)}
+
+
+def _send(client, scenario, i):
+    payload = scenario.payload(i)
+    if scenario.method == "GET":
+        response = client.get(scenario.path, payload)
+    else:
+        response = client.post(scenario.path, payload, content_type="application/json")
+    if scenario.stream:
+        b"".join(response.streaming_content)
+    return response.status_code
+
+
+def _run_sync(scenario, requests, concurrency):
+    local = threading.local()
+
+    def one(i):
+        client = getattr(local, "client", None)
+        if client is None:
+            client = local.client = Client()
+        started = time.perf_counter()
+        try:
+            status = _send(client, scenario, i)
+        except Exception:
+            status = None
+        return time.perf_counter() - started, status
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return list(pool.map(one, range(requests)))
+
+
+async def _run_async(scenario, requests, concurrency):
+    client = AsyncClient()
+    gate = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with gate:
+            payload = scenario.payload(i)
+            started = time.perf_counter()
+            try:
+                if scenario.method == "GET":
+                    response = await client.get(scenario.path, payload)
+                else:
+                    response = await client.post(scenario.path, payload, content_type="application/json")
+                status = response.status_code
+            except Exception:
+                status = None
+            return time.perf_counter() - started, status
+
+    return await asyncio.gather(*(one(i) for i in range(requests)))
+
+
+def run_scenario(scenario, requests, concurrency, upstreams):
+    """Drive one scenario and return its metrics, including upstream calls it caused"""
+    before = {name: upstream.snapshot() for name, upstream in upstreams.items()}
+    started = time.perf_counter()
+    if scenario.is_async:
+        samples = asyncio.run(_run_async(scenario, requests, concurrency))
+    else:
+        samples = _run_sync(scenario, requests, concurrency)
+    elapsed = time.perf_counter() - started
+
+    statuses = Counter(str(status) for _, status in samples)
+    errors = sum(count for status, count in statuses.items() if status == "None" or int(status) >= 500)
+    upstream_calls = {}
+    for name, upstream in upstreams.items():
+        after = upstream.snapshot()
+        upstream_calls[name] = {key: after.get(key, 0) - before[name].get(key, 0) for key in after}
+    return {
+        "path": scenario.path,
+        "async": scenario.is_async,
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": errors,
+        "statuses": dict(statuses),
+        "elapsed_s": round(elapsed, 4),
+        "throughput_rps": round(requests / elapsed, 2) if elapsed else None,
+        **percentiles([latency for latency, _ in samples]),
+        "upstream_calls": upstream_calls,
+    }
+
+
+def compare(baseline, current):
+    """Rows of (scenario, baseline rps, current rps, baseline p95, current p95) for scenarios in both runs"""
+    rows = []
+    for name, result in current["scenarios"].items():
+        old = baseline.get("scenarios", {}).get(name)
+        if old is not None:
+            rows.append((name, old["throughput_rps"], result["throughput_rps"], old["p95_ms"], result["p95_ms"]))
+    return rows
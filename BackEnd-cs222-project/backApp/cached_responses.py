@@ -0,0 +1,101 @@
+"""
+Pre-serialized responses for payloads that only change with the catalog.
+
+The JSON body, and gzip/brotli variants of it, are built once per catalog
+version and served as raw bytes. ETag and Last-Modified follow the catalog
+version, so a repeat client gets a 304 and a new one gets compressed bytes
+with no re-serialization.
+"""
+import gzip
+import json
+import threading
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date, parse_http_date_safe
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+
+class SerializedPayload:
+    def __init__(self, name, data, version, last_modified):
+        self.version = version
+        self.last_modified = http_date(last_modified // 10**9)
+        self.last_modified_seconds = last_modified // 10**9
+        self.etag_base = f"{version[:20]}-{name}"
+        self.bodies = {"identity": json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")}
+        self.bodies["gzip"] = gzip.compress(self.bodies["identity"], compresslevel=9, mtime=0)
+        if brotli is not None:
+            self.bodies["br"] = brotli.compress(self.bodies["identity"], quality=11)
+
+    def etag(self, encoding):
+        suffix = "" if encoding == "identity" else f"-{encoding}"
+        return f'"{self.etag_base}{suffix}"'
+
+
+_lock = threading.Lock()
+_payloads = {}
+
+
+def catalog_payload(name, catalog, build):
+    """The SerializedPayload for `name` at this catalog version, built on first use"""
+    payload = _payloads.get(name)
+    if payload is not None and payload.version == catalog.version:
+        return payload
+    with _lock:
+        payload = _payloads.get(name)
+        if payload is None or payload.version != catalog.version:
+            payload = SerializedPayload(name, build(catalog), catalog.version, catalog.last_modified)
+            _payloads[name] = payload
+        return payload
+
+
+def _accepted_encodings(header):
+    accepted = set()
+    for part in header.split(","):
+        coding, *params = [piece.strip() for piece in part.split(";")]
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding and quality > 0:
+            accepted.add(coding.lower())
+    return accepted
+
+
+def _not_modified(request, payload):
+    if_none_match = request.META.get("HTTP_IF_NONE_MATCH")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        for tag in if_none_match.split(","):
+            tag = tag.strip().removeprefix("W/").strip('"')
+            if tag == payload.etag_base or tag.startswith(f"{payload.etag_base}-"):
+                return True
+        return False
+    if_modified_since = parse_http_date_safe(request.META.get("HTTP_IF_MODIFIED_SINCE", ""))
+    return if_modified_since is not None and payload.last_modified_seconds <= if_modified_since
+
+
+def payload_response(request, payload):
+    """Serve a SerializedPayload honouring conditional GETs and Accept-Encoding"""
+    accepted = _accepted_encodings(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+    encoding = next((name for name in ("br", "gzip") if name in accepted and name in payload.bodies), "identity")
+
+    if _not_modified(request, payload):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(payload.bodies[encoding], content_type="application/json")
+        if encoding != "identity":
+            response["Content-Encoding"] = encoding
+    response["ETag"] = payload.etag(encoding)
+    response["Last-Modified"] = payload.last_modified
+    response["Cache-Control"] = "no-cache"
+    patch_vary_headers(response, ("Accept-Encoding",))
+    return response
@@ -0,0 +1,268 @@
+"""
+Two-tier cache: a bounded in-process LRU with TTL in front of a persistent
+SQLite store, so a restarted worker comes back warm. Values must be JSON
+serializable. Async callers use aget/aset, which answer memory hits on the
+event loop and run SQLite I/O in a worker thread. This module has no Django
+dependency so JobInfoAPI can use it.
+
+delete() and clear() bump a generation counter stored next to the table.
+Every process compares it with the one it last saw at most once per
+`check_interval` seconds, on lookup, and drops its memory tier when it
+changed, so an invalidation from another process (e.g. a management
+command) reaches running workers within that interval.
+"""
+import os
+import json
+import time
+import asyncio
+import sqlite3
+import threading
+from collections import OrderedDict
+
+MISSING = object()
+
+
+class TTLCache:
+    """Thread-safe LRU with a size cap and per-entry expiry"""
+
+    def __init__(self, maxsize=1024, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def get(self, key, default=MISSING):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            value, expires_at = entry
+            if expires_at <= now:
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SQLiteStore:
+    """Persistent key/value table with expiry, safe to share between threads and processes"""
+
+    PURGE_EVERY = 256
+
+    def __init__(self, path, table):
+        if not table.isidentifier():
+            raise ValueError(f"Invalid cache table name {table!r}")
+        self.path = path
+        self.table = table
+        self._local = threading.local()
+        self._writes = 0
+
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS cache_generations (name TEXT PRIMARY KEY, generation INTEGER NOT NULL)"
+            )
+            self._local.connection = connection
+        return connection
+
+    def get(self, key):
+        """Return (value, seconds left) or (MISSING, 0)"""
+        row = self._connection().execute(
+            f"SELECT value, expires_at FROM {self.table} WHERE key = ?", (key,)
+        ).fetchone()
+        now = time.time()
+        if row is None or row[1] <= now:
+            return MISSING, 0
+        return json.loads(row[0]), row[1] - now
+
+    def set(self, key, value, ttl):
+        connection = self._connection()
+        connection.execute(
+            f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, json.dumps(value), time.time() + ttl),
+        )
+        self._writes += 1
+        if self._writes % self.PURGE_EVERY == 0:
+            self.purge_expired()
+
+    def delete(self, key):
+        self._connection().execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+
+    def clear(self):
+        self._connection().execute(f"DELETE FROM {self.table}")
+
+    def purge_expired(self):
+        self._connection().execute(f"DELETE FROM {self.table} WHERE expires_at <= ?", (time.time(),))
+
+    def generation(self):
+        row = self._connection().execute(
+            "SELECT generation FROM cache_generations WHERE name = ?", (self.table,)
+        ).fetchone()
+        return row[0] if row is not None else 0
+
+    def bump_generation(self):
+        """Tell every process sharing this file to drop its memory tier"""
+        self._connection().execute(
+            "INSERT INTO cache_generations (name, generation) VALUES (?, 1) "
+            "ON CONFLICT(name) DO UPDATE SET generation = generation + 1",
+            (self.table,),
+        )
+
+
+class TwoTierCache:
+    """TTLCache in front of a SQLiteStore, with hit/miss/eviction counters"""
+
+    def __init__(self, name, path, maxsize=1024, ttl=300, check_interval=1.0):
+        self.name = name
+        self.ttl = ttl
+        self.check_interval = check_interval
+        self.memory = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.disk = SQLiteStore(path, name) if path else None
+        self._lock = threading.Lock()
+        self._generation = None
+        self._checked = float("-inf")
+        self.disk_hits = 0
+        self.disk_errors = 0
+
+    @staticmethod
+    def make_key(parts):
+        return json.dumps(parts, separators=(",", ":"), sort_keys=True)
+
+    def _generation_due(self):
+        return self.disk is not None and time.monotonic() - self._checked >= self.check_interval
+
+    def _check_generation(self):
+        """Drop the memory tier if the store was invalidated since the last check"""
+        self._checked = time.monotonic()
+        try:
+            generation = self.disk.generation()
+        except sqlite3.Error:
+            with self._lock:
+                self.disk_errors += 1
+            return
+        if generation != self._generation:
+            self.memory.clear()
+            self._generation = generation
+
+    def get(self, parts, default=None):
+        if self._generation_due():
+            self._check_generation()
+        key = self.make_key(parts)
+        value = self.memory.get(key)
+        if value is not MISSING:
+            return value
+        return self._disk_get(key, default)
+
+    async def aget(self, parts, default=None):
+        """get for async callers; a disk lookup runs in a worker thread, off the event loop"""
+        if self._generation_due():
+            await asyncio.to_thread(self._check_generation)
+        key = self.make_key(parts)
+        value = self.memory.get(key)
+        if value is not MISSING:
+            return value
+        if self.disk is None:
+            return default
+        return await asyncio.to_thread(self._disk_get, key, default)
+
+    def _disk_get(self, key, default):
+        if self.disk is None:
+            return default
+        try:
+            value, remaining = self.disk.get(key)
+        except sqlite3.Error:
+            with self._lock:
+                self.disk_errors += 1
+            return default
+        if value is MISSING:
+            return default
+        with self._lock:
+            self.disk_hits += 1
+        self.memory.set(key, value, ttl=remaining)
+        return value
+
+    def set(self, parts, value, ttl=None):
+        key = self.make_key(parts)
+        ttl = self.ttl if ttl is None else ttl
+        self.memory.set(key, value, ttl=ttl)
+        self._disk_set(key, value, ttl)
+
+    async def aset(self, parts, value, ttl=None):
+        """set for async callers; the disk write runs in a worker thread"""
+        key = self.make_key(parts)
+        ttl = self.ttl if ttl is None else ttl
+        self.memory.set(key, value, ttl=ttl)
+        if self.disk is not None:
+            await asyncio.to_thread(self._disk_set, key, value, ttl)
+
+    def _disk_set(self, key, value, ttl):
+        if self.disk is not None:
+            try:
+                self.disk.set(key, value, ttl)
+            except sqlite3.Error:
+                with self._lock:
+                    self.disk_errors += 1
+
+    def delete(self, parts):
+        key = self.make_key(parts)
+        self.memory.delete(key)
+        if self.disk is not None:
+            self.disk.delete(key)
+            self.disk.bump_generation()
+
+    def clear(self):
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+            self.disk.bump_generation()
+
+    def stats(self):
+        memory = self.memory
+        return {
+            "name": self.name,
+            "size": len(memory),
+            "maxsize": memory.maxsize,
+            "memory_hits": memory.hits,
+            "disk_hits": self.disk_hits,
+            # a memory miss served from disk is not an overall miss
+            "misses": memory.misses - self.disk_hits,
+            "evictions": memory.evictions,
+            "expirations": memory.expirations,
+            "disk_errors": self.disk_errors,
+        }
@@ -0,0 +1,414 @@
+import os
+import re
+import json
+import mmap
+import logging
+import struct
+import hashlib
+import threading
+from collections.abc import Sequence
+import numpy as np
+import pandas as pd
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+logger = logging.getLogger("minorrec.catalog")
+
+CSV_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'course-catalog.csv')
+ARTIFACT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'course-catalog.bin')
+
+ARTIFACT_MAGIC = b"UIUCCAT1"
+ARTIFACT_ALIGN = 64
+# Bumped whenever the set of arrays changes; older artifacts count as stale
+ARTIFACT_FORMAT = 2
+
+CREDIT_PATTERN = re.compile(r"(\d+(?:\.\d+)?)(?:\s*(?:TO|OR|-)\s*(\d+(?:\.\d+)?))?", re.IGNORECASE)
+
+
+def _number(text):
+    value = float(text)
+    return int(value) if value.is_integer() else value
+
+
+def parse_credit_hours(text):
+    """
+    Parse a "Credit Hours" cell into (min_credits, max_credits).
+
+    Handles "3 hours.", "10 hours.", "1 TO 4 hours." and "3 OR 4 hours.";
+    only the first range is used when undergraduate and graduate hours are
+    both listed. Returns (0, 0) for blank or unparseable cells.
+    """
+    if not isinstance(text, str):
+        return (0, 0)
+    match = CREDIT_PATTERN.search(text)
+    if not match:
+        return (0, 0)
+    low = _number(match.group(1))
+    high = _number(match.group(2)) if match.group(2) else low
+    return (min(low, high), max(low, high))
+
+
+def course_name_column(frame):
+    """courseName as stored in the CSV, or derived from Subject + Number"""
+    if "courseName" in frame.columns:
+        return frame["courseName"]
+    return frame["Subject"].astype(str) + " " + frame["Number"].astype(str)
+
+
+class Catalog:
+    """Parsed, indexed snapshot of the course catalog"""
+
+    def __init__(self, path, version, last_modified, course_names, subject_names, credits, titles):
+        self.path = path
+        self.version = version
+        self.last_modified = last_modified
+        self.course_names = course_names
+        self.subject_names = subject_names
+        # course -> (min_credits, max_credits), taken from the first row of each course
+        self.credits = credits
+        self.titles = titles
+
+    @classmethod
+    def from_frame(cls, frame, path, version, last_modified):
+        frame = frame.assign(courseName=course_name_column(frame))
+        courses = frame.drop_duplicates("courseName")
+        course_names = courses["courseName"].tolist()
+        titles = courses["Name"].fillna("").tolist() if "Name" in courses.columns else [""] * len(course_names)
+        return cls(
+            path, version, last_modified,
+            course_names=course_names,
+            subject_names=frame["Subject"].dropna().drop_duplicates().tolist(),
+            credits={name: parse_credit_hours(hours) for name, hours in zip(course_names, courses["Credit Hours"])},
+            titles=dict(zip(course_names, titles)),
+        )
+
+    def credit_range(self, course_name):
+        return self.credits.get(course_name, (0, 0))
+
+    def course_credits(self, course_name):
+        """Credit hours a course counts for (the low end of a variable range)"""
+        return self.credits.get(course_name, (0, 0))[0]
+
+    def course_titles(self):
+        """Titles aligned with course_names"""
+        return [self.titles.get(name, "") for name in self.course_names]
+
+
+def _strings_to_arrays(values):
+    """Pack strings into (utf-8 blob, int32 offsets)"""
+    encoded = [value.encode("utf-8") for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int32)
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+def _arrays_to_strings(blob, offsets):
+    data = blob.tobytes()
+    bounds = offsets.tolist()
+    return [data[start:end].decode("utf-8") for start, end in zip(bounds, bounds[1:])]
+
+
+class StringTable(Sequence):
+    """Read-only sequence of strings decoded on access from a blob + offsets pair"""
+
+    def __init__(self, blob, offsets):
+        self.blob = blob
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return self.blob[self.offsets[index]:self.offsets[index + 1]].tobytes().decode("utf-8")
+
+    def __iter__(self):
+        return iter(_arrays_to_strings(self.blob, self.offsets))
+
+
+def build_artifact_arrays(frame):
+    """
+    Columnar form of a catalog frame: interned subjects, integer course
+    numbers and parsed credit ranges, one entry per course in catalog order.
+    Rows whose Number is not an integer are dropped.
+    """
+    frame = frame.assign(Number=pd.to_numeric(frame["Number"], errors="coerce")).dropna(subset=["Subject", "Number"])
+    frame = frame.assign(courseName=frame["Subject"].astype(str) + " " + frame["Number"].astype(int).astype(str))
+    courses = frame.drop_duplicates("courseName")
+
+    subjects = frame["Subject"].astype(str).drop_duplicates().tolist()
+    subject_ids = {subject: index for index, subject in enumerate(subjects)}
+    credits = [parse_credit_hours(hours) for hours in courses["Credit Hours"]]
+    titles = courses["Name"].fillna("").astype(str).tolist() if "Name" in courses.columns else [""] * len(courses)
+
+    subject_blob, subject_offsets = _strings_to_arrays(subjects)
+    title_blob, title_offsets = _strings_to_arrays(titles)
+    name_blob, name_offsets = _strings_to_arrays(courses["courseName"].tolist())
+    course_subject = np.array([subject_ids[subject] for subject in courses["Subject"].astype(str)], dtype=np.uint16)
+    course_number = courses["Number"].to_numpy(dtype=np.uint16)
+    # (subject id << 16 | number), sorted, so any process can binary-search the mapped file
+    keys = course_subject.astype(np.uint32) << 16 | course_number
+    order = np.argsort(keys, kind="stable").astype(np.int32)
+    return {
+        "subject_blob": subject_blob,
+        "subject_offsets": subject_offsets,
+        "course_subject": course_subject,
+        "course_number": course_number,
+        "course_name_blob": name_blob,
+        "course_name_offsets": name_offsets,
+        "course_keys_sorted": keys[order],
+        "course_key_order": order,
+        "course_min_credits": np.array([low for low, _ in credits], dtype=np.float32),
+        "course_max_credits": np.array([high for _, high in credits], dtype=np.float32),
+        "title_blob": title_blob,
+        "title_offsets": title_offsets,
+    }
+
+
+def write_artifact(output, arrays, metadata):
+    """
+    Write arrays to the artifact file.
+
+    Layout: magic, uint32 header length, JSON header (metadata plus dtype,
+    offset and length of each array), then each array's raw bytes aligned to
+    64 bytes so they can be viewed straight out of an mmap.
+    """
+    layout = {}
+    offset = 0
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        layout[name] = {"dtype": array.dtype.str, "length": int(array.shape[0]), "offset": offset}
+        offset += -(-array.nbytes // ARTIFACT_ALIGN) * ARTIFACT_ALIGN
+
+    header = json.dumps(dict(metadata, arrays=layout)).encode("utf-8")
+    data_start = -(-(len(ARTIFACT_MAGIC) + 4 + len(header)) // ARTIFACT_ALIGN) * ARTIFACT_ALIGN
+
+    tmp_path = f"{output}.tmp"
+    with open(tmp_path, "wb") as handle:
+        handle.write(ARTIFACT_MAGIC)
+        handle.write(struct.pack("<I", len(header)))
+        handle.write(header)
+        for name, array in arrays.items():
+            handle.seek(data_start + layout[name]["offset"])
+            handle.write(np.ascontiguousarray(array).tobytes())
+        handle.truncate(data_start + offset)
+    os.replace(tmp_path, output)
+
+
+def read_artifact_header(path):
+    with open(path, "rb") as handle:
+        if handle.read(len(ARTIFACT_MAGIC)) != ARTIFACT_MAGIC:
+            raise ValueError(f"{path} is not a course catalog artifact")
+        (length,) = struct.unpack("<I", handle.read(4))
+        header = json.loads(handle.read(length))
+    header["data_start"] = -(-(len(ARTIFACT_MAGIC) + 4 + length) // ARTIFACT_ALIGN) * ARTIFACT_ALIGN
+    return header
+
+
+def map_artifact(path):
+    """Return (header, {name: read-only array view}) over an mmap of the artifact"""
+    header = read_artifact_header(path)
+    with open(path, "rb") as handle:
+        mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+    arrays = {
+        name: np.frombuffer(mapped, dtype=np.dtype(spec["dtype"]), count=spec["length"],
+                            offset=header["data_start"] + spec["offset"])
+        for name, spec in header["arrays"].items()
+    }
+    return header, arrays
+
+
+class SharedCatalog:
+    """
+    Catalog served straight from the memory-mapped artifact.
+
+    Names, titles, credit ranges and the lookup index all stay in the mapped
+    file, so every worker attached to the same artifact shares those pages
+    and resident memory stays flat as workers are added. Only the subject
+    table (a few hundred entries) is copied per process.
+    """
+
+    def __init__(self, path, header, arrays):
+        self.path = path
+        self.version = header["source_version"]
+        self.last_modified = header["source_mtime_ns"]
+        self.subject_names = StringTable(arrays["subject_blob"], arrays["subject_offsets"])
+        self.course_names = StringTable(arrays["course_name_blob"], arrays["course_name_offsets"])
+        self._titles = StringTable(arrays["title_blob"], arrays["title_offsets"])
+        self._subject_ids = {subject: index for index, subject in enumerate(self.subject_names)}
+        self._keys = arrays["course_keys_sorted"]
+        self._order = arrays["course_key_order"]
+        self._min_credits = arrays["course_min_credits"]
+        self._max_credits = arrays["course_max_credits"]
+
+    def _position(self, course_name):
+        subject, _, number = course_name.rpartition(" ")
+        subject_id = self._subject_ids.get(subject)
+        if subject_id is None or not number.isdigit() or int(number) > 0xFFFF:
+            return None
+        key = subject_id << 16 | int(number)
+        index = int(np.searchsorted(self._keys, key))
+        if index < len(self._keys) and self._keys[index] == key:
+            return int(self._order[index])
+        return None
+
+    def credit_range(self, course_name):
+        position = self._position(course_name)
+        if position is None:
+            return (0, 0)
+        return (_number(self._min_credits[position]), _number(self._max_credits[position]))
+
+    def course_credits(self, course_name):
+        """Credit hours a course counts for (the low end of a variable range)"""
+        return self.credit_range(course_name)[0]
+
+    def course_titles(self):
+        return self._titles
+
+
+def load_artifact(path):
+    """Build a Catalog from a memory-mapped artifact without touching pandas"""
+    header, arrays = map_artifact(path)
+    subjects = _arrays_to_strings(arrays["subject_blob"], arrays["subject_offsets"])
+    course_names = _arrays_to_strings(arrays["course_name_blob"], arrays["course_name_offsets"])
+    ranges = zip(
+        (_number(value) for value in arrays["course_min_credits"].tolist()),
+        (_number(value) for value in arrays["course_max_credits"].tolist()),
+    )
+    titles = _arrays_to_strings(arrays["title_blob"], arrays["title_offsets"])
+    return Catalog(
+        path, header["source_version"], header["source_mtime_ns"],
+        course_names=course_names,
+        subject_names=subjects,
+        credits=dict(zip(course_names, ranges)),
+        titles=dict(zip(course_names, titles)),
+    )
+
+
+_lock = threading.Lock()
+_catalog = None
+_loaded_signature = None
+
+
+def catalog_path():
+    return str(getattr(settings, "COURSE_CATALOG_CSV", CSV_PATH))
+
+
+def artifact_path():
+    return str(getattr(settings, "COURSE_CATALOG_ARTIFACT", ARTIFACT_PATH))
+
+
+def catalog_shared():
+    return bool(getattr(settings, "COURSE_CATALOG_SHARED", False))
+
+
+def file_digest(path):
+    """Return the sha256 hex digest of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _stat(path):
+    try:
+        return os.stat(path)
+    except FileNotFoundError:
+        return None
+
+
+def _load(csv_path, csv_stat, artifact, artifact_stat, current, shared):
+    """Pick the cheapest up-to-date source, reusing `current` when unchanged"""
+    if artifact_stat is not None:
+        header = read_artifact_header(artifact)
+        fresh = header.get("format") == ARTIFACT_FORMAT and (csv_stat is None or (
+            header["source_mtime_ns"] == csv_stat.st_mtime_ns and header["source_size"] == csv_stat.st_size
+        ))
+        if not fresh and header.get("format") == ARTIFACT_FORMAT:
+            fresh = file_digest(csv_path) == header["source_version"]
+        if fresh:
+            if current is not None and current.version == header["source_version"] and isinstance(current, SharedCatalog) == shared:
+                return current
+            if shared:
+                _, arrays = map_artifact(artifact)
+                return SharedCatalog(artifact, header, arrays)
+            return load_artifact(artifact)
+        logger.warning("Course catalog artifact %s is stale, run `manage.py build_catalog`", artifact)
+
+    if shared:
+        logger.warning("COURSE_CATALOG_SHARED is set but %s is missing or stale; each worker will parse the CSV", artifact)
+    version = file_digest(csv_path)
+    if current is not None and current.version == version and isinstance(current, Catalog):
+        return current
+    frame = pd.read_csv(csv_path)
+    logger.info("Course catalog loaded from %s: %d rows", csv_path, len(frame))
+    logger.debug("Course catalog columns: %s", frame.columns)
+    return Catalog.from_frame(frame, csv_path, version, csv_stat.st_mtime_ns)
+
+
+def _signature(csv_path, csv_stat, artifact, artifact_stat):
+    return (
+        csv_path, csv_stat and (csv_stat.st_mtime_ns, csv_stat.st_size),
+        artifact, artifact_stat and (artifact_stat.st_mtime_ns, artifact_stat.st_size),
+    )
+
+
+def get_catalog():
+    """
+    Return the process-wide catalog, loading it on first use.
+
+    Every call stats the CSV and the built artifact. Nothing is re-read until
+    one of their mtimes moves; then the CSV is hashed and only re-parsed when
+    the hash differs from the loaded snapshot, so a plain `touch` costs one
+    hash and no parse. An artifact built from the current CSV is preferred
+    over parsing it; with COURSE_CATALOG_SHARED it is served in place from
+    the mmap instead of being copied into per-worker dicts. Raises
+    FileNotFoundError when neither file exists.
+    """
+    global _catalog, _loaded_signature
+    csv_path, artifact = catalog_path(), artifact_path()
+    csv_stat, artifact_stat = _stat(csv_path), _stat(artifact)
+    if csv_stat is None and artifact_stat is None:
+        raise FileNotFoundError(f"No course catalog at {csv_path}")
+    signature = _signature(csv_path, csv_stat, artifact, artifact_stat)
+    current = _catalog
+    if current is not None and _loaded_signature == signature:
+        return current
+
+    with _lock:
+        current = _catalog
+        if current is not None and _loaded_signature == signature:
+            return current
+        _catalog = _load(csv_path, csv_stat, artifact, artifact_stat, current, catalog_shared())
+        _loaded_signature = signature
+        return _catalog
+
+
+async def aget_catalog():
+    """
+    get_catalog for async views. The common case (already loaded, files
+    unchanged) costs two stats and is answered on the event loop; a
+    (re)load parses or maps files, so it runs in a worker thread instead
+    of stalling every other request on the loop.
+    """
+    current = _catalog
+    if current is not None:
+        csv_path, artifact = catalog_path(), artifact_path()
+        csv_stat, artifact_stat = _stat(csv_path), _stat(artifact)
+        if _loaded_signature == _signature(csv_path, csv_stat, artifact, artifact_stat):
+            return current
+    return await sync_to_async(get_catalog, thread_sensitive=False)()
+
+
+def reset_catalog():
+    """Drop the cached catalog so the next get_catalog() reloads it"""
+    global _catalog, _loaded_signature
+    with _lock:
+        _catalog = None
+        _loaded_signature = None
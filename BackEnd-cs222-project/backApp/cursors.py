@@ -0,0 +1,119 @@
+"""
+Opaque job_recommendations cursors and next-batch prefetch.
+
+A cursor is a django.core.signing token holding the (keyword, page,
+offset) position to resume from and a Bloom filter of every job url
+already shown, bound to the major/minor it was issued for. The client
+sends it back as-is; a tampered or expired cursor is rejected. Because
+the filter travels with the cursor, "load more" skips jobs shown in
+earlier batches without any server-side session.
+
+After a batch is served, the batch its cursor points to is computed in
+the background and kept for a few minutes, so the next "load more" is
+answered from memory.
+"""
+import zlib
+import base64
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.core import signing
+
+from .caching import MISSING, TTLCache
+
+logger = logging.getLogger("minorrec.jobs")
+
+CURSOR_SALT = "backApp.job_recommendations.cursor"
+CURSOR_VERSION = 1
+
+
+class SeenUrls:
+    """Fixed-size Bloom filter of job urls; drop-in for the seen_urls set in JobInfoAPI.unique_jobs"""
+
+    BITS = 4096
+    HASHES = 4
+
+    def __init__(self, bits=None):
+        self.bits = bytearray(self.BITS // 8) if bits is None else bytearray(bits)
+
+    def _positions(self, url):
+        digest = hashlib.blake2b(url.encode("utf-8"), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+        return [(first + i * second) % self.BITS for i in range(self.HASHES)]
+
+    def __contains__(self, url):
+        return all(self.bits[bit >> 3] & (1 << (bit & 7)) for bit in self._positions(url))
+
+    def add(self, url):
+        for bit in self._positions(url):
+            self.bits[bit >> 3] |= 1 << (bit & 7)
+
+    def copy(self):
+        return SeenUrls(self.bits)
+
+    def encode(self):
+        return base64.urlsafe_b64encode(zlib.compress(bytes(self.bits), 9)).decode("ascii")
+
+    @classmethod
+    def decode(cls, text):
+        bits = zlib.decompress(base64.urlsafe_b64decode(text.encode("ascii")))
+        if len(bits) != cls.BITS // 8:
+            raise ValueError("Seen-url digest has the wrong size")
+        return cls(bits)
+
+
+def encode_cursor(major, minor, position, seen_urls):
+    keyword_index, page, offset = position
+    return signing.dumps(
+        {"v": CURSOR_VERSION, "mj": major, "mn": minor, "k": keyword_index, "p": page, "o": offset, "s": seen_urls.encode()},
+        salt=CURSOR_SALT,
+    )
+
+
+def decode_cursor(token, major, minor, max_age=None):
+    """((keyword_index, page, offset), SeenUrls) for a cursor issued for this major/minor"""
+    data = signing.loads(token, salt=CURSOR_SALT, max_age=max_age)
+    if data.get("v") != CURSOR_VERSION or data.get("mj") != major or data.get("mn") != minor:
+        raise signing.BadSignature("Cursor does not belong to this request")
+    try:
+        return (int(data["k"]), int(data["p"]), int(data["o"])), SeenUrls.decode(data["s"])
+    except (KeyError, TypeError, ValueError, zlib.error) as e:
+        raise signing.BadSignature(f"Malformed cursor: {e}")
+
+
+class Prefetcher:
+    """Batches computed ahead of time, keyed by the cursor that will ask for them"""
+
+    def __init__(self, workers=2, ttl=300, maxsize=512):
+        self.pending = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.workers = workers
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        # separate from JobInfoAPI's fetch pool: a prefetch waits on page fetches submitted there
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="job-prefetch")
+        return self._executor
+
+    def submit(self, token, fn):
+        """Start fn() for token unless it is already pending; concurrent submits start it once"""
+        executor = self._get_executor()
+        with self._lock:
+            if self.pending.get(token) is MISSING:
+                self.pending.set(token, executor.submit(fn))
+
+    def take(self, token):
+        """The prefetched result for token, waiting if it is still running; MISSING if there is none"""
+        future = self.pending.get(token)
+        if future is MISSING:
+            return MISSING
+        self.pending.delete(token)
+        try:
+            return future.result()
+        except Exception as e:
+            logger.warning("Prefetched job batch failed, fetching again: %s", e)
+            return MISSING
@@ -0,0 +1,220 @@
+"""
+Gemini career insights.
+
+The Gemini client is configured once per worker (at app startup, see
+apps.py) instead of on every request. Validated insight JSON is kept in a
+two-tier cache keyed by the normalized (major, minor) and PROMPT_VERSION,
+so a pair that was already answered is served without an LLM round trip.
+Bump PROMPT_VERSION whenever the prompt or the expected JSON changes; old
+entries then simply stop being read and expire. `python manage.py
+clear_insights_cache` drops entries explicitly; running workers notice
+within a second and drop their in-memory copies (see caching.py). Identical prompts in
+flight at the same time are coalesced into one call (see singleflight.py).
+"""
+import os
+import json
+import asyncio
+import logging
+import threading
+from django.conf import settings
+
+from . import metrics
+from .caching import MISSING, TwoTierCache
+from .singleflight import AsyncSingleFlight, SingleFlight
+
+logger = logging.getLogger("minorrec.insights")
+
+MODEL_NAME = "gemini-2.0-flash"
+PROMPT_VERSION = 1
+LIST_FIELDS = ("jobTypes", "topLocations", "topCompanies", "keySkills")
+SALARY_LEVELS = ("entry", "mid", "senior")
+
+_lock = threading.Lock()
+_model = None
+_configured = False
+_cache = None
+_flight = None
+_async_flight = AsyncSingleFlight("insights")
+
+
+def get_model():
+    """
+    The shared GenerativeModel, or None when the package or GEMINI_API_KEY is
+    missing. GEMINI_API_ENDPOINT points it at another server over REST, e.g.
+    the benchmark's local stand-in.
+    """
+    global _model, _configured
+    if _configured:
+        return _model
+    with _lock:
+        if not _configured:
+            try:
+                import google.generativeai as genai
+                from dotenv import load_dotenv
+            except ImportError as e:
+                logger.warning("Gemini client unavailable: %s", e)
+            else:
+                load_dotenv()
+                api_key = os.getenv('GEMINI_API_KEY')
+                endpoint = os.getenv('GEMINI_API_ENDPOINT')
+                if api_key and endpoint:
+                    genai.configure(api_key=api_key, transport="rest", client_options={"api_endpoint": endpoint})
+                    _model = genai.GenerativeModel(MODEL_NAME)
+                elif api_key:
+                    genai.configure(api_key=api_key)
+                    _model = genai.GenerativeModel(MODEL_NAME)
+            _configured = True
+        return _model
+
+
+def reset_model():
+    """Forget the configured client so the next get_model() re-reads the environment"""
+    global _model, _configured
+    with _lock:
+        _model = None
+        _configured = False
+
+
+def get_insight_cache():
+    global _cache
+    if _cache is None:
+        with _lock:
+            if _cache is None:
+                _cache = metrics.register_cache(TwoTierCache(
+                    "career_insights",
+                    getattr(settings, "CAREER_INSIGHTS_CACHE_PATH", None),
+                    maxsize=getattr(settings, "CAREER_INSIGHTS_CACHE_SIZE", 1024),
+                    ttl=getattr(settings, "CAREER_INSIGHTS_CACHE_TTL", 7 * 24 * 60 * 60),
+                ))
+    return _cache
+
+
+def get_insight_flight():
+    global _flight
+    if _flight is None:
+        with _lock:
+            if _flight is None:
+                _flight = SingleFlight("insights", getattr(settings, "SINGLEFLIGHT_LOCK_DIR", None))
+    return _flight
+
+
+def normalize(text):
+    return " ".join(str(text).split()).casefold()
+
+
+def cache_key(major, minor):
+    return ["insights", PROMPT_VERSION, MODEL_NAME, normalize(major), normalize(minor)]
+
+
+def build_prompt(major, minor):
+    return f"""
+        Generate career insights for someone with a {major} major and {minor} minor from UIUC.
+
+        Provide insights in the following JSON format ONLY (no additional text):
+        {{
+            "jobTypes": ["job1", "job2", "job3", "job4", "job5"],
+            "salaryRange": {{
+                "entry": "$X,XXX",
+                "mid": "$XX,XXX",
+                "senior": "$XXX,XXX+"
+            }},
+            "topLocations": ["location1, ST", "location2, ST", "location3, ST", "location4, ST", "location5, ST"],
+            "topCompanies": ["company1", "company2", "company3", "company4", "company5"],
+            "growthOutlook": "Brief description of industry growth outlook",
+            "keySkills": ["skill1", "skill2", "skill3", "skill4", "skill5"]
+        }}
+
+        Consider:
+        - Realistic salary ranges for recent graduates
+        - Top companies that hire this combination
+        - Best geographic locations for these careers
+        - Industry growth trends
+        - Essential skills for success
+
+        Make the data realistic and specific to the {major} + {minor} combination.
+        """
+
+
+def parse_insights(text):
+    """Parse and validate the model's reply. Raises ValueError if it is not usable."""
+    # Clean up response (remove markdown code blocks if present)
+    text = text.replace('```json', '').replace('```', '').strip()
+    data = json.loads(text)
+    if not isinstance(data, dict):
+        raise ValueError("AI response is not a JSON object")
+    for field in LIST_FIELDS:
+        if not isinstance(data.get(field), list) or not all(isinstance(item, str) for item in data[field]):
+            raise ValueError(f"AI response field '{field}' must be a list of strings")
+    salary = data.get("salaryRange")
+    if not isinstance(salary, dict) or not all(isinstance(salary.get(level), str) for level in SALARY_LEVELS):
+        raise ValueError("AI response field 'salaryRange' must have entry, mid and senior")
+    if not isinstance(data.get("growthOutlook"), str):
+        raise ValueError("AI response field 'growthOutlook' must be a string")
+    return {field: data[field] for field in (*LIST_FIELDS, "salaryRange", "growthOutlook")}
+
+
+def generate_insights(major, minor):
+    """
+    Validated insights for (major, minor) from the cache or Gemini, or None
+    when Gemini is not configured. Only validated replies are cached.
+    """
+    cache = get_insight_cache()
+    key = cache_key(major, minor)
+    insights = cache.get(key)
+    if insights is not None:
+        return insights
+
+    model = get_model()
+    if model is None:
+        return None
+
+    def ask():
+        with metrics.upstream_call("gemini") as call:
+            response = model.generate_content(build_prompt(major, minor))
+            call.status = 200
+        insights = parse_insights(response.text.strip())
+        cache.set(key, insights)
+        return insights
+
+    def recheck():
+        insights = cache.get(key)
+        return MISSING if insights is None else insights
+
+    # a class opening the page together sends one prompt, not one each
+    return get_insight_flight().do(cache.make_key(key), ask, recheck)
+
+
+async def generate_insights_async(major, minor):
+    """generate_insights for async views, awaiting Gemini and the cache's disk tier instead of blocking"""
+    cache = get_insight_cache()
+    key = cache_key(major, minor)
+    insights = await cache.aget(key)
+    if insights is not None:
+        return insights
+
+    model = get_model()
+    if model is None:
+        return None
+
+    async def ask():
+        with metrics.upstream_call("gemini") as call:
+            if os.getenv('GEMINI_API_ENDPOINT'):
+                # the SDK's REST transport has no async client
+                response = await asyncio.to_thread(model.generate_content, build_prompt(major, minor))
+            else:
+                response = await model.generate_content_async(build_prompt(major, minor))
+            call.status = 200
+        insights = parse_insights(response.text.strip())
+        await cache.aset(key, insights)
+        return insights
+
+    return await _async_flight.do(cache.make_key(key), ask)
+
+
+def invalidate_insights(major=None, minor=None):
+    """Drop one (major, minor) entry, or every cached insight when either is omitted"""
+    cache = get_insight_cache()
+    if major and minor:
+        cache.delete(cache_key(major, minor))
+    else:
+        cache.clear()
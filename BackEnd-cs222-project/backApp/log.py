@@ -0,0 +1,103 @@
+"""
+Structured, queued logging for the app's "minorrec.*" loggers.
+
+Call sites pass their values as logging arguments (`logger.debug("Fetched
+page %s of %s", page, keyword)`), so a record below its logger's level is
+dropped before anything is formatted. Records that do pass are put on an
+in-process queue as they are; a QueueListener thread formats them as one
+JSON object per line and writes them out, so formatting and I/O stay off
+the request path. Log only values that are not mutated afterwards, since
+they are formatted later on the listener thread.
+
+Levels are set per category in settings.LOGGING (see LOG_LEVELS), and
+SamplingFilter keeps a fraction of high-volume records such as full
+Adzuna payloads. This module has no Django dependency so JobInfoAPI can use it.
+"""
+import sys
+import json
+import queue
+import atexit
+import random
+import logging
+import threading
+from logging.handlers import QueueHandler, QueueListener
+
+# LogRecord attributes that are not `extra` fields
+RECORD_FIELDS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: time, level, logger, message, any `extra` fields and the traceback"""
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in RECORD_FIELDS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps about `rate` of the records at or below `level`; anything more severe always passes"""
+
+    def __init__(self, rate=1.0, level="DEBUG"):
+        super().__init__()
+        self.rate = float(rate)
+        self.level = logging.getLevelName(level) if isinstance(level, str) else level
+        self.random = random.Random()
+
+    def filter(self, record):
+        return record.levelno > self.level or self.random.random() < self.rate
+
+
+class QueueingHandler(QueueHandler):
+    """
+    Hands records to a background QueueListener that formats and writes them
+    to `stream`. When the queue is full records are dropped and counted
+    rather than blocking the request.
+    """
+
+    def __init__(self, stream=None, maxsize=10000):
+        super().__init__(queue.Queue(maxsize))
+        self.target = logging.StreamHandler(stream or sys.stderr)
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self.listener = QueueListener(self.queue, self.target)
+        self.listener.start()
+        self.running = True
+        atexit.register(self.close)
+
+    def setFormatter(self, fmt):
+        # records are formatted by the listener, not on the way in
+        self.target.setFormatter(fmt)
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+
+    def flush(self):
+        """Wait until every queued record has been written"""
+        if self.running:
+            self.queue.join()
+        self.target.flush()
+
+    def close(self):
+        with self._lock:
+            running, self.running = self.running, False
+        if running:
+            self.listener.stop()
+            self.target.close()
+        super().close()
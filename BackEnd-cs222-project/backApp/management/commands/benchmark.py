@@ -0,0 +1,172 @@
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import tempfile
+import subprocess
+from contextlib import ExitStack
+from unittest import mock
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+import JobInfoAPI
+from backApp import insights
+from backApp.benchmark import FakeAdzuna, FakeGemini, compare, default_scenarios, run_scenario, unbenchmarked_routes
+from backApp.caching import TwoTierCache
+from backApp.catalog import get_catalog, reset_catalog
+from backApp.minor_rules import get_minor_rules
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def write_synthetic_catalog(path):
+    """A catalog holding every course the minor rules name, at 3 credit hours each"""
+    rules = get_minor_rules()
+    courses = set().union(*rules.required.values(), *(pool.courses for pool in rules.pools))
+    with open(path, "w") as handle:
+        handle.write("Subject,Number,Name,Credit Hours,courseName\n")
+        for course in sorted(courses):
+            subject, number = course.rsplit(" ", 1)
+            handle.write(f'{subject},{number},"{course}",3 hours.,{course}\n')
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive every backApp endpoint against local Adzuna and Gemini stand-ins and report throughput, "
+        "latency percentiles and upstream call counts. Results are saved as JSON for comparison."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200, help="Requests per endpoint (default 200)")
+        parser.add_argument("--concurrency", type=int, default=16, help="Requests in flight at once (default 16)")
+        parser.add_argument("--endpoints", nargs="+", default=None, help="Url names to run (default: all)")
+        parser.add_argument("--latency", type=float, default=0.05, help="Seconds each upstream call takes")
+        parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of upstream calls answered 500")
+        parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction of upstream calls answered 429")
+        parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds sent with a 429")
+        parser.add_argument("--major", default="Computer Science")
+        parser.add_argument("--minor", default=None, help="Minor used by job and insight requests (default: the first minor)")
+        parser.add_argument("--catalog", default=None, help="Course catalog CSV (default: a synthetic one)")
+        parser.add_argument("--no-cache", action="store_true", help="Disable the Adzuna page and insight caches")
+        parser.add_argument("--rate-limit", action="store_true", help="Keep the Adzuna token bucket on")
+        parser.add_argument("--output", default=None, help="Results file (default benchmark-results/<time>-<commit>.json)")
+        parser.add_argument("--compare", default=None, help="Earlier results file to compare against")
+
+    def handle(self, *args, **options):
+        if options["requests"] < 1 or options["concurrency"] < 1:
+            raise CommandError("--requests and --concurrency must be positive")
+        upstream_options = {
+            "latency": options["latency"], "error_rate": options["error_rate"],
+            "throttle_rate": options["throttle_rate"], "retry_after": options["retry_after"],
+        }
+        upstreams = {"adzuna": FakeAdzuna(**upstream_options).start(), "gemini": FakeGemini(**upstream_options).start()}
+        tmpdir = tempfile.mkdtemp(prefix="benchmark-")
+        try:
+            with ExitStack() as stack:
+                self.isolate(stack, options, upstreams, tmpdir)
+                results = self.run(options, upstreams)
+        finally:
+            for upstream in upstreams.values():
+                upstream.stop()
+            shutil.rmtree(tmpdir, ignore_errors=True)
+            reset_catalog()
+            insights.reset_model()
+
+        output = options["output"] or os.path.join(
+            settings.BASE_DIR, "benchmark-results", f"{time.strftime('%Y%m%d-%H%M%S')}-{results['meta']['commit']}.json"
+        )
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        with open(output, "w") as handle:
+            json.dump(results, handle, indent=2)
+        self.report(results)
+        self.stdout.write(self.style.SUCCESS(f"Saved results to {output}"))
+        if options["compare"]:
+            with open(options["compare"]) as handle:
+                self.report_comparison(json.load(handle), results)
+
+    def isolate(self, stack, options, upstreams, tmpdir):
+        """Point the app at the stand-ins, with throwaway caches and sessions, for the length of the run"""
+        catalog_path = options["catalog"]
+        if catalog_path is None:
+            catalog_path = os.path.join(tmpdir, "course-catalog.csv")
+            write_synthetic_catalog(catalog_path)
+        stack.enter_context(override_settings(
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"],
+            COURSE_CATALOG_CSV=catalog_path,
+            COURSE_CATALOG_ARTIFACT=os.path.join(tmpdir, "course-catalog.bin"),
+            COURSE_CATALOG_SHARED=False,
+            SINGLEFLIGHT_LOCK_DIR=None,
+            # every scenario asks for a first batch, so a prefetch is wasted work that would
+            # outlive the run and be counted against the next scenario's upstream calls
+            JOB_PREFETCH=False,
+            # the what_if scenarios would otherwise write django_session rows into db.sqlite3
+            SESSION_ENGINE="django.contrib.sessions.backends.signed_cookies",
+        ))
+        ttl = 0 if options["no_cache"] else JobInfoAPI.ADZUNA_CACHE_TTL
+        stack.enter_context(mock.patch.object(JobInfoAPI, "ADZUNA_BASE_URL", upstreams["adzuna"].url))
+        stack.enter_context(mock.patch.object(JobInfoAPI, "page_cache", TwoTierCache("adzuna_pages", None, ttl=ttl)))
+        if not options["rate_limit"]:
+            stack.enter_context(mock.patch.object(JobInfoAPI, "rate_limiter", None))
+        stack.enter_context(mock.patch.object(insights, "_cache", TwoTierCache("career_insights", None, ttl=ttl)))
+        stack.enter_context(mock.patch.object(insights, "_flight", None))
+        stack.enter_context(mock.patch.dict(os.environ, {
+            "GEMINI_API_KEY": "benchmark", "GEMINI_API_ENDPOINT": upstreams["gemini"].url,
+        }))
+        insights.reset_model()
+        reset_catalog()
+
+    def run(self, options, upstreams):
+        minor = options["minor"] or get_minor_rules().names[0]
+        scenarios = default_scenarios(options["major"], minor, list(get_catalog().course_names[:8]))
+        for name in unbenchmarked_routes(scenarios):
+            self.stdout.write(self.style.WARNING(f"No benchmark scenario for route '{name}'"))
+        names = options["endpoints"] or list(scenarios)
+        unknown = [name for name in names if name not in scenarios]
+        if unknown:
+            raise CommandError(f"Unknown endpoints: {', '.join(unknown)}; choose from {', '.join(scenarios)}")
+
+        results = {}
+        for name in names:
+            self.stdout.write(f"Running {name} ...")
+            results[name] = run_scenario(scenarios[name], options["requests"], options["concurrency"], upstreams)
+        return {
+            "meta": {
+                "commit": git_commit(),
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "python": sys.version.split()[0],
+                "platform": platform.platform(),
+                "config": {
+                    key: options[key] for key in (
+                        "requests", "concurrency", "latency", "error_rate", "throttle_rate",
+                        "retry_after", "major", "no_cache", "rate_limit",
+                    )
+                } | {"minor": minor},
+            },
+            "scenarios": results,
+        }
+
+    def report(self, results):
+        self.stdout.write(f"{'endpoint':32} {'rps':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7} {'adzuna':>7} {'gemini':>7}")
+        for name, result in results["scenarios"].items():
+            calls = {upstream: counts.get("requests", 0) for upstream, counts in result["upstream_calls"].items()}
+            self.stdout.write(
+                f"{name:32} {result['throughput_rps']:>9} {result['p50_ms']:>9} {result['p95_ms']:>9} "
+                f"{result['p99_ms']:>9} {result['errors']:>7} {calls.get('adzuna', 0):>7} {calls.get('gemini', 0):>7}"
+            )
+
+    def report_comparison(self, baseline, results):
+        self.stdout.write(f"Compared with {baseline.get('meta', {}).get('commit', 'baseline')}:")
+        for name, old_rps, new_rps, old_p95, new_p95 in compare(baseline, results):
+            change = f"{(new_rps - old_rps) / old_rps:+.1%}" if old_rps else "n/a"
+            self.stdout.write(f"{name:32} rps {old_rps} -> {new_rps} ({change}), p95 {old_p95} -> {new_p95} ms")
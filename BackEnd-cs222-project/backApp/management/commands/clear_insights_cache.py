@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from backApp.insights import invalidate_insights
+
+
+class Command(BaseCommand):
+    help = "Drop cached Gemini career insights, for one (major, minor) pair or all of them"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--major", default=None, help="Major of the pair to drop")
+        parser.add_argument("--minor", default=None, help="Minor of the pair to drop")
+
+    def handle(self, *args, **options):
+        major, minor = options["major"], options["minor"]
+        if bool(major) != bool(minor):
+            raise CommandError("Pass both --major and --minor, or neither to clear everything")
+        invalidate_insights(major, minor)
+        target = f"{major} + {minor}" if major else "all pairs"
+        self.stdout.write(self.style.SUCCESS(f"Cleared cached career insights for {target}"))
@@ -0,0 +1,133 @@
+import os
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from JobInfoAPI import MAJOR_KEYWORDS, get_career_choices_for_major_minor
+from backApp.backend import JOB_BATCH, MAJOR_CATEGORIES
+from backApp.insights import generate_insights, get_model
+from backApp.minor_rules import get_minor_rules
+
+KINDS = ("insights", "jobs")
+
+
+class Progress:
+    """Completed task ids, saved after every task so an interrupted run resumes where it stopped"""
+
+    def __init__(self, path, restart=False):
+        self.path = path
+        self.lock = threading.Lock()
+        state = {}
+        if not restart and os.path.exists(path):
+            with open(path) as handle:
+                state = json.load(handle)
+        if state.get("finished", True):
+            # the last run completed (or there was none): this is a fresh run
+            state = {"started_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "finished": False, "done": []}
+        self.state = state
+        self.done = set(state["done"])
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w") as handle:
+            json.dump({**self.state, "done": sorted(self.done)}, handle, indent=2)
+        os.replace(temp_path, self.path)
+
+    def mark_done(self, task_id):
+        with self.lock:
+            self.done.add(task_id)
+            self.save()
+
+    def finish(self):
+        with self.lock:
+            self.state["finished"] = True
+            self.save()
+
+
+def task_id(kind, major, minor):
+    return f"{kind}|{major}|{minor}"
+
+
+class Command(BaseCommand):
+    help = (
+        "Precompute career insights and the first job batch for every major x minor pair. "
+        "Run it from cron shortly before peak hours; an interrupted run resumes from its progress file."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=4, help="Pairs warmed at once (default 4)")
+        parser.add_argument("--only", choices=KINDS, default=None, help="Warm only insights or only jobs")
+        parser.add_argument(
+            "--progress", default=os.path.join(settings.BASE_DIR, "warm_caches_progress.json"),
+            help="Progress file used to resume an interrupted run",
+        )
+        parser.add_argument("--restart", action="store_true", help="Ignore recorded progress and warm everything")
+        parser.add_argument(
+            "--max-wait", type=float, default=300.0,
+            help="Seconds a pair may spend waiting on Adzuna rate limits before it is left for the next run",
+        )
+
+    def handle(self, *args, **options):
+        majors = sorted(set(MAJOR_KEYWORDS) | set(MAJOR_CATEGORIES))
+        minors = list(get_minor_rules().names)
+        kinds = [options["only"]] if options["only"] else list(KINDS)
+        progress = Progress(options["progress"], restart=options["restart"])
+
+        tasks = [(kind, major, minor) for major in majors for minor in minors for kind in kinds]
+        pending = [task for task in tasks if task_id(*task) not in progress.done]
+        self.stdout.write(f"Warming {len(pending)} of {len(tasks)} tasks with {options['workers']} workers")
+
+        if "insights" in kinds and get_model() is None:
+            self.stdout.write(self.style.WARNING("GEMINI_API_KEY is not set; skipping career insights"))
+            pending = [task for task in pending if task[0] != "insights"]
+
+        warm = {"insights": self.warm_insights, "jobs": self.warm_jobs}
+        failed = 0
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max(1, options["workers"])) as pool:
+            futures = {
+                pool.submit(warm[kind], major, minor, options["max_wait"]): (kind, major, minor)
+                for kind, major, minor in pending
+            }
+            for future in as_completed(futures):
+                kind, major, minor = futures[future]
+                try:
+                    warmed = future.result()
+                except Exception as e:
+                    warmed = False
+                    self.stderr.write(f"Failed to warm {kind} for {major} + {minor}: {e}")
+                if warmed:
+                    progress.mark_done(task_id(kind, major, minor))
+                else:
+                    failed += 1
+
+        elapsed = time.perf_counter() - started
+        if failed:
+            self.stdout.write(self.style.WARNING(
+                f"Warmed {len(pending) - failed} tasks in {elapsed:.1f}s; {failed} left for the next run"
+            ))
+        else:
+            progress.finish()
+            self.stdout.write(self.style.SUCCESS(f"Warmed {len(pending)} tasks in {elapsed:.1f}s"))
+
+    def warm_insights(self, major, minor, max_wait):
+        return generate_insights(major, minor) is not None
+
+    def warm_jobs(self, major, minor, max_wait):
+        """Fetch the first batch so its Adzuna pages are cached; wait out rate limits up to max_wait"""
+        waited = 0.0
+        while True:
+            result = get_career_choices_for_major_minor(major, minor, **JOB_BATCH)
+            if not result["rate_limited"]:
+                return True
+            delay = result["retry_after"]
+            if waited + delay > max_wait:
+                return False
+            time.sleep(delay)
+            waited += delay
@@ -0,0 +1,241 @@
+"""
+Request and hot-path timings in Prometheus text format, served at /metrics.
+
+MetricsMiddleware times every request by view. span("name") times a
+section of a request (catalog load, credit lookup, rule evaluation,
+ranking, serialization) and upstream_call("adzuna") times one upstream
+HTTP call and counts it by status. Registered caches report their hit,
+miss and eviction counters at scrape time. Everything is kept per worker
+process in plain dicts under a lock.
+
+With METRICS_ENABLED off, span() and upstream_call() hand back one shared
+no-op context manager and the middleware removes itself, so the
+instrumentation costs a flag check. This module has no Django dependency
+so JobInfoAPI can use it.
+"""
+import time
+import threading
+from bisect import bisect_left
+
+# Seconds; upper bounds of the histogram buckets, +Inf is implicit
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values):
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+class Counter:
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = sorted(self.values.items())
+        for labels, value in values:
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, documentation, labelnames=(), buckets=BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts (last one is +Inf), sum]
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self.values.get(labels)
+            if entry is None:
+                entry = self.values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def count(self, *labels):
+        with self._lock:
+            entry = self.values.get(labels)
+            return sum(entry[0]) if entry else 0
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            values = sorted((labels, (list(counts), total)) for labels, (counts, total) in self.values.items())
+        names = (*self.labelnames, "le")
+        for labels, (counts, total) in values:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_labels(names, (*labels, bound))} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {total}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.metrics = []
+        self.caches = []
+
+    def counter(self, name, documentation, labelnames=()):
+        metric = Counter(name, documentation, labelnames)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, name, documentation, labelnames=(), buckets=BUCKETS):
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        lines.extend(self.render_caches())
+        return "\n".join(lines) + "\n"
+
+    def render_caches(self):
+        """TwoTierCache.stats() of every registered cache, read at scrape time"""
+        stats = [cache.stats() for cache in self.caches]
+        if not stats:
+            return []
+        families = (
+            ("cache_hits_total", "counter", "Cache lookups answered, by tier",
+             lambda s: [({"tier": "memory"}, s["memory_hits"]), ({"tier": "disk"}, s["disk_hits"])]),
+            ("cache_misses_total", "counter", "Cache lookups that found nothing", lambda s: [({}, s["misses"])]),
+            ("cache_evictions_total", "counter", "Entries dropped to stay under maxsize", lambda s: [({}, s["evictions"])]),
+            ("cache_entries", "gauge", "Entries held in memory", lambda s: [({}, s["size"])]),
+        )
+        lines = []
+        for name, kind, documentation, samples in families:
+            lines += [f"# HELP {name} {documentation}", f"# TYPE {name} {kind}"]
+            for cache_stats in stats:
+                for extra, value in samples(cache_stats):
+                    labels = {"cache": cache_stats["name"], **extra}
+                    lines.append(f"{name}{_labels(labels.keys(), labels.values())} {value}")
+        return lines
+
+
+REGISTRY = Registry()
+
+REQUEST_DURATION = REGISTRY.histogram(
+    "http_request_duration_seconds", "Time to produce a response, by view", ("view", "method", "status"),
+)
+SPAN_DURATION = REGISTRY.histogram(
+    "span_duration_seconds", "Time spent in one section of a request", ("span",),
+)
+UPSTREAM_DURATION = REGISTRY.histogram(
+    "upstream_request_duration_seconds", "Time for one upstream HTTP call", ("upstream",),
+)
+UPSTREAM_REQUESTS = REGISTRY.counter(
+    "upstream_requests_total", "Upstream HTTP calls by response status, or error", ("upstream", "status"),
+)
+UPSTREAM_RETRIES = REGISTRY.counter(
+    "upstream_retries_total", "Upstream calls repeated after a 429", ("upstream",),
+)
+
+
+def configure(enabled):
+    REGISTRY.enabled = bool(enabled)
+
+
+def enabled():
+    return REGISTRY.enabled
+
+
+def register_cache(cache):
+    """Report a TwoTierCache's counters on /metrics"""
+    if cache is not None and cache not in REGISTRY.caches:
+        REGISTRY.caches.append(cache)
+    return cache
+
+
+class _NoOp:
+    """Shared stand-in for Span and UpstreamCall while metrics are off"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def __setattr__(self, name, value):
+        pass
+
+
+NOOP = _NoOp()
+
+
+class Span:
+    __slots__ = ("name", "started")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        SPAN_DURATION.observe(time.perf_counter() - self.started, self.name)
+        return False
+
+
+class UpstreamCall:
+    """Times one upstream call; set .status before leaving the block, an exception counts as "error" """
+    __slots__ = ("upstream", "status", "started")
+
+    def __init__(self, upstream):
+        self.upstream = upstream
+        self.status = None
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        UPSTREAM_DURATION.observe(time.perf_counter() - self.started, self.upstream)
+        UPSTREAM_REQUESTS.inc(self.upstream, "error" if exc_type is not None else str(self.status))
+        return False
+
+
+def span(name):
+    return Span(name) if REGISTRY.enabled else NOOP
+
+
+def upstream_call(upstream):
+    return UpstreamCall(upstream) if REGISTRY.enabled else NOOP
+
+
+def upstream_retry(upstream):
+    if REGISTRY.enabled:
+        UPSTREAM_RETRIES.inc(upstream)
+
+
+def observe_span(name, seconds):
+    if REGISTRY.enabled:
+        SPAN_DURATION.observe(seconds, name)
+
+
+def render():
+    return REGISTRY.render()
@@ -0,0 +1,52 @@
+import time
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.core.exceptions import MiddlewareNotUsed
+
+from . import metrics
+
+
+class MetricsMiddleware:
+    """
+    Records every request in http_request_duration_seconds, labelled by url
+    name so unknown paths cannot blow up the label set, and times DRF
+    response rendering as the "serialization" span. For streamed responses
+    the duration is time to first byte. Removes itself when metrics are off.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not metrics.enabled():
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        started = time.perf_counter()
+        response = self.get_response(request)
+        self.record(request, response, started)
+        return response
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        response = await self.get_response(request)
+        self.record(request, response, started)
+        return response
+
+    def process_template_response(self, request, response):
+        # called right before render(); the callback runs right after it
+        started = time.perf_counter()
+        response.add_post_render_callback(
+            lambda rendered: metrics.observe_span("serialization", time.perf_counter() - started)
+        )
+        return response
+
+    @staticmethod
+    def record(request, response, started):
+        match = request.resolver_match
+        view = match.url_name if match is not None and match.url_name else "unmatched"
+        metrics.REQUEST_DURATION.observe(time.perf_counter() - started, view, request.method, str(response.status_code))
@@ -0,0 +1,291 @@
+"""
+Declarative minor requirements.
+
+The rules live in minor_requirements.json. Each minor lists its total
+credit hours, its required courses and a list of elective rules:
+
+    {"courses": [...], "prefixes": [...], "exclude": [...], "cap": n,
+     "exclusive": [[...]], "all": true}
+        A pool. A course belongs to it if it is listed in "courses" or starts
+        with one of "prefixes", and is not excluded. At most "cap" courses
+        count (the highest-credit ones). Each "exclusive" group counts at most
+        one course. An "all" pool only counts once every listed course is taken.
+
+    {"one_of": [[pool, ...], [pool, ...]]}
+        Alternative tracks; the best-scoring track counts.
+
+The file is compiled once into frozensets, a course -> pool table, a prefix
+table and per-course minor bitmasks, so one pass over a student's courses
+scores every minor. The same tables give the reverse course -> minors
+index. A minor's own required courses never count as its electives.
+"""
+import os
+import json
+import hashlib
+from collections import defaultdict
+from functools import lru_cache
+import numpy as np
+
+RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'minor_requirements.json')
+
+POOL_KEYS = {"courses", "prefixes", "exclude", "cap", "exclusive", "all"}
+
+
+class Pool:
+    """One compiled elective pool"""
+
+    def __init__(self, slot, minor, spec, required):
+        unknown = set(spec) - POOL_KEYS
+        if unknown:
+            raise ValueError(f"Unknown keys {sorted(unknown)} in elective rule for {minor}")
+        self.slot = slot
+        self.minor = minor
+        self.courses = frozenset(spec.get("courses", []))
+        self.prefixes = tuple(spec.get("prefixes", []))
+        self.exclude = frozenset(spec.get("exclude", [])) | required
+        self.cap = spec.get("cap")
+        self.require_all = bool(spec.get("all", False))
+        if self.require_all and (self.prefixes or self.cap is not None):
+            raise ValueError(f"An 'all' rule for {minor} can only list courses")
+        # course -> exclusive group key; courses outside a group are their own key
+        self.groups = {}
+        for index, group in enumerate(spec.get("exclusive", [])):
+            for course in group:
+                if course not in self.courses:
+                    raise ValueError(f"Exclusive course {course} is not in its pool for {minor}")
+                self.groups[course] = ("exclusive", index)
+
+    def accepts(self, course):
+        if course in self.exclude:
+            return False
+        return course in self.courses or course.startswith(self.prefixes)
+
+    def score(self, hits, credit_of):
+        """Return (credits, counted courses) for the courses matched to this pool"""
+        if self.require_all:
+            if len(set(hits)) < len(self.courses):
+                return 0, ()
+            return sum(credit_of(course) for course in hits), tuple(hits)
+        units = {}
+        for course in hits:
+            value = credit_of(course)
+            key = self.groups.get(course, course)
+            if key not in units or value > units[key][0]:
+                units[key] = (value, course)
+        best = sorted(units.values(), key=lambda unit: -unit[0])
+        if self.cap is not None:
+            best = best[:self.cap]
+        return sum(value for value, _ in best), tuple(course for _, course in best)
+
+
+class MinorRules:
+    """Compiled form of minor_requirements.json"""
+
+    def __init__(self, spec):
+        self.version = spec.get("version", 1)
+        # changes whenever any rule does, whether or not "version" was bumped
+        self.digest = hashlib.sha256(json.dumps(spec, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+        self.names = []
+        self.credit_hours = {}
+        self.required = {}
+        self.pools = []
+        # per minor: list of terms, each a tuple of options, each a tuple of pool slots
+        self.terms = []
+        self.required_masks = defaultdict(int)
+        self.course_pools = defaultdict(list)
+        self.prefix_pools = defaultdict(list)
+
+        for index, minor in enumerate(spec["minors"]):
+            name = minor["name"]
+            required = frozenset(minor.get("required", []))
+            self.names.append(name)
+            self.credit_hours[name] = minor["credit_hours"]
+            self.required[name] = required
+            for course in required:
+                self.required_masks[course] |= 1 << index
+
+            terms = []
+            for rule in minor.get("electives", []):
+                options = rule["one_of"] if "one_of" in rule else [[rule]]
+                terms.append(tuple(
+                    tuple(self._add_pool(index, name, pool, required) for pool in option)
+                    for option in options
+                ))
+            self.terms.append(tuple(terms))
+
+        self.required_masks = dict(self.required_masks)
+        self.course_pools = {course: tuple(slots) for course, slots in self.course_pools.items()}
+        self.prefix_pools = {prefix: tuple(slots) for prefix, slots in self.prefix_pools.items()}
+        self.prefix_lengths = tuple(sorted({len(prefix) for prefix in self.prefix_pools}))
+        self.minor_index = {name: index for index, name in enumerate(self.names)}
+        self.pools_for = lru_cache(maxsize=16384)(self._pools_for)
+        # sparse course -> minors incidence for every course the rules name;
+        # courses reached only through a prefix are resolved on first lookup
+        self.course_minors = {course: self._minors_for(course) for course in {*self.required_masks, *self.course_pools}}
+        self._prefix_minors = lru_cache(maxsize=16384)(self._minors_for)
+
+    def _add_pool(self, index, name, spec, required):
+        pool = Pool(len(self.pools), index, spec, required)
+        self.pools.append(pool)
+        for course in pool.courses - pool.exclude:
+            self.course_pools[course].append(pool.slot)
+        for prefix in pool.prefixes:
+            self.prefix_pools[prefix].append(pool.slot)
+        return pool.slot
+
+    def _pools_for(self, course):
+        """Slots of every pool a course belongs to"""
+        slots = list(self.course_pools.get(course, ()))
+        for length in self.prefix_lengths:
+            for slot in self.prefix_pools.get(course[:length], ()):
+                if slot not in slots and self.pools[slot].accepts(course):
+                    slots.append(slot)
+        return tuple(slots)
+
+    def _minors_for(self, course):
+        required = set()
+        mask = self.required_masks.get(course, 0)
+        while mask:
+            bit = mask & -mask
+            required.add(bit.bit_length() - 1)
+            mask ^= bit
+        minors = {index: "required" for index in required}
+        for slot in self.pools_for(course):
+            minors.setdefault(self.pools[slot].minor, "elective")
+        return tuple(sorted(minors.items()))
+
+    def minors_for(self, course):
+        """((minor index, "required" | "elective"), ...) for every minor a course counts toward"""
+        minors = self.course_minors.get(course)
+        return minors if minors is not None else self._prefix_minors(course)
+
+    def match(self, courses):
+        """
+        Single pass over a student's courses.
+
+        Returns (required_hits, pool_hits, touched) where required_hits maps a
+        minor index to the required courses taken, pool_hits maps a pool slot
+        to its matching courses in input order and touched is a bitmask of the
+        minors that matched anything.
+        """
+        seen = set()
+        required_hits = defaultdict(list)
+        pool_hits = defaultdict(list)
+        touched = 0
+        for course in courses:
+            if course in seen:
+                continue
+            seen.add(course)
+            mask = self.required_masks.get(course, 0)
+            touched |= mask
+            while mask:
+                bit = mask & -mask
+                required_hits[bit.bit_length() - 1].append(course)
+                mask ^= bit
+            for slot in self.pools_for(course):
+                pool_hits[slot].append(course)
+                touched |= 1 << self.pools[slot].minor
+        return required_hits, pool_hits, touched
+
+    def pool_scores(self, pool_hits, credit_of):
+        return {slot: self.pools[slot].score(hits, credit_of) for slot, hits in pool_hits.items()}
+
+    def elective_credits(self, index, scores):
+        """Elective credits for one minor given {slot: (credits, courses)}"""
+        total = 0
+        for term in self.terms[index]:
+            total += max(sum(scores.get(slot, (0, ()))[0] for slot in option) for option in term)
+        return total
+
+    def evaluate(self, courses, credit_of):
+        """Return {minor: credits earned} for a list of course names"""
+        required_hits, pool_hits, touched = self.match(courses)
+        scores = self.pool_scores(pool_hits, credit_of)
+        credits = {}
+        for index, name in enumerate(self.names):
+            if not touched >> index & 1:
+                credits[name] = 0
+                continue
+            earned = sum(credit_of(course) for course in required_hits.get(index, ()))
+            credits[name] = earned + self.elective_credits(index, scores)
+        return credits
+
+    def evaluate_batch(self, transcripts, credit_of):
+        """
+        Score many students at once.
+
+        Builds a students x courses incidence matrix over every course that
+        appears in the batch and scores it against per-minor requirement
+        vectors and per-pool column sets with NumPy. Returns a
+        students x minors array of credits earned, in self.names order.
+        """
+        columns = {}
+        rows, cols = [], []
+        for row, courses in enumerate(transcripts):
+            for course in courses:
+                col = columns.setdefault(course, len(columns))
+                rows.append(row)
+                cols.append(col)
+        taken = np.zeros((len(transcripts), len(columns)), dtype=bool)
+        taken[rows, cols] = True
+        weights = np.array([credit_of(course) for course in columns], dtype=float)
+        values = taken * weights
+
+        # courses x minors requirement vectors
+        required = np.zeros((len(columns), len(self.names)))
+        pool_columns = defaultdict(list)
+        for course, col in columns.items():
+            mask = self.required_masks.get(course, 0)
+            while mask:
+                bit = mask & -mask
+                required[col, bit.bit_length() - 1] = 1
+                mask ^= bit
+            for slot in self.pools_for(course):
+                pool_columns[slot].append(col)
+        totals = values @ required
+
+        course_names = list(columns)
+        scores = np.zeros((len(transcripts), len(self.pools)))
+        for slot, slot_columns in pool_columns.items():
+            scores[:, slot] = self._batch_pool_score(self.pools[slot], slot_columns, columns, course_names, taken, values)
+
+        for index, terms in enumerate(self.terms):
+            for term in terms:
+                options = np.stack([scores[:, list(option)].sum(axis=1) for option in term], axis=1)
+                totals[:, index] += options.max(axis=1)
+        return totals
+
+    @staticmethod
+    def _batch_pool_score(pool, slot_columns, columns, course_names, taken, values):
+        if pool.require_all:
+            if any(course not in columns for course in pool.courses):
+                return 0
+            member_columns = [columns[course] for course in pool.courses]
+            return values[:, member_columns].sum(axis=1) * taken[:, member_columns].all(axis=1)
+        units = defaultdict(list)
+        for col in slot_columns:
+            course = course_names[col]
+            units[pool.groups.get(course, course)].append(col)
+        unit_values = np.stack([values[:, unit].max(axis=1) for unit in units.values()], axis=1)
+        if pool.cap is not None and unit_values.shape[1] > pool.cap:
+            unit_values = np.sort(unit_values, axis=1)[:, unit_values.shape[1] - pool.cap:]
+        return unit_values.sum(axis=1)
+
+    def percentages(self, credits):
+        """Percent complete per minor, highest first"""
+        percentage_complete = {}
+        for name in self.names:
+            hours = self.credit_hours[name]
+            percentage_complete[name] = 100 * (credits.get(name, 0) / hours) if hours > 0 else 0
+        return dict(sorted(percentage_complete.items(), key=lambda item: item[1], reverse=True))
+
+
+def load_rules(path=RULES_PATH):
+    with open(path) as handle:
+        return MinorRules(json.load(handle))
+
+
+@lru_cache(maxsize=None)
+def get_minor_rules():
+    """The compiled rules, built once per process"""
+    return load_rules()
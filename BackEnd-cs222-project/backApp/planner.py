@@ -0,0 +1,189 @@
+"""
+Fastest path to each minor: the fewest additional credit hours that
+complete it.
+
+A plan takes every missing required course, then covers the remaining
+credit deficit with electives under the same rules minor_progress scores:
+pool caps, exclusive groups, "all" pools and one_of tracks. Each pool's
+candidate courses are indexed once per catalog version, grouped by credit
+value. A pool's choices are enumerated as counts per credit value, which
+is small because caps are small and catalog credit values are few. The
+choices are then combined with min-plus tables keyed by credits gained,
+saturating at the deficit: pools add within a track, a term keeps its best
+track, and terms add up. Ties prefer fewer courses, then lower course numbers.
+
+An exclusive group that has not been started offers only its cheapest
+course. Unknown or zero-credit courses are never suggested as electives.
+"""
+import math
+import threading
+from itertools import product
+
+from .minor_rules import get_minor_rules
+
+NO_SCORE = (0, ())
+
+
+def _better(entry, current):
+    return current is None or (entry[0], len(entry[1]), entry[1]) < (current[0], len(current[1]), current[1])
+
+
+def _add(table, gain, entry, limit):
+    gain = min(gain, limit)
+    if _better(entry, table.get(gain)):
+        table[gain] = entry
+
+
+def combine(first, second, limit):
+    """Min-plus product of two {gain: (cost, courses)} tables, gains capped at limit"""
+    table = {}
+    for gain_a, (cost_a, courses_a) in first.items():
+        for gain_b, (cost_b, courses_b) in second.items():
+            _add(table, gain_a + gain_b, (cost_a + cost_b, courses_a + courses_b), limit)
+    return table
+
+
+class MinorPlanner:
+    """Per-pool candidate indexes for one catalog version"""
+
+    def __init__(self, rules, catalog):
+        self.rules = rules
+        self.credit_of = catalog.course_credits
+        prefixes = tuple(prefix for pool in rules.pools for prefix in pool.prefixes)
+        prefix_courses = [course for course in catalog.course_names if course.startswith(prefixes)] if prefixes else []
+        # slot -> {credits: candidate courses in code order}
+        self.candidates = [self._index_pool(pool, prefix_courses) for pool in rules.pools]
+
+    def _index_pool(self, pool, prefix_courses):
+        members = set(pool.courses) | {course for course in prefix_courses if course.startswith(pool.prefixes)}
+        by_credits = {}
+        for course in sorted(members):
+            credits = self.credit_of(course)
+            if credits > 0 and pool.accepts(course):
+                by_credits.setdefault(credits, []).append(course)
+        return by_credits
+
+    def plan(self, courses, minors=None):
+        """{minor: plan} for the student's courses, for every minor or just `minors`"""
+        taken = set(courses)
+        required_hits, pool_hits, _ = self.rules.match(courses)
+        scores = self.rules.pool_scores(pool_hits, self.credit_of)
+        plans = {}
+        for index, name in enumerate(self.rules.names):
+            if minors is None or name in minors:
+                plans[name] = self.plan_minor(index, name, taken, required_hits, pool_hits, scores)
+        return plans
+
+    def plan_minor(self, index, name, taken, required_hits, pool_hits, scores):
+        rules = self.rules
+        earned = sum(self.credit_of(course) for course in required_hits.get(index, ())) + rules.elective_credits(index, scores)
+        missing = sorted(rules.required[name] - taken)
+        deficit = rules.credit_hours[name] - earned - sum(self.credit_of(course) for course in missing)
+
+        electives, achievable = (), True
+        if deficit > 0:
+            table = {0: (0, ())}
+            for term in rules.terms[index]:
+                table = combine(table, self.term_table(term, taken, pool_hits, scores, deficit), deficit)
+            best = max(table)
+            achievable = best >= deficit
+            electives = table[best][1]
+
+        # a course may count in more than one pool; list it once and score the plan as minor_progress would
+        electives = sorted(set(electives) - set(missing))
+        planned = [*taken, *missing, *electives]
+        projected = rules.evaluate(planned, self.credit_of)[name]
+        courses = [{"course": course, "credits": self.credit_of(course), "requirement": "required"} for course in missing]
+        courses += [{"course": course, "credits": self.credit_of(course), "requirement": "elective"} for course in electives]
+        return {
+            "minor": name,
+            "credit_hours": rules.credit_hours[name],
+            "current_credits": earned,
+            "projected_credits": projected,
+            "additional_credits": sum(course["credits"] for course in courses),
+            "complete": not courses and deficit <= 0,
+            "achievable": achievable,
+            "courses": courses,
+        }
+
+    def term_table(self, term, taken, pool_hits, scores, limit):
+        """{credits the term gains: cheapest additions}, choosing the best track to add to"""
+        current = [sum(scores.get(slot, NO_SCORE)[0] for slot in option) for option in term]
+        top = max(current)
+        table = {0: (0, ())}
+        for option, score in zip(term, current):
+            # a weaker track has to catch up with the current best before it gains anything
+            option_limit = limit + top - score
+            option_table = {0: (0, ())}
+            for slot in option:
+                option_table = combine(option_table, self.pool_table(slot, taken, pool_hits.get(slot, ()), option_limit), option_limit)
+            for gain, entry in option_table.items():
+                if score + gain > top:
+                    _add(table, score + gain - top, entry, limit)
+        return table
+
+    def pool_table(self, slot, taken, hits, limit):
+        """{credits the pool gains: cheapest additions} for one pool"""
+        pool = self.rules.pools[slot]
+        credit_of = self.credit_of
+        table = {0: (0, ())}
+        if pool.require_all:
+            missing = tuple(sorted(pool.courses - taken))
+            if missing and all(credit_of(course) > 0 for course in missing):
+                _add(table, sum(credit_of(course) for course in pool.courses), (sum(credit_of(course) for course in missing), missing), limit)
+            return table
+
+        units = {}
+        for course in hits:
+            key = pool.groups.get(course, course)
+            units[key] = max(units.get(key, 0), credit_of(course))
+        values = sorted(units.values(), reverse=True)
+        cap = pool.cap
+        old = sum(values[:cap] if cap is not None else values)
+
+        # untaken candidates per credit value, cheapest course per unstarted exclusive group
+        groups = set(units)
+        options = []
+        for credits in sorted(self.candidates[slot]):
+            courses = []
+            for course in self.candidates[slot][credits]:
+                key = pool.groups.get(course, course)
+                if course not in taken and key not in groups:
+                    courses.append(course)
+                    if key != course:
+                        groups.add(key)
+            if courses:
+                options.append((credits, courses))
+        if not options:
+            return table
+
+        most = cap if cap is not None else math.ceil(limit / options[0][0])
+        ranges = [range(min(len(courses), most) + 1) for _, courses in options]
+        for counts in product(*ranges):
+            added = sum(counts)
+            if not added or added > most:
+                continue
+            chosen = [credits for (credits, _), count in zip(options, counts) for _ in range(count)]
+            new_values = sorted(values + chosen, reverse=True)
+            gain = sum(new_values[:cap] if cap is not None else new_values) - old
+            if gain > 0:
+                courses = tuple(course for (_, candidates), count in zip(options, counts) for course in candidates[:count])
+                _add(table, gain, (sum(chosen), courses), limit)
+        return table
+
+
+_lock = threading.Lock()
+_planner = None
+
+
+def get_planner(catalog):
+    """The planner for this catalog version, built on first use"""
+    global _planner
+    planner = _planner
+    rules = get_minor_rules()
+    if planner is not None and planner[0] == catalog.version and planner[1].rules is rules:
+        return planner[1]
+    with _lock:
+        if _planner is None or _planner[0] != catalog.version or _planner[1].rules is not rules:
+            _planner = (catalog.version, MinorPlanner(rules, catalog))
+        return _planner[1]
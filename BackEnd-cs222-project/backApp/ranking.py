@@ -0,0 +1,91 @@
+"""
+BM25 relevance ranking for a batch of jobs.
+
+Each job's title and description are tokenized into words and adjacent
+word pairs ("data analyst" is one term, not two loose words), with light
+suffix stripping so "engineers" and "engineering" match "engineer". Only
+terms that occur in the query are counted, so the term matrix is jobs x
+query terms and is built in one np.bincount. Every keyword group (the
+major's and the minor's keywords) is a query vector, and all jobs are
+scored against all groups in a single matrix product. Titles count
+TITLE_WEIGHT times. Ties keep the jobs' arrival order. This module has no
+Django dependency so JobInfoAPI can use it.
+"""
+import re
+import numpy as np
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+SUFFIXES = ("ings", "ing", "s")
+TITLE_WEIGHT = 3
+K1 = 1.2
+B = 0.75
+
+
+def stem(word):
+    for suffix in SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 4:
+            return word[:-len(suffix)]
+    return word
+
+
+def terms(text):
+    """Stemmed words of text followed by its adjacent word pairs"""
+    words = [stem(word) for word in TOKEN_PATTERN.findall(text.lower())]
+    return words + [f"{first} {second}" for first, second in zip(words, words[1:])]
+
+
+def query_matrix(keyword_groups):
+    """(vocabulary, groups x terms weights) for the given keyword groups"""
+    vocabulary = {}
+    rows, columns = [], []
+    for row, keywords in enumerate(keyword_groups):
+        for keyword in keywords:
+            for term in terms(keyword):
+                rows.append(row)
+                columns.append(vocabulary.setdefault(term, len(vocabulary)))
+    weights = np.zeros((len(keyword_groups), len(vocabulary)))
+    np.add.at(weights, (rows, columns), 1.0)
+    return vocabulary, weights
+
+
+def term_counts(jobs, vocabulary):
+    """(jobs x terms counts of query terms, length of each job in terms)"""
+    job_ids, term_ids, lengths = [], [], np.zeros(len(jobs))
+    for index, job in enumerate(jobs):
+        tokens = terms(job.get("title", "")) * TITLE_WEIGHT + terms(job.get("description", ""))
+        lengths[index] = len(tokens)
+        for token in tokens:
+            term_id = vocabulary.get(token)
+            if term_id is not None:
+                job_ids.append(index)
+                term_ids.append(term_id)
+    flat = np.asarray(job_ids, dtype=np.int64) * len(vocabulary) + np.asarray(term_ids, dtype=np.int64)
+    counts = np.bincount(flat, minlength=len(jobs) * len(vocabulary)).reshape(len(jobs), len(vocabulary))
+    return counts, lengths
+
+
+def bm25_scores(jobs, keyword_groups):
+    """
+    One relevance score per job. Each group's BM25 scores are scaled so the
+    batch's best match for that group scores 1 before summing, so a job
+    relevant to both the major and the minor beats one that only matches
+    the major strongly.
+    """
+    vocabulary, weights = query_matrix(keyword_groups)
+    if not jobs or not vocabulary:
+        return np.zeros(len(jobs))
+    counts, lengths = term_counts(jobs, vocabulary)
+    document_frequency = np.count_nonzero(counts, axis=0)
+    idf = np.log1p((len(jobs) - document_frequency + 0.5) / (document_frequency + 0.5))
+    norm = K1 * (1 - B + B * lengths / max(lengths.mean(), 1.0))
+    saturated = counts * (K1 + 1) / (counts + norm[:, None])
+    scores = saturated @ (weights * idf).T
+    best = scores.max(axis=0)
+    return (scores / np.where(best > 0, best, 1.0)).sum(axis=1)
+
+
+def rank_jobs(jobs, keyword_groups):
+    """jobs, most relevant first; equal scores keep their original order"""
+    scores = bm25_scores(jobs, keyword_groups)
+    order = np.argsort(-scores, kind="stable")
+    return [jobs[index] for index in order]
@@ -0,0 +1,130 @@
+"""
+Token-bucket rate limiting for upstream APIs.
+
+A bucket is shared by every thread in the process, and with a `path` also
+by every process on the host through a row in a local SQLite file updated
+under BEGIN IMMEDIATE. Callers never sleep inside the limiter: try_acquire()
+says how long to wait, so the caller can decide to give up and return
+partial results instead of blocking a request.
+
+If the shared row cannot be reached quickly (another worker holds the lock
+past `busy_timeout`, or the file cannot be opened or written) the bucket
+falls back to its in-process state for that call rather than stalling or
+failing the request.
+"""
+import os
+import time
+import random
+import logging
+import sqlite3
+import threading
+from email.utils import parsedate_to_datetime
+import requests
+
+logger = logging.getLogger("minorrec.ratelimit")
+
+
+class RateLimited(requests.RequestException):
+    """Upstream is throttled for longer than the caller is willing to wait"""
+
+    def __init__(self, retry_after, message=None):
+        super().__init__(message or f"Rate limited, retry after {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+
+def parse_retry_after(value):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date), or None"""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt, base=0.5, cap=8.0):
+    """Jittered exponential backoff: uniform(0.5, 1.5) * base * 2**attempt, capped"""
+    return min(cap, base * 2 ** attempt) * random.uniform(0.5, 1.5)
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity, path=None, name="default", busy_timeout=0.1):
+        self.rate = rate
+        self.capacity = capacity
+        self.path = path
+        self.name = name
+        self.busy_timeout = busy_timeout
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._tokens = float(capacity)
+        self._updated = time.time()
+        self._blocked_until = 0.0
+
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None)
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS rate_limits "
+                "(name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL, blocked_until REAL NOT NULL)"
+            )
+            self._local.connection = connection
+        return connection
+
+    def _update(self, change):
+        """Run change(tokens, updated, blocked_until) -> (result, new state) atomically"""
+        with self._lock:
+            if self.path is not None:
+                try:
+                    return self._shared_update(change)
+                except (sqlite3.Error, OSError) as e:
+                    logger.warning("Rate limiter %s using in-process state, %s unavailable: %s", self.name, self.path, e)
+            result, (self._tokens, self._updated, self._blocked_until) = change(
+                self._tokens, self._updated, self._blocked_until
+            )
+            return result
+
+    def _shared_update(self, change):
+        connection = self._connection()
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+            row = connection.execute(
+                "SELECT tokens, updated, blocked_until FROM rate_limits WHERE name = ?", (self.name,)
+            ).fetchone()
+            state = row if row is not None else (float(self.capacity), time.time(), 0.0)
+            result, state = change(*state)
+            connection.execute(
+                "INSERT OR REPLACE INTO rate_limits (name, tokens, updated, blocked_until) VALUES (?, ?, ?, ?)",
+                (self.name, *state),
+            )
+            connection.execute("COMMIT")
+        except BaseException:
+            if connection.in_transaction:
+                connection.execute("ROLLBACK")
+            raise
+        return result
+
+    def try_acquire(self):
+        """Take a token if one is available. Returns 0.0 on success, else the seconds to wait."""
+        def change(tokens, updated, blocked_until):
+            now = time.time()
+            tokens = min(self.capacity, tokens + (now - updated) * self.rate)
+            if blocked_until > now:
+                return blocked_until - now, (tokens, now, blocked_until)
+            if tokens >= 1:
+                return 0.0, (tokens - 1, now, blocked_until)
+            return (1 - tokens) / self.rate, (tokens, now, blocked_until)
+        return self._update(change)
+
+    def block_for(self, seconds):
+        """Hold every caller off for `seconds`, e.g. after a 429 with Retry-After"""
+        def change(tokens, updated, blocked_until):
+            return None, (0.0, time.time(), max(blocked_until, time.time() + seconds))
+        self._update(change)
@@ -0,0 +1,156 @@
+"""
+Single-flight request coalescing.
+
+Concurrent calls with the same key share one execution: the first caller
+(the leader) runs the function, everyone else waits for it and gets the
+same result or exception. With a lock directory and a `recheck`, the
+leaders of different worker processes for the same key also take turns
+through a lock file for that key. Each re-checks a shared cache via
+`recheck` once it has the lock, so a pair that another worker just
+answered is not fetched again. Without a `recheck` there is nothing to
+share across processes, so no file lock is taken. Different keys never
+wait on each other. AsyncSingleFlight does the same for coroutines within
+one event loop.
+
+Lock files are empty, one per key ever led, and safe to delete while no
+worker is running.
+"""
+import os
+import time
+import asyncio
+import hashlib
+import logging
+import threading
+
+try:
+    import fcntl
+except ImportError:  # no flock on Windows; coalescing stays per process
+    fcntl = None
+
+from .caching import MISSING
+
+logger = logging.getLogger("minorrec.coalescing")
+
+LOCK_TIMEOUT = 30.0
+LOCK_POLL = 0.05
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    def __init__(self, name, lock_dir=None, lock_timeout=LOCK_TIMEOUT):
+        self.name = name
+        self.lock_dir = lock_dir if fcntl is not None else None
+        self.lock_timeout = lock_timeout
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.leaders = 0
+        self.shared = 0
+
+    def do(self, key, fn, recheck=None):
+        """Run fn() once for all concurrent callers with this key and return its result"""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.shared += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self.leaders += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = self._run(key, fn, recheck)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def _run(self, key, fn, recheck):
+        if self.lock_dir is None or recheck is None:
+            return fn()
+        with self._file_lock(key) as locked:
+            if locked and recheck is not None:
+                value = recheck()
+                if value is not MISSING:
+                    return value
+            return fn()
+
+    def _lock_path(self, key):
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.lock_dir, f"singleflight-{self.name}-{digest}.lock")
+
+    def _file_lock(self, key):
+        return _FileLock(self._lock_path(key), self.lock_timeout)
+
+
+class AsyncSingleFlight:
+    """SingleFlight for coroutines: concurrent awaits of one key share one task"""
+
+    def __init__(self, name):
+        self.name = name
+        self._calls = {}
+        self.leaders = 0
+        self.shared = 0
+
+    async def do(self, key, fn):
+        """Await fn() once for all concurrent callers with this key on the running loop"""
+        call_key = (asyncio.get_running_loop(), key)
+        task = self._calls.get(call_key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[call_key] = task
+            task.add_done_callback(lambda _: self._calls.pop(call_key, None))
+            self.leaders += 1
+        else:
+            self.shared += 1
+        # one caller going away must not cancel the call for everyone else
+        return await asyncio.shield(task)
+
+
+class _FileLock:
+    """flock on a file, polled so a stuck worker cannot hold everyone else forever"""
+
+    def __init__(self, path, timeout):
+        self.path = path
+        self.timeout = timeout
+        self.handle = None
+
+    def __enter__(self):
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self.handle = open(self.path, "a")
+        except OSError as e:
+            logger.warning("Single-flight lock file unavailable, continuing without it: %s", e)
+            return False
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                fcntl.flock(self.handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return True
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    logger.warning("Timed out waiting for %s, continuing without it", self.path)
+                    return False
+                time.sleep(LOCK_POLL)
+
+    def __exit__(self, *exc_info):
+        if self.handle is not None:
+            self.handle.close()  # closing the file releases the flock
+            self.handle = None
+        return False
@@ -1,3 +1,1339 @@
-from django.test import TestCase
+import os
+import io
+import gzip
+import json
+import time
+import shutil
+import sqlite3
+import logging
+import random
+import itertools
+import tempfile
+import asyncio
+import threading
+from unittest import mock
+import httpx
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.management import call_command
+from django.test import TestCase, override_settings
 
-# Create your tests here.
+import JobInfoAPI
+from .caching import MISSING, TwoTierCache
+from .catalog import get_catalog, reset_catalog, parse_credit_hours, load_artifact
+from . import backend, insights, metrics
+from .minor_rules import RULES_PATH, MinorRules, get_minor_rules
+from .benchmark import default_scenarios, unbenchmarked_routes
+from .cursors import Prefetcher, SeenUrls
+from .log import JsonFormatter, QueueingHandler, SamplingFilter
+from .planner import get_planner
+from .ranking import bm25_scores, rank_jobs
+from .ratelimit import RateLimited, TokenBucket, parse_retry_after
+from .singleflight import SingleFlight
+from .typeahead import CourseIndex
+from .what_if import WhatIf
+
+CATALOG_ROWS = [
+    ("CS", 124, "Introduction to Computer Science I", "3 hours."),
+    ("CS", 124, "Introduction to Computer Science I", "3 hours."),
+    ("CS", 128, "Introduction to Computer Science II", "3 hours."),
+    ("CS", 173, "Discrete Structures", "3 hours."),
+    ("CS", 225, "Data Structures", "4 hours."),
+    ("CS", 374, "Introduction to Algorithms & Models of Computation", "4 hours."),
+    ("CS", 411, "Database Systems", "3 OR 4 hours."),
+    ("CS", 498, "Special Topics", "1 TO 4 hours."),
+    ("MATH", 241, "Calculus III", "4 hours."),
+    ("MATH", 415, "Applied Linear Algebra", "3 OR 4 hours."),
+    ("STAT", 400, "Statistics and Probability I", "4 hours."),
+    ("STAT", 410, "Statistics and Probability II", "3 OR 4 hours."),
+    ("STAT", 420, "Methods of Applied Statistics", "3 OR 4 hours."),
+    ("PHYS", 211, "University Physics: Mechanics", "4 hours."),
+    ("ENG", 100, "Engineering Orientation", "0 hours."),
+    ("IB", 490, "Senior Thesis", "10 hours."),
+]
+
+
+def write_catalog_csv(path, rows=CATALOG_ROWS):
+    with open(path, "w") as handle:
+        handle.write("Subject,Number,Name,Credit Hours,courseName\n")
+        for subject, number, name, credits in rows:
+            handle.write(f'{subject},{number},"{name}",{credits},{subject} {number}\n')
+
+
+class CatalogFixtureMixin:
+    def setUp(self):
+        super().setUp()
+        self.tmpdir = tempfile.mkdtemp()
+        self.csv_path = os.path.join(self.tmpdir, "course-catalog.csv")
+        write_catalog_csv(self.csv_path)
+        self.artifact_path = os.path.join(self.tmpdir, "course-catalog.bin")
+        self.settings_override = override_settings(
+            COURSE_CATALOG_CSV=self.csv_path, COURSE_CATALOG_ARTIFACT=self.artifact_path
+        )
+        self.settings_override.enable()
+        reset_catalog()
+
+    def tearDown(self):
+        reset_catalog()
+        self.settings_override.disable()
+        shutil.rmtree(self.tmpdir)
+        super().tearDown()
+
+
+class CatalogTests(CatalogFixtureMixin, TestCase):
+    def test_catalog_is_shared_between_calls(self):
+        catalog = get_catalog()
+        self.assertIs(get_catalog(), catalog)
+        self.assertEqual(catalog.course_names[:2], ["CS 124", "CS 128"])
+        self.assertEqual(catalog.subject_names, ["CS", "MATH", "STAT", "PHYS", "ENG", "IB"])
+
+    def test_touch_without_change_keeps_snapshot(self):
+        catalog = get_catalog()
+        stat = os.stat(self.csv_path)
+        os.utime(self.csv_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        self.assertIs(get_catalog(), catalog)
+
+    def test_changed_file_is_reloaded(self):
+        catalog = get_catalog()
+        write_catalog_csv(self.csv_path, CATALOG_ROWS[:3])
+        stat = os.stat(self.csv_path)
+        os.utime(self.csv_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        reloaded = get_catalog()
+        self.assertIsNot(reloaded, catalog)
+        self.assertEqual(reloaded.course_names, ["CS 124", "CS 128"])
+
+    def test_class_names_endpoint(self):
+        response = self.client.get("/api/classNames/")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("CS 225", response.json())
+
+
+class CatalogArtifactTests(CatalogFixtureMixin, TestCase):
+    def build(self):
+        call_command("build_catalog", stdout=open(os.devnull, "w"))
+
+    def test_artifact_round_trip(self):
+        from_csv = get_catalog()
+        self.build()
+        from_artifact = load_artifact(self.artifact_path)
+        self.assertEqual(from_artifact.version, from_csv.version)
+        self.assertEqual(from_artifact.course_names, from_csv.course_names)
+        self.assertEqual(from_artifact.credits, from_csv.credits)
+        self.assertEqual(from_artifact.titles["CS 225"], "Data Structures")
+
+    def test_fresh_artifact_is_used(self):
+        self.build()
+        self.assertEqual(get_catalog().path, self.artifact_path)
+
+    def test_shared_catalog_reads_the_mapped_file(self):
+        from_csv = get_catalog()
+        self.build()
+        with override_settings(COURSE_CATALOG_SHARED=True):
+            reset_catalog()
+            shared = get_catalog()
+        self.assertEqual(type(shared).__name__, "SharedCatalog")
+        self.assertEqual(list(shared.course_names), from_csv.course_names)
+        self.assertEqual(list(shared.subject_names), from_csv.subject_names)
+        for name in from_csv.course_names:
+            self.assertEqual(shared.credit_range(name), from_csv.credit_range(name))
+        self.assertEqual(shared.credit_range("CS 999"), (0, 0))
+        self.assertEqual(shared.credit_range("NOPE 100"), (0, 0))
+        self.assertEqual(shared.course_titles()[3], "Data Structures")
+
+    def test_stale_artifact_falls_back_to_csv(self):
+        self.build()
+        write_catalog_csv(self.csv_path, CATALOG_ROWS[:3])
+        catalog = get_catalog()
+        self.assertEqual(catalog.path, self.csv_path)
+        self.assertEqual(catalog.course_names, ["CS 124", "CS 128"])
+
+
+class CachedResponseTests(CatalogFixtureMixin, TestCase):
+    def test_compressed_body_and_validators(self):
+        response = self.client.get("/api/classNames/", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertIn("CS 225", json.loads(gzip.decompress(response.content)))
+        self.assertTrue(response["Last-Modified"])
+
+    def test_repeat_client_gets_not_modified(self):
+        etag = self.client.get("/api/subjectNames/")["ETag"]
+        response = self.client.get("/api/subjectNames/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+
+    def test_new_catalog_version_changes_etag(self):
+        etag = self.client.get("/api/classNames/")["ETag"]
+        write_catalog_csv(self.csv_path, CATALOG_ROWS[:3])
+        response = self.client.get("/api/classNames/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), ["CS 124", "CS 128"])
+
+
+class CourseSearchTests(CatalogFixtureMixin, TestCase):
+    def search(self, query, **params):
+        response = self.client.get("/api/courses/search/", {"q": query, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_code_prefix(self):
+        self.assertEqual([r["course"] for r in self.search("CS 2")["results"]], ["CS 225"])
+        self.assertEqual([r["course"] for r in self.search("cs1")["results"]], ["CS 124", "CS 128", "CS 173"])
+
+    def test_title_words_and_infix(self):
+        self.assertEqual(self.search("linear alg")["results"][0]["course"], "MATH 415")
+        self.assertEqual(self.search("stat")["results"][0]["course"], "STAT 400")
+        self.assertIn("MATH 415", [r["course"] for r in self.search("gebra")["results"]])
+
+    def test_code_prefix_keeps_numeric_order(self):
+        index = CourseIndex(["CS 1000", "CS 124", "CS 99", "MATH 1"], ["Capstone", "Intro", "Seminar", "Counting"])
+        self.assertEqual([r["course"] for r in index.results("cs")[1]], ["CS 99", "CS 124", "CS 1000"])
+        self.assertEqual([r["course"] for r in index.results("cs 1")[1]], ["CS 124", "CS 1000"])
+
+    def test_limit_and_offset(self):
+        page = self.search("cs", limit=2, offset=1)
+        self.assertEqual(page["total"], 7)
+        self.assertEqual([r["course"] for r in page["results"]], ["CS 128", "CS 173"])
+        response = self.client.get("/api/courses/search/", {"q": "cs", "limit": "x"})
+        self.assertEqual(response.status_code, 400)
+
+
+class CreditIndexTests(CatalogFixtureMixin, TestCase):
+    def test_parse_credit_hours(self):
+        self.assertEqual(parse_credit_hours("3 hours."), (3, 3))
+        self.assertEqual(parse_credit_hours("10 hours."), (10, 10))
+        self.assertEqual(parse_credit_hours("1 TO 4 hours."), (1, 4))
+        self.assertEqual(parse_credit_hours("3 OR 4 hours."), (3, 4))
+        self.assertEqual(parse_credit_hours("4 undergraduate hours. 4 graduate hours."), (4, 4))
+        self.assertEqual(parse_credit_hours(float("nan")), (0, 0))
+
+    def test_credit_lookup(self):
+        catalog = get_catalog()
+        self.assertEqual(catalog.course_credits("IB 490"), 10)
+        self.assertEqual(catalog.credit_range("CS 498"), (1, 4))
+        self.assertEqual(catalog.course_credits("FOO 123"), 0)
+
+
+def three_credits(course):
+    return 3
+
+
+class MinorRulesTests(TestCase):
+    def setUp(self):
+        self.rules = get_minor_rules()
+
+    def test_every_minor_is_compiled(self):
+        self.assertEqual(len(self.rules.names), 10)
+        self.assertEqual(self.rules.credit_hours["Data Science"], 21)
+
+    def test_required_and_capped_prefix_pool(self):
+        credits = self.rules.evaluate(
+            ["CS 124", "CS 128", "CS 374", "CS 411", "CS 421", "CS 491"], three_credits
+        )
+        # two required courses plus two of the three eligible 300/400-level electives
+        self.assertEqual(credits["Computer Science"], 12)
+        self.assertEqual(credits["Physics"], 0)
+
+    def test_exclusive_pair_counts_once(self):
+        credits = self.rules.evaluate(["STAT 410", "STAT 420"], three_credits)
+        self.assertEqual(credits["Math"], 3)
+        self.assertEqual(credits["Statistics"], 6)
+
+    def test_bundle_needs_every_course(self):
+        self.assertEqual(self.rules.evaluate(["ACCY 201"], three_credits)["Business"], 0)
+        self.assertEqual(self.rules.evaluate(["ACCY 201", "ACCY 202"], three_credits)["Business"], 6)
+        self.assertEqual(self.rules.evaluate(["ACCY 200", "ACCY 201", "ACCY 202"], three_credits)["Business"], 6)
+
+    def test_required_course_is_not_an_elective(self):
+        self.assertEqual(self.rules.evaluate(["SPAN 228", "SPAN 208"], three_credits)["Spanish"], 6)
+
+    def test_duplicates_are_ignored(self):
+        self.assertEqual(self.rules.evaluate(["CS 374", "CS 374"], three_credits)["Computer Science"], 3)
+
+    def test_reverse_index_matches_evaluation(self):
+        names = lambda course: {self.rules.names[index]: kind for index, kind in self.rules.minors_for(course)}
+        self.assertEqual(names("CS 225"), {"Computer Science": "required", "Data Science": "elective"})
+        # prefix-only course, and one the prefix pool excludes
+        self.assertEqual(names("IB 450"), {"Biology": "elective"})
+        self.assertEqual(names("CS 491"), {})
+        for course in ["STAT 410", "ECON 490", "SPAN 331", "PHYS 419", "MATH 415", "IS 467", "CS 374"]:
+            earned = {name for name, credits in self.rules.evaluate([course], three_credits).items() if credits}
+            self.assertEqual(set(names(course)), earned, course)
+
+    def test_batch_matches_single_evaluation(self):
+        transcripts = [
+            ["CS 124", "CS 374", "CS 411", "CS 421", "CS 491"],
+            ["STAT 410", "STAT 420", "STAT 400", "MATH 415", "MATH 241"],
+            ["ACCY 201", "ACCY 202", "BADM 275", "BADM 300", "FIN 230", "ECON 103", "ECON 425"],
+            ["SPAN 228", "SPAN 208", "SPAN 300", "IB 302", "IB 490", "PHYS 214"],
+            [],
+        ]
+        credit_of = {"CS 374": 4, "MATH 241": 4, "IB 490": 10, "STAT 420": 4}.get
+        def credits(course):
+            return credit_of(course, 3)
+        batch = self.rules.evaluate_batch(transcripts, credits)
+        for row, courses in zip(batch, transcripts):
+            self.assertEqual(dict(zip(self.rules.names, row.tolist())), self.rules.evaluate(courses, credits))
+
+    def test_what_if_matches_full_evaluation(self):
+        pool = [
+            "CS 124", "CS 225", "CS 374", "CS 411", "CS 421", "CS 491", "STAT 400", "STAT 410", "STAT 420",
+            "MATH 415", "ACCY 201", "ACCY 202", "SPAN 228", "SPAN 208", "IB 302", "IB 490", "PHYS 214",
+        ]
+        credit_of = {"CS 374": 4, "IB 490": 10, "STAT 420": 4}.get
+        def credits(course):
+            return credit_of(course, 3)
+        what_if = WhatIf.from_courses(self.rules, credits, ["CS 124", "STAT 410"])
+        moves = random.Random(7)
+        for _ in range(200):
+            course = moves.choice(pool)
+            if course in what_if.courses:
+                changed = what_if.remove(course)
+            else:
+                changed = what_if.add(course)
+            self.assertEqual(set(changed), {self.rules.names[index] for index, _ in self.rules.minors_for(course)})
+            self.assertEqual(what_if.credits, self.rules.evaluate(what_if.courses, credits))
+            # and it survives a round trip through the session
+            what_if = WhatIf.from_state(self.rules, credits, json.loads(json.dumps(what_if.to_state("v"))))
+
+    def test_what_if_remove_tolerates_missing_pool_hits(self):
+        what_if = WhatIf(self.rules, three_credits, ["CS 374"])
+        self.assertEqual(what_if.remove("CS 374"), ["Computer Science"])
+        self.assertEqual((what_if.courses, what_if.hits), ([], {}))
+
+
+class MinorProgressTests(CatalogFixtureMixin, TestCase):
+    def test_minor_progress_uses_catalog_credits(self):
+        response = self.client.post(
+            "/api/minor_progress/",
+            {"major": "Computer Science", "classes": ["CS 124", "CS 128", "CS 173", "CS 225", "CS 374"]},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+        percentages = response.json()["percentages"]
+        self.assertEqual(list(percentages)[0], "Computer Science")
+        self.assertAlmostEqual(percentages["Computer Science"], 100 * 17 / 19)
+        self.assertEqual(len(percentages), 10)
+
+    def test_minor_progress_requires_major(self):
+        response = self.client.post("/api/minor_progress/", {"classes": ["CS 124"]}, content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+
+    def test_batch_endpoint(self):
+        response = self.client.post(
+            "/api/minor_progress/batch/",
+            {"transcripts": [{"id": "a", "classes": ["CS 124", "CS 225"]}, {"id": "b", "classes": []}]},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+        results = response.json()["results"]
+        self.assertEqual([result["id"] for result in results], ["a", "b"])
+        self.assertAlmostEqual(results[0]["percentages"]["Computer Science"], 100 * 7 / 19)
+        self.assertEqual(results[1]["percentages"]["Computer Science"], 0)
+
+
+class FakeResponse:
+    def __init__(self, status_code, data=None, headers=None):
+        self.status_code = status_code
+        self.data = data
+        self.headers = headers or {}
+
+    def json(self):
+        return self.data
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise JobInfoAPI.requests.HTTPError(f"{self.status_code} error")
+
+
+class FakeAdzuna:
+    """Stand-in for the Adzuna session: `count` results per keyword, shared urls for 'shared' titles"""
+
+    def __init__(self, count=12, throttle_from_page=None):
+        self.count = count
+        self.throttle_from_page = throttle_from_page
+        self.calls = []
+
+    def get(self, url, params=None, **kwargs):
+        page = int(url.rstrip("/").rsplit("/", 1)[1])
+        keyword, per_page = params["what"], params["results_per_page"]
+        self.calls.append((keyword, page))
+        if self.throttle_from_page is not None and page >= self.throttle_from_page:
+            return FakeResponse(429, headers={"Retry-After": "120"})
+        first = (page - 1) * per_page
+        results = [
+            {
+                "title": f"{keyword} role {i}",
+                "description": f"Work on {keyword} problems",
+                "redirect_url": f"https://jobs.example/{'shared' if i % 5 == 0 else keyword}/{i}",
+                "location": {"display_name": "London"},
+                "company": {"display_name": "Acme"},
+            }
+            for i in range(first, min(first + per_page, self.count))
+        ]
+        return FakeResponse(200, {"count": self.count, "results": results})
+
+
+@override_settings(JOB_PREFETCH=False)
+class JobFetchTests(TestCase):
+    def setUp(self):
+        for name in ("page_cache", "rate_limiter"):
+            patcher = mock.patch.object(JobInfoAPI, name, None)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def run_batch(self, fake, **kwargs):
+        kwargs.setdefault("jobs_per_batch", 5)
+        with mock.patch.object(JobInfoAPI, "get_session", return_value=fake):
+            return JobInfoAPI.get_career_choices_for_major_minor(
+                "Computer Science", "Statistics", results_per_page=5, max_pages=3, **kwargs
+            )
+
+    def test_concurrent_mode_matches_sequential(self):
+        for cursor in ({}, {"current_keyword_index": 2, "current_page": 2}):
+            sequential = self.run_batch(FakeAdzuna(), **cursor)
+            concurrent = self.run_batch(FakeAdzuna(), concurrent=True, **cursor)
+            self.assertEqual(concurrent, sequential)
+
+    def test_concurrent_window_covers_only_the_batch(self):
+        fake = FakeAdzuna()
+        self.run_batch(fake, concurrent=True)
+        self.assertEqual(fake.calls, [("statistician", 1)])
+        # an offset into the first page needs one more page, and no others
+        fake = FakeAdzuna()
+        self.run_batch(fake, concurrent=True, current_offset=3)
+        self.assertEqual(fake.calls, [("statistician", 1), ("statistician", 2)])
+
+    def test_concurrent_fetches_more_only_when_dedup_drops_results(self):
+        seen = {f"https://jobs.example/statistician/{i}" for i in range(1, 5)} | {"https://jobs.example/shared/0"}
+        sequential, fake = FakeAdzuna(), FakeAdzuna()
+        expected = self.run_batch(sequential, seen_urls=set(seen))
+        self.assertEqual(self.run_batch(fake, concurrent=True, seen_urls=set(seen)), expected)
+        self.assertEqual(fake.calls, sequential.calls)
+
+    def test_sequential_stops_when_batch_is_full(self):
+        fake = FakeAdzuna()
+        result = self.run_batch(fake)
+        self.assertEqual(len(fake.calls), 1)
+        self.assertEqual((result["next_keyword_index"], result["next_page"], result["next_offset"]), (0, 2, 0))
+
+    def test_cursor_resumes_exactly(self):
+        everything = self.run_batch(FakeAdzuna(), jobs_per_batch=1000)
+        self.assertFalse(everything["has_more"])
+
+        def pages(**cursor):
+            return self.run_batch(FakeAdzuna(), jobs_per_batch=3, **cursor)
+
+        collected, result = [], pages()
+        collected.extend(result["jobs"])
+        while result["has_more"]:
+            result = pages(
+                current_keyword_index=result["next_keyword_index"],
+                current_page=result["next_page"],
+                current_offset=result["next_offset"],
+            )
+            collected.extend(result["jobs"])
+        urls = [job["url"] for job in collected]
+        # shared urls reappear across batches until a seen-url digest is carried between calls
+        self.assertEqual(set(urls), {job["url"] for job in everything["jobs"]})
+        self.assertEqual(len([url for url in urls if "/shared/" not in url]), len(set(url for url in urls if "/shared/" not in url)))
+
+    def test_stream_emits_jobs_then_ranked_summary(self):
+        batch = self.run_batch(FakeAdzuna())
+        with mock.patch.object(JobInfoAPI, "get_session", return_value=FakeAdzuna()):
+            response = self.client.get(
+                "/api/job_recommendations/stream/", {"major": "Computer Science", "minor": "Statistics"}
+            )
+            body = b"".join(response.streaming_content).decode()
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        events = [
+            (lines[0].removeprefix("event: "), json.loads(lines[1].removeprefix("data: ")))
+            for lines in (chunk.split("\n") for chunk in body.strip().split("\n\n"))
+        ]
+        self.assertEqual([event for event, _ in events], ["job"] * 5 + ["summary"])
+        summary = events[-1][1]
+        self.assertEqual(summary["jobs"], batch["jobs"])
+        self.assertEqual({job["url"] for _, job in events[:-1]}, {job["url"] for job in summary["jobs"]})
+        self.assertEqual(summary["next_page"], batch["next_page"])
+
+    def test_stream_requires_major_and_minor(self):
+        response = self.client.get("/api/job_recommendations/stream/", {"major": "Computer Science"})
+        self.assertEqual(response.status_code, 400)
+
+    def post_batch(self, fake, cursor=None, minor="Statistics"):
+        data = {"major": "Computer Science", "minor": minor}
+        if cursor:
+            data["cursor"] = cursor
+        with mock.patch.object(JobInfoAPI, "get_session", return_value=fake):
+            return self.client.post("/api/job_recommendations/", data, content_type="application/json")
+
+    def test_opaque_cursor_never_repeats_a_job(self):
+        fake, urls, cursor = FakeAdzuna(), [], None
+        while True:
+            result = self.post_batch(fake, cursor).json()
+            urls.extend(job["url"] for job in result["jobs"])
+            cursor = result["cursor"]
+            if not cursor:
+                break
+        self.assertEqual(len(urls), len(set(urls)))
+        everything = self.run_batch(FakeAdzuna(), jobs_per_batch=1000)
+        self.assertEqual(set(urls), {job["url"] for job in everything["jobs"]})
+
+    def test_tampered_or_foreign_cursor_is_rejected(self):
+        cursor = self.post_batch(FakeAdzuna()).json()["cursor"]
+        self.assertEqual(self.post_batch(FakeAdzuna(), cursor[:-2] + "xx").status_code, 400)
+        self.assertEqual(self.post_batch(FakeAdzuna(), cursor, minor="Business").status_code, 400)
+
+    @override_settings(JOB_PREFETCH=True)
+    def test_next_batch_is_prefetched(self):
+        fake, prefetcher, threads = FakeAdzuna(), Prefetcher(), []
+        run_job_batch = backend.run_job_batch
+
+        def record_thread(*args):
+            threads.append(threading.current_thread().name.startswith("job-prefetch"))
+            return run_job_batch(*args)
+
+        with mock.patch.object(backend, "job_prefetcher", prefetcher), \
+                mock.patch.object(backend, "run_job_batch", side_effect=record_thread), \
+                mock.patch.object(JobInfoAPI, "get_session", return_value=fake):
+            first = self.post_batch(fake).json()
+            second = self.post_batch(fake, first["cursor"]).json()
+            prefetcher.pending.get(second["cursor"]).result()
+        # only the first batch was fetched while a request waited
+        self.assertEqual(threads, [False, True, True])
+        self.assertEqual(len(second["jobs"]), 5)
+        self.assertFalse({job["url"] for job in first["jobs"]} & {job["url"] for job in second["jobs"]})
+
+    def test_concurrent_prefetch_submits_start_one_batch(self):
+        prefetcher, calls, barrier = Prefetcher(), [], threading.Barrier(8)
+
+        def submit():
+            barrier.wait(5)
+            prefetcher.submit("cursor", lambda: calls.append(1) or "batch")
+
+        # make the pending check and the insert as far apart as possible
+        get = prefetcher.pending.get
+        with mock.patch.object(prefetcher.pending, "get", side_effect=lambda *args: time.sleep(0.01) or get(*args)):
+            threads = [threading.Thread(target=submit) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(prefetcher.take("cursor"), "batch")
+        self.assertEqual(len(calls), 1)
+
+    def test_seen_url_digest_round_trips_compactly(self):
+        seen = SeenUrls()
+        for i in range(300):
+            seen.add(f"https://jobs.example/{i}")
+        token = seen.encode()
+        restored = SeenUrls.decode(token)
+        self.assertLess(len(token), 800)
+        self.assertTrue(all(f"https://jobs.example/{i}" in restored for i in range(300)))
+        self.assertLess(sum(f"https://other.example/{i}" in restored for i in range(1000)), 20)
+
+    def test_throttled_batch_returns_partial_results(self):
+        for concurrent in (False, True):
+            fake = FakeAdzuna(throttle_from_page=2)
+            with mock.patch.object(JobInfoAPI.time, "sleep") as sleep:
+                result = self.run_batch(fake, jobs_per_batch=8, concurrent=concurrent)
+            sleep.assert_not_called()
+            self.assertEqual(len(result["jobs"]), 5)
+            self.assertTrue(result["rate_limited"])
+            self.assertTrue(result["has_more"])
+            self.assertGreaterEqual(result["retry_after"], 120)
+            self.assertEqual((result["next_keyword_index"], result["next_page"], result["next_offset"]), (0, 2, 0))
+
+
+class RateLimiterTests(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+
+    def test_bucket_allows_burst_then_reports_wait(self):
+        bucket = TokenBucket(rate=1, capacity=2)
+        self.assertEqual(bucket.try_acquire(), 0.0)
+        self.assertEqual(bucket.try_acquire(), 0.0)
+        self.assertGreater(bucket.try_acquire(), 0.5)
+
+    def test_block_is_shared_through_the_database(self):
+        path = os.path.join(self.tmpdir, "limits.sqlite3")
+        TokenBucket(rate=10, capacity=10, path=path, name="adzuna").block_for(30)
+        other = TokenBucket(rate=10, capacity=10, path=path, name="adzuna")
+        self.assertGreater(other.try_acquire(), 25)
+        self.assertEqual(TokenBucket(rate=10, capacity=10, path=path, name="other").try_acquire(), 0.0)
+
+    def test_locked_database_falls_back_to_process_bucket(self):
+        path = os.path.join(self.tmpdir, "limits.sqlite3")
+        bucket = TokenBucket(rate=1, capacity=1, path=path, name="adzuna")
+        bucket.try_acquire()
+        holder = sqlite3.connect(path, isolation_level=None)
+        self.addCleanup(holder.close)
+        holder.execute("BEGIN IMMEDIATE")
+        started = time.monotonic()
+        with self.assertLogs("minorrec.ratelimit", "WARNING"):
+            self.assertEqual(bucket.try_acquire(), 0.0)
+        self.assertLess(time.monotonic() - started, 1)
+        holder.execute("ROLLBACK")
+        # the shared row is used again once the lock is released
+        self.assertGreater(bucket.try_acquire(), 0.5)
+
+    def test_unwritable_path_falls_back_to_process_bucket(self):
+        blocker = os.path.join(self.tmpdir, "file")
+        open(blocker, "w").close()
+        bucket = TokenBucket(rate=1, capacity=1, path=os.path.join(blocker, "limits.sqlite3"))
+        with self.assertLogs("minorrec.ratelimit", "WARNING"):
+            self.assertEqual(bucket.try_acquire(), 0.0)
+            self.assertGreater(bucket.try_acquire(), 0.5)
+
+    def test_request_page_gives_up_instead_of_sleeping(self):
+        bucket = TokenBucket(rate=1, capacity=1)
+        bucket.block_for(60)
+        with mock.patch.object(JobInfoAPI, "rate_limiter", bucket), \
+                mock.patch.object(JobInfoAPI.time, "sleep") as sleep:
+            with self.assertRaises(RateLimited) as raised:
+                JobInfoAPI._request_page("software", "gb", 5, 1)
+        sleep.assert_not_called()
+        self.assertGreater(raised.exception.retry_after, 50)
+
+    def test_give_up_is_not_counted_as_a_retry(self):
+        with mock.patch.object(metrics.REGISTRY, "enabled", True):
+            before = metrics.UPSTREAM_RETRIES.values.get(("adzuna",), 0)
+            with mock.patch.object(JobInfoAPI, "rate_limiter", None), \
+                    mock.patch.object(JobInfoAPI, "get_session", return_value=FakeAdzuna(throttle_from_page=1)), \
+                    self.assertLogs("minorrec.adzuna", "WARNING") as logs, \
+                    self.assertRaises(RateLimited):
+                JobInfoAPI._request_page("software", "gb", 5, 1)
+            self.assertEqual(metrics.UPSTREAM_RETRIES.values.get(("adzuna",), 0), before)
+        self.assertEqual(len(logs.records), 1)
+        self.assertIn("giving up", logs.records[0].getMessage())
+
+    def test_parse_retry_after(self):
+        self.assertEqual(parse_retry_after("7"), 7.0)
+        self.assertIsNone(parse_retry_after("soon"))
+        self.assertEqual(parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT"), 0.0)
+
+
+class PageCacheTests(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+        self.path = os.path.join(self.tmpdir, "cache.sqlite3")
+
+    def test_memory_lru_evicts_and_counts(self):
+        cache = TwoTierCache("pages", None, maxsize=2, ttl=60)
+        for page in (1, 2, 3):
+            cache.set(("kw", page), {"page": page})
+        self.assertIsNone(cache.get(("kw", 1)))
+        self.assertEqual(cache.get(("kw", 3)), {"page": 3})
+        stats = cache.stats()
+        self.assertEqual((stats["memory_hits"], stats["misses"], stats["evictions"]), (1, 1, 1))
+
+    def test_disk_tier_survives_restart(self):
+        TwoTierCache("pages", self.path, ttl=60).set(("kw", 1), {"results": [1]})
+        restarted = TwoTierCache("pages", self.path, ttl=60)
+        self.assertEqual(restarted.get(("kw", 1)), {"results": [1]})
+        self.assertEqual(restarted.stats()["disk_hits"], 1)
+        self.assertEqual(restarted.get(("kw", 1)), {"results": [1]})
+        self.assertEqual(restarted.stats()["memory_hits"], 1)
+
+    def test_expired_entries_are_misses(self):
+        cache = TwoTierCache("pages", self.path, ttl=60)
+        cache.set(("kw", 1), {"results": []}, ttl=-1)
+        self.assertIsNone(cache.get(("kw", 1)))
+
+    def test_invalidation_reaches_other_instances(self):
+        worker = TwoTierCache("insights", self.path, ttl=60, check_interval=0)
+        worker.set(("a",), 1)
+        worker.set(("b",), 2)
+        self.assertEqual(worker.get(("a",)), 1)
+        # e.g. a management command in another process
+        TwoTierCache("insights", self.path, ttl=60).delete(("a",))
+        self.assertIsNone(worker.get(("a",)))
+        self.assertEqual(worker.get(("b",)), 2)
+        TwoTierCache("insights", self.path, ttl=60).clear()
+        self.assertIsNone(worker.get(("b",)))
+
+    def test_generation_is_checked_once_per_interval(self):
+        worker = TwoTierCache("insights", self.path, ttl=60, check_interval=60)
+        worker.set(("a",), 1)
+        self.assertEqual(worker.get(("a",)), 1)
+        TwoTierCache("insights", self.path, ttl=60).clear()
+        self.assertEqual(worker.get(("a",)), 1)
+        worker._checked -= 60
+        self.assertIsNone(worker.get(("a",)))
+
+    def test_fetch_page_hits_upstream_once(self):
+        fake = FakeAdzuna()
+        cache = TwoTierCache("pages", self.path, ttl=60)
+        with mock.patch.object(JobInfoAPI, "page_cache", cache), \
+                mock.patch.object(JobInfoAPI, "rate_limiter", None), \
+                mock.patch.object(JobInfoAPI, "get_session", return_value=fake):
+            first = JobInfoAPI.fetch_page("software", "gb", 5, 1)
+            second = JobInfoAPI.fetch_page("software", "gb", 5, 1)
+        self.assertEqual(first, second)
+        self.assertEqual(len(fake.calls), 1)
+
+
+class FakeGemini:
+    def __init__(self, text):
+        self.text = text
+        self.prompts = []
+
+    def generate_content(self, prompt):
+        self.prompts.append(prompt)
+        return mock.Mock(text=self.text)
+
+    async def generate_content_async(self, prompt):
+        self.prompts.append(prompt)
+        await asyncio.sleep(0.01)
+        return mock.Mock(text=self.text)
+
+
+INSIGHTS = {
+    "jobTypes": ["Data Scientist"],
+    "salaryRange": {"entry": "$80,000", "mid": "$110,000", "senior": "$150,000+"},
+    "topLocations": ["Chicago, IL"],
+    "topCompanies": ["Acme"],
+    "growthOutlook": "Strong",
+    "keySkills": ["Python"],
+}
+
+
+class CareerInsightsTests(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+        cache = TwoTierCache("career_insights", os.path.join(self.tmpdir, "insights.sqlite3"), ttl=60)
+        patcher = mock.patch.object(insights, "_cache", cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def ask(self, model, major="Computer Science", minor="Statistics"):
+        with mock.patch.object(insights, "get_model", return_value=model):
+            response = self.client.post(
+                "/api/career_insights/", {"major": major, "minor": minor}, content_type="application/json"
+            )
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_repeat_pairs_are_served_from_cache(self):
+        model = FakeGemini("```json\n" + json.dumps(INSIGHTS) + "\n```")
+        first = self.ask(model)
+        second = self.ask(model, major="  computer   science", minor="STATISTICS")
+        self.assertEqual(len(model.prompts), 1)
+        self.assertEqual(first["source"], "gemini_api")
+        self.assertEqual(second["insights"], INSIGHTS)
+
+    def test_invalid_reply_falls_back_and_is_not_cached(self):
+        model = FakeGemini(json.dumps({**INSIGHTS, "salaryRange": "lots"}))
+        self.assertEqual(self.ask(model)["source"], "basic_insights")
+        self.assertEqual(self.ask(model)["source"], "basic_insights")
+        self.assertEqual(len(model.prompts), 2)
+
+    def test_clear_command_invalidates(self):
+        model = FakeGemini(json.dumps(INSIGHTS))
+        self.ask(model)
+        self.ask(model, minor="Business")
+        call_command("clear_insights_cache", major="Computer Science", minor="Statistics", stdout=mock.Mock())
+        self.ask(model)
+        self.ask(model, minor="Business")
+        self.assertEqual(len(model.prompts), 3)
+        call_command("clear_insights_cache", stdout=mock.Mock())
+        self.ask(model, minor="Business")
+        self.assertEqual(len(model.prompts), 4)
+
+    def test_prompt_version_is_part_of_the_key(self):
+        self.ask(FakeGemini(json.dumps(INSIGHTS)))
+        model = FakeGemini(json.dumps(INSIGHTS))
+        with mock.patch.object(insights, "PROMPT_VERSION", insights.PROMPT_VERSION + 1):
+            self.ask(model)
+        self.assertEqual(len(model.prompts), 1)
+
+
+class SingleFlightTests(TestCase):
+    def wait_for(self, condition):
+        for _ in range(500):
+            if condition():
+                return
+            threading.Event().wait(0.01)
+        self.fail("condition never became true")
+
+    def run_callers(self, flight, count, fn, recheck=None):
+        results, errors = [], []
+
+        def call():
+            try:
+                results.append(flight.do("key", fn, recheck))
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=call) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        return threads, results, errors
+
+    def test_concurrent_callers_share_one_call(self):
+        flight, release, calls = SingleFlight("test"), threading.Event(), []
+
+        def fetch():
+            calls.append(1)
+            release.wait(5)
+            return {"jobs": [1]}
+
+        threads, results, errors = self.run_callers(flight, 5, fetch)
+        self.wait_for(lambda: flight.shared == 4)
+        release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual((len(calls), errors), (1, []))
+        self.assertEqual(results, [{"jobs": [1]}] * 5)
+        self.assertEqual(flight.do("key", lambda: "fresh"), "fresh")
+
+    def test_errors_reach_every_waiter(self):
+        flight, release = SingleFlight("test"), threading.Event()
+
+        def fail():
+            release.wait(5)
+            raise ValueError("upstream down")
+
+        threads, results, errors = self.run_callers(flight, 3, fail)
+        self.wait_for(lambda: flight.shared == 2)
+        release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual((results, len(errors)), ([], 3))
+        self.assertTrue(all(isinstance(error, ValueError) for error in errors))
+
+    def test_lock_file_lets_the_second_worker_reuse_the_result(self):
+        lock_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, lock_dir)
+        # two SingleFlight instances stand in for two worker processes sharing a cache
+        first, second = SingleFlight("test", lock_dir), SingleFlight("test", lock_dir)
+        shared_cache, started, release = {}, threading.Event(), threading.Event()
+
+        def slow():
+            started.set()
+            release.wait(5)
+            shared_cache["key"] = "answer"
+            return "answer"
+
+        def recheck():
+            return shared_cache.get("key", MISSING)
+
+        leader, _, _ = self.run_callers(first, 1, slow, recheck)
+        started.wait(5)
+        follower, results, _ = self.run_callers(second, 1, lambda: "fetched again", recheck)
+        release.set()
+        for thread in leader + follower:
+            thread.join()
+        self.assertEqual(results, ["answer"])
+
+    def test_lock_file_is_per_key_and_only_with_recheck(self):
+        lock_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, lock_dir)
+        first, second = SingleFlight("test", lock_dir), SingleFlight("test", lock_dir)
+        self.assertNotEqual(first._lock_path("a"), first._lock_path("b"))
+        started, release = threading.Event(), threading.Event()
+
+        def slow():
+            started.set()
+            release.wait(5)
+            return "a"
+
+        leader = threading.Thread(target=first.do, args=("a", slow, lambda: MISSING))
+        leader.start()
+        self.addCleanup(leader.join)
+        self.addCleanup(release.set)
+        started.wait(5)
+        # another key, and the same key without a recheck, do not wait for the held lock
+        began = time.monotonic()
+        self.assertEqual(second.do("b", lambda: "b", lambda: MISSING), "b")
+        self.assertEqual(second.do("a", lambda: "no recheck"), "no recheck")
+        self.assertLess(time.monotonic() - began, 1)
+
+
+class WarmCachesTests(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+        self.progress = os.path.join(self.tmpdir, "progress.json")
+        cache = TwoTierCache("career_insights", os.path.join(self.tmpdir, "insights.sqlite3"), ttl=60)
+        for target, name, value in (
+            (insights, "_cache", cache),
+            (JobInfoAPI, "page_cache", None),
+            (JobInfoAPI, "rate_limiter", None),
+        ):
+            patcher = mock.patch.object(target, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def warm(self, *args):
+        output = io.StringIO()
+        call_command("warm_caches", "--progress", self.progress, "--workers", "4", *args, stdout=output, stderr=output)
+        with open(self.progress) as handle:
+            return json.load(handle), output.getvalue()
+
+    def test_interrupted_run_resumes(self):
+        calls = []
+
+        def fetch(major, minor, **kwargs):
+            calls.append((major, minor))
+            if (major, minor) == ("Biology", "Statistics") and calls.count((major, minor)) == 1:
+                raise JobInfoAPI.requests.ConnectionError("connection reset")
+            return {"rate_limited": False}
+
+        pairs = len(set(JobInfoAPI.MAJOR_KEYWORDS) | set(backend.MAJOR_CATEGORIES)) * len(get_minor_rules().names)
+        with mock.patch("backApp.management.commands.warm_caches.get_career_choices_for_major_minor", side_effect=fetch):
+            state, output = self.warm("--only", "jobs")
+            self.assertFalse(state["finished"])
+            self.assertGreater(pairs, 200)
+            self.assertEqual(len(state["done"]), pairs - 1)
+            self.assertIn("Biology + Statistics", output)
+
+            state, _ = self.warm("--only", "jobs")
+        self.assertTrue(state["finished"])
+        self.assertEqual(calls[pairs:], [("Biology", "Statistics")])
+
+    def test_warmed_insights_are_served_from_cache(self):
+        model = FakeGemini(json.dumps(INSIGHTS))
+        with mock.patch.object(insights, "get_model", return_value=model), \
+                mock.patch("backApp.management.commands.warm_caches.get_model", return_value=model):
+            state, _ = self.warm("--only", "insights")
+            prompts = len(model.prompts)
+            self.assertTrue(state["finished"])
+            self.assertEqual(prompts, len(state["done"]))
+            response = self.client.post(
+                "/api/career_insights/", {"major": "Biology", "minor": "Statistics"}, content_type="application/json"
+            )
+        self.assertEqual(response.json()["source"], "gemini_api")
+        self.assertEqual(len(model.prompts), prompts)
+
+
+def job(title, description=""):
+    return {"title": title, "description": description}
+
+
+class RankingTests(TestCase):
+    def test_phrases_and_titles_outrank_scattered_words(self):
+        jobs = [
+            job("Warehouse Operative", "Analyst support for data entry"),
+            job("Junior Data Analyst", "Reporting and dashboards"),
+            job("Office Manager", "Handle data for the lead analyst"),
+        ]
+        ranked = rank_jobs(jobs, [["data analyst"]])
+        self.assertEqual(ranked[0]["title"], "Junior Data Analyst")
+
+    def test_whole_words_only_with_plural_and_ing_forms(self):
+        jobs = [job("Label Printer Operator", "Collaborate with the team"), job("Lab Technicians", "Engineering support")]
+        scores = bm25_scores(jobs, [["lab", "engineer"]])
+        self.assertEqual(scores[0], 0)
+        self.assertGreater(scores[1], 0)
+
+    def test_major_and_minor_groups_both_count(self):
+        jobs = [job("Software Developer"), job("Statistician"), job("Software Statistician")]
+        ranked = rank_jobs(jobs, [["software", "developer"], ["statistician"]])
+        self.assertEqual(ranked[0]["title"], "Software Statistician")
+
+    def test_ties_keep_arrival_order_and_scale(self):
+        jobs = [job(f"Role {i}", "Nothing relevant here") for i in range(500)]
+        self.assertEqual(rank_jobs(jobs, [["software"]]), jobs)
+        self.assertEqual(rank_jobs([], [["software"]]), [])
+
+
+def async_adzuna_client(fake):
+    """An httpx.AsyncClient answering from a FakeAdzuna"""
+    def handle(request):
+        params = {**request.url.params, "results_per_page": int(request.url.params["results_per_page"])}
+        reply = fake.get(str(request.url.copy_with(query=None)), params=params)
+        return httpx.Response(reply.status_code, json=reply.data, headers=reply.headers)
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handle))
+
+
+class AsyncViewTests(CatalogFixtureMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.insight_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.insight_dir)
+        cache = TwoTierCache("career_insights", os.path.join(self.insight_dir, "insights.sqlite3"), ttl=60)
+        for target, name, value in (
+            (JobInfoAPI, "page_cache", None),
+            (JobInfoAPI, "rate_limiter", None),
+            (insights, "_cache", cache),
+        ):
+            patcher = mock.patch.object(target, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    async def post(self, path, data):
+        return await self.async_client.post(path, data, content_type="application/json")
+
+    async def test_async_jobs_match_sync_jobs(self):
+        fake = FakeAdzuna()
+        with mock.patch.object(JobInfoAPI, "get_async_client", return_value=async_adzuna_client(fake)):
+            response = await self.post("/api/async/job_recommendations/", {"major": "Computer Science", "minor": "Statistics"})
+            result = response.json()
+            follow = (await self.post(
+                "/api/async/job_recommendations/",
+                {"major": "Computer Science", "minor": "Statistics", "cursor": result["cursor"]},
+            )).json()
+        with mock.patch.object(JobInfoAPI, "get_session", return_value=FakeAdzuna()):
+            expected = JobInfoAPI.get_career_choices_for_major_minor("Computer Science", "Statistics")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(result["jobs"], expected["jobs"])
+        self.assertEqual(len(fake.calls), 2)
+        self.assertFalse({job["url"] for job in result["jobs"]} & {job["url"] for job in follow["jobs"]})
+
+    async def test_async_jobs_return_partial_batch_when_throttled(self):
+        fake = FakeAdzuna(throttle_from_page=1)
+        with mock.patch.object(JobInfoAPI, "get_async_client", return_value=async_adzuna_client(fake)), \
+                mock.patch.object(JobInfoAPI.asyncio, "sleep") as sleep:
+            response = await self.post(
+                "/api/async/job_recommendations/", {"major": "Computer Science", "minor": "Statistics"}
+            )
+        sleep.assert_not_called()
+        result = response.json()
+        self.assertEqual(response["Retry-After"], "120")
+        self.assertEqual((result["jobs"], result["rate_limited"]), ([], True))
+        self.assertEqual((result["next_keyword_index"], result["next_page"], result["next_offset"]), (0, 1, 0))
+
+    async def test_concurrent_async_insights_share_one_prompt(self):
+        model = FakeGemini(json.dumps(INSIGHTS))
+        with mock.patch.object(insights, "get_model", return_value=model):
+            responses = await asyncio.gather(*(
+                self.post("/api/async/career_insights/", {"major": "Biology", "minor": "Statistics"}) for _ in range(5)
+            ))
+        self.assertEqual(len(model.prompts), 1)
+        self.assertTrue(all(response.json()["insights"] == INSIGHTS for response in responses))
+
+    async def test_async_path_keeps_sqlite_off_the_event_loop(self):
+        loop_thread, threads = threading.get_ident(), []
+        cache = TwoTierCache("pages", os.path.join(self.insight_dir, "pages.sqlite3"), ttl=60)
+        bucket = TokenBucket(rate=10, capacity=10, path=os.path.join(self.insight_dir, "limits.sqlite3"))
+        for store in (cache.disk, bucket):
+            connect = store._connection
+            def record(connect=connect):
+                threads.append(threading.get_ident())
+                return connect()
+            store._connection = record
+        with mock.patch.object(JobInfoAPI, "page_cache", cache), \
+                mock.patch.object(JobInfoAPI, "rate_limiter", bucket), \
+                mock.patch.object(JobInfoAPI, "get_async_client", return_value=async_adzuna_client(FakeAdzuna())):
+            await JobInfoAPI.fetch_page_async("software", "gb", 5, 1)
+            cache.memory.clear()
+            await JobInfoAPI.fetch_page_async("software", "gb", 5, 1)
+        # generation check, cache miss, limiter, cache write, then the disk hit after the memory tier was dropped
+        self.assertEqual(len(threads), 5)
+        self.assertNotIn(loop_thread, threads)
+
+    async def test_async_minor_progress_and_errors(self):
+        response = await self.post(
+            "/api/async/minor_progress/",
+            {"major": "Computer Science", "classes": ["CS 124", "CS 128", "CS 173", "CS 225", "CS 374"]},
+        )
+        self.assertAlmostEqual(response.json()["percentages"]["Computer Science"], 100 * 17 / 19)
+        self.assertEqual((await self.async_client.get("/api/async/minor_progress/")).status_code, 405)
+        bad = await self.async_client.post("/api/async/career_insights/", "not json", content_type="application/json")
+        self.assertEqual(bad.status_code, 400)
+
+
+class BenchmarkTests(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+
+    def test_every_route_has_a_scenario(self):
+        self.assertEqual(unbenchmarked_routes(default_scenarios("Biology", "Statistics", ["CS 124"])), [])
+
+    def test_small_run_records_latency_and_upstream_calls(self):
+        output = os.path.join(self.tmpdir, "results.json")
+        call_command(
+            "benchmark", "--requests", "3", "--concurrency", "2", "--latency", "0", "--output", output,
+            "--endpoints", "minor_progress", "job_recommendations", "career_insights", "async_job_recommendations",
+            stdout=io.StringIO(),
+        )
+        with open(output) as handle:
+            results = json.load(handle)
+        scenarios = results["scenarios"]
+        self.assertEqual(results["meta"]["config"]["requests"], 3)
+        self.assertTrue(all(result["statuses"] == {"200": 3} for result in scenarios.values()))
+        self.assertIsNotNone(scenarios["minor_progress"]["p99_ms"])
+        self.assertGreater(scenarios["job_recommendations"]["upstream_calls"]["adzuna"]["requests"], 0)
+        self.assertEqual(scenarios["career_insights"]["upstream_calls"]["gemini"]["requests"], 1)
+        # pages fetched by the sync view are already cached when the async one runs
+        self.assertEqual(scenarios["async_job_recommendations"]["upstream_calls"]["adzuna"].get("requests", 0), 0)
+
+    def test_sessions_are_not_written_to_the_database(self):
+        call_command(
+            "benchmark", "--requests", "4", "--concurrency", "2", "--latency", "0",
+            "--output", os.path.join(self.tmpdir, "results.json"),
+            "--endpoints", "what_if", "what_if_add", "what_if_remove", stdout=io.StringIO(),
+        )
+        with open(os.path.join(self.tmpdir, "results.json")) as handle:
+            scenarios = json.load(handle)["scenarios"]
+        self.assertTrue(all(result["statuses"] == {"200": 4} for result in scenarios.values()))
+        self.assertEqual(Session.objects.count(), 0)
+
+
+@override_settings(METRICS_ENABLED=True)
+class MetricsTests(CatalogFixtureMixin, TestCase):
+    def test_requests_and_spans_are_exposed(self):
+        before = metrics.REQUEST_DURATION.count("minor_progress", "POST", "200")
+        self.client.post(
+            "/api/minor_progress/", {"major": "Computer Science", "classes": ["CS 124", "CS 225"]},
+            content_type="application/json",
+        )
+        self.assertEqual(metrics.REQUEST_DURATION.count("minor_progress", "POST", "200"), before + 1)
+
+        response = self.client.get("/metrics")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain; version=0.0.4"))
+        body = response.content.decode()
+        self.assertIn('http_request_duration_seconds_bucket{view="minor_progress",method="POST",status="200",le="+Inf"}', body)
+        for name in ("catalog_load", "credit_lookup", "rules_evaluate", "serialization"):
+            self.assertIn(f'span_duration_seconds_count{{span="{name}"}}', body)
+        self.assertIn('cache_hits_total{cache="adzuna_pages",tier="memory"}', body)
+
+    def test_unknown_paths_share_one_label(self):
+        self.client.get("/no/such/page/")
+        self.assertIn('view="unmatched"', self.client.get("/metrics").content.decode())
+
+    def test_upstream_calls_are_counted_by_status(self):
+        before = dict(metrics.UPSTREAM_REQUESTS.values)
+        with mock.patch.object(JobInfoAPI, "rate_limiter", None), \
+                mock.patch.object(JobInfoAPI, "get_session", return_value=FakeAdzuna(throttle_from_page=2)):
+            JobInfoAPI._request_page("engineer", "gb", 5, 1)
+            with self.assertRaises(RateLimited):
+                JobInfoAPI._request_page("engineer", "gb", 5, 2)
+        after = metrics.UPSTREAM_REQUESTS.values
+        self.assertEqual(after[("adzuna", "200")] - before.get(("adzuna", "200"), 0), 1)
+        self.assertEqual(after[("adzuna", "429")] - before.get(("adzuna", "429"), 0), 1)
+
+    def test_disabled_metrics_cost_nothing_and_hide_the_endpoint(self):
+        with override_settings(METRICS_ENABLED=False):
+            self.assertIs(metrics.span("ranking"), metrics.NOOP)
+            self.assertEqual(self.client.get("/metrics").status_code, 404)
+        self.assertIsNot(metrics.span("ranking"), metrics.NOOP)
+
+    def test_endpoint_is_limited_to_allowed_clients(self):
+        self.assertEqual(self.client.get("/metrics", REMOTE_ADDR="203.0.113.9").status_code, 403)
+        with override_settings(METRICS_ALLOWED_IPS=["203.0.113.9"]):
+            self.assertEqual(self.client.get("/metrics", REMOTE_ADDR="203.0.113.9").status_code, 200)
+        with override_settings(METRICS_TOKEN="s3cret"):
+            self.assertEqual(self.client.get("/metrics").status_code, 403)
+            self.assertEqual(self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer wrong").status_code, 403)
+            self.assertEqual(self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer s3cret").status_code, 200)
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = metrics.Histogram("demo_seconds", "Demo", ("kind",), buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.5, 3):
+            histogram.observe(value, 'a"b')
+        self.assertEqual(histogram.render()[2:], [
+            'demo_seconds_bucket{kind="a\\"b",le="0.1"} 1',
+            'demo_seconds_bucket{kind="a\\"b",le="1.0"} 3',
+            'demo_seconds_bucket{kind="a\\"b",le="+Inf"} 4',
+            'demo_seconds_sum{kind="a\\"b"} 4.05',
+            'demo_seconds_count{kind="a\\"b"} 4',
+        ])
+
+
+class Loud:
+    """Logging argument that records whether it was ever formatted"""
+
+    def __init__(self):
+        self.formatted = 0
+
+    def __str__(self):
+        self.formatted += 1
+        return "loud"
+
+
+class LoggingTests(TestCase):
+    def make_logger(self, name, level=logging.DEBUG):
+        stream = io.StringIO()
+        handler = QueueingHandler(stream)
+        handler.setFormatter(JsonFormatter())
+        self.addCleanup(handler.close)
+        logger = logging.getLogger(name)
+        logger.handlers, logger.propagate, logger.level = [handler], False, level
+        self.addCleanup(setattr, logger, "handlers", [])
+        return logger, handler, stream
+
+    def test_records_are_json_lines_written_off_thread(self):
+        logger, handler, stream = self.make_logger("minorrec.test.json")
+        logger.info("Fetched %d jobs for %s", 3, "engineer", extra={"keyword": "engineer"})
+        handler.flush()
+        entry = json.loads(stream.getvalue())
+        self.assertEqual(entry["message"], "Fetched 3 jobs for engineer")
+        self.assertEqual((entry["level"], entry["logger"], entry["keyword"]), ("INFO", "minorrec.test.json", "engineer"))
+
+    def test_disabled_levels_never_format_their_arguments(self):
+        logger, handler, stream = self.make_logger("minorrec.test.levels", level=logging.INFO)
+        payload = Loud()
+        logger.debug("Adzuna page: %s", payload)
+        handler.flush()
+        self.assertEqual((payload.formatted, stream.getvalue()), (0, ""))
+        # the shipped config keeps full Adzuna payloads off at the default level
+        self.assertFalse(JobInfoAPI.payload_logger.isEnabledFor(logging.DEBUG))
+
+    def test_sampling_keeps_severe_records(self):
+        sampler = SamplingFilter(rate=0.0)
+        record = lambda level: logging.LogRecord("minorrec.adzuna.payload", level, "", 0, "page", (), None)
+        self.assertFalse(sampler.filter(record(logging.DEBUG)))
+        self.assertTrue(sampler.filter(record(logging.WARNING)))
+        self.assertTrue(SamplingFilter(rate=1.0).filter(record(logging.DEBUG)))
+
+    def test_full_queue_drops_instead_of_blocking(self):
+        handler = QueueingHandler(io.StringIO(), maxsize=1)
+        handler.close()
+        record = logging.LogRecord("minorrec.test", logging.INFO, "", 0, "message", (), None)
+        handler.enqueue(record)
+        handler.enqueue(record)
+        self.assertEqual(handler.dropped, 1)
+
+
+class MinorPlanTests(CatalogFixtureMixin, TestCase):
+    def post(self, body):
+        return self.client.post("/api/minor_plan/", body, content_type="application/json")
+
+    def test_plan_takes_missing_requirements_then_cheapest_electives(self):
+        response = self.post({"classes": ["CS 124", "CS 128", "CS 173"], "minors": ["Computer Science"]})
+        self.assertEqual(response.status_code, 200)
+        [plan] = response.json()["plans"]
+        self.assertEqual(
+            [(course["course"], course["requirement"]) for course in plan["courses"]],
+            [("CS 225", "required"), ("CS 374", "elective"), ("CS 411", "elective")],
+        )
+        self.assertEqual((plan["current_credits"], plan["additional_credits"], plan["projected_credits"]), (9, 11, 20))
+        self.assertTrue(plan["achievable"])
+        self.assertFalse(plan["complete"])
+
+    def test_plans_are_minimal(self):
+        catalog = get_catalog()
+        rules = get_minor_rules()
+        taken = ["CS 124", "STAT 400", "MATH 241"]
+        pool = sorted(set(catalog.course_names) - set(taken))
+        plans = get_planner(catalog).plan(taken)
+        for name in ("Computer Science", "Statistics", "Math"):
+            best = None
+            for size in range(len(plans[name]["courses"]) + 1):
+                for extra in itertools.combinations(pool, size):
+                    if rules.evaluate([*taken, *extra], catalog.course_credits)[name] >= rules.credit_hours[name]:
+                        cost = sum(catalog.course_credits(course) for course in extra)
+                        best = cost if best is None else min(best, cost)
+            plan = plans[name]
+            if plan["achievable"]:
+                self.assertGreaterEqual(plan["projected_credits"], rules.credit_hours[name])
+                self.assertLessEqual(plan["additional_credits"], best, name)
+            else:
+                self.assertIsNone(best, name)
+
+    def test_every_minor_is_planned_nearest_first(self):
+        plans = self.post({"classes": ["CS 124", "CS 128", "CS 173", "CS 225", "CS 374"]}).json()["plans"]
+        self.assertEqual(len(plans), 10)
+        self.assertEqual(plans[0]["minor"], "Computer Science")
+        self.assertEqual([course["course"] for course in plans[0]["courses"]], ["CS 411"])
+
+    def test_rejects_bad_input(self):
+        self.assertEqual(self.post({"classes": "CS 124"}).status_code, 400)
+        self.assertEqual(self.post({"classes": [], "minors": ["Underwater Basket Weaving"]}).status_code, 400)
+
+
+class CourseMinorsTests(TestCase):
+    def test_single_lookup(self):
+        response = self.client.get("/api/course_minors/", {"course": "stat  400"})
+        self.assertEqual(response.status_code, 200)
+        [result] = response.json()["results"]
+        self.assertEqual(result["course"], "STAT 400")
+        self.assertEqual(
+            [(minor["minor"], minor["requirement"]) for minor in result["minors"]],
+            [("Math", "elective"), ("Statistics", "elective")],
+        )
+
+    def test_bulk_lookup_keeps_request_order(self):
+        response = self.client.post(
+            "/api/course_minors/", {"courses": ["SPAN 228", "CS 124", "ART 101"]}, content_type="application/json",
+        )
+        results = response.json()["results"]
+        self.assertEqual([result["course"] for result in results], ["SPAN 228", "CS 124", "ART 101"])
+        self.assertEqual(results[0]["minors"], [{"minor": "Spanish", "requirement": "required"}])
+        self.assertEqual(results[2]["minors"], [])
+
+    def test_rejects_bad_input(self):
+        self.assertEqual(self.client.get("/api/course_minors/").status_code, 400)
+        response = self.client.post("/api/course_minors/", {"courses": [1, 2]}, content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+        too_many = {"courses": ["CS 124"] * (backend.MAX_LOOKUP_COURSES + 1)}
+        self.assertEqual(self.client.post("/api/course_minors/", too_many, content_type="application/json").status_code, 400)
+
+
+class WhatIfTests(CatalogFixtureMixin, TestCase):
+    def post(self, path, body):
+        return self.client.post(path, body, content_type="application/json")
+
+    def test_add_and_remove_update_the_session(self):
+        response = self.post("/api/what_if/", {"classes": ["CS 124", "CS 128"]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["courses"], ["CS 124", "CS 128"])
+
+        added = self.post("/api/what_if/add/", {"course": "cs  374"}).json()
+        self.assertEqual(added["courses"], ["CS 124", "CS 128", "CS 374"])
+        self.assertEqual(added["changed"], ["Computer Science"])
+        progress = self.post("/api/minor_progress/", {"major": "CS", "classes": added["courses"]}).json()
+        self.assertEqual(added["percentages"], progress["percentages"])
+
+        removed = self.post("/api/what_if/remove/", {"course": "CS 124"}).json()
+        self.assertEqual(removed["courses"], ["CS 128", "CS 374"])
+        self.assertEqual(self.client.get("/api/what_if/").json()["percentages"], removed["percentages"])
+
+    def test_unknown_or_repeated_course_changes_nothing(self):
+        self.post("/api/what_if/", {"classes": ["CS 124"]})
+        self.assertEqual(self.post("/api/what_if/add/", {"course": "CS 124"}).json()["changed"], [])
+        self.assertEqual(self.post("/api/what_if/remove/", {"course": "ART 101"}).json()["changed"], [])
+
+    def test_clear_and_bad_input(self):
+        self.post("/api/what_if/", {"classes": ["CS 124"]})
+        self.assertEqual(self.client.delete("/api/what_if/").status_code, 204)
+        self.assertEqual(self.client.get("/api/what_if/").json()["courses"], [])
+        self.assertEqual(self.post("/api/what_if/add/", {}).status_code, 400)
+        self.assertEqual(self.post("/api/what_if/", {"classes": "CS 124"}).status_code, 400)
+
+    def test_reading_does_not_create_a_session(self):
+        response = self.client.get("/api/what_if/")
+        self.assertEqual(response.json()["courses"], [])
+        self.assertNotIn(settings.SESSION_COOKIE_NAME, response.cookies)
+        self.assertEqual(Session.objects.count(), 0)
+
+    def test_rule_edit_without_version_bump_rebuilds_state(self):
+        with open(RULES_PATH) as handle:
+            spec = json.load(handle)
+        edited = json.loads(json.dumps(spec))
+        edited["minors"][0]["electives"].reverse()
+        self.assertEqual(MinorRules(edited).version, get_minor_rules().version)
+        self.assertNotEqual(MinorRules(edited).digest, get_minor_rules().digest)
+
+        self.post("/api/what_if/", {"classes": ["CS 124", "CS 374"]})
+        session = self.client.session
+        state = session["what_if"]
+        # state compiled against other rules: pool slots no longer hold these courses
+        state["rules"] = MinorRules(edited).digest
+        state["hits"] = {}
+        session["what_if"] = state
+        session.save()
+        response = self.post("/api/what_if/remove/", {"course": "CS 374"})
+        self.assertEqual(response.status_code, 200)
+        progress = self.post("/api/minor_progress/", {"major": "CS", "classes": ["CS 124"]}).json()
+        self.assertEqual(response.json()["percentages"], progress["percentages"])
+
+    def test_catalog_change_rebuilds_state(self):
+        self.post("/api/what_if/", {"classes": ["CS 124", "CS 374"]})
+        session = self.client.session
+        state = session["what_if"]
+        state["catalog"] = "stale"
+        state["required"] = {}
+        session["what_if"] = state
+        session.save()
+        progress = self.post("/api/minor_progress/", {"major": "CS", "classes": ["CS 124", "CS 374"]}).json()
+        self.assertEqual(self.client.get("/api/what_if/").json()["percentages"], progress["percentages"])
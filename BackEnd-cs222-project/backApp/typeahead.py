@@ -0,0 +1,143 @@
+"""
+Server-side course typeahead.
+
+Built once per catalog version from the course codes and titles:
+
+- a prefix trie over course codes with spaces removed ("cs2" and "CS 2"
+  both reach the CS 2xx courses),
+- a prefix trie over title words, so every word of "linear alg" must
+  prefix some word of the title,
+- a trigram index over "code title" text for infix matches such as "gebra".
+
+Courses get ids in (subject, number) order and each trie node covers a
+contiguous range of its sorted keys, so a prefix lookup is one walk down
+the trie plus a slice, sorted back into id order because string keys put
+"cs1000" before "cs124". Results are ranked code matches first, then
+title word matches, then infix matches, each in course-code order.
+"""
+import re
+import threading
+from functools import lru_cache
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def normalize(text):
+    return " ".join(text.lower().split())
+
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _course_sort_key(item):
+    name = item[0]
+    subject, _, number = name.rpartition(" ")
+    return (subject, int(number) if number.isdigit() else float("inf"), number)
+
+
+class PrefixTrie:
+    """Character trie whose nodes each span a contiguous range of the sorted entries"""
+
+    def __init__(self, entries):
+        entries = sorted(set(entries))
+        self.ids = [course_id for _, course_id in entries]
+        # node = [children, lo, hi]
+        self.root = [{}, 0, len(entries)]
+        for index, (key, _) in enumerate(entries):
+            node = self.root
+            for char in key:
+                child = node[0].get(char)
+                if child is None:
+                    child = [{}, index, index + 1]
+                    node[0][char] = child
+                else:
+                    child[2] = index + 1
+                node = child
+
+    def lookup(self, prefix):
+        """Ids of every entry whose key starts with prefix, once each, in id order"""
+        node = self.root
+        for char in prefix:
+            node = node[0].get(char)
+            if node is None:
+                return []
+        return sorted(set(self.ids[node[1]:node[2]]))
+
+
+class CourseIndex:
+    def __init__(self, course_names, course_titles):
+        courses = sorted(zip(course_names, course_titles), key=_course_sort_key)
+        self.codes = [name for name, _ in courses]
+        self.titles = [title for _, title in courses]
+        self.code_trie = PrefixTrie((name.lower().replace(" ", ""), course_id) for course_id, name in enumerate(self.codes))
+        self.word_trie = PrefixTrie(
+            (word, course_id)
+            for course_id, title in enumerate(self.titles)
+            for word in WORD_PATTERN.findall(title.lower())
+        )
+        self.texts = [normalize(f"{code} {title}") for code, title in courses]
+        postings = {}
+        for course_id, text in enumerate(self.texts):
+            for gram in trigrams(text):
+                postings.setdefault(gram, []).append(course_id)
+        self.trigram_postings = postings
+        # typeahead traffic repeats the same short prefixes constantly
+        self.search = lru_cache(maxsize=4096)(self._search)
+
+    def _title_matches(self, words):
+        matches = None
+        for word in sorted(words, key=len, reverse=True):
+            ids = set(self.word_trie.lookup(word))
+            matches = ids if matches is None else matches & ids
+            if not matches:
+                return set()
+        return matches or set()
+
+    def _infix_matches(self, query):
+        grams = trigrams(query)
+        if not grams:
+            return set()
+        postings = sorted((self.trigram_postings.get(gram, ()) for gram in grams), key=len)
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            if not candidates:
+                break
+            candidates.intersection_update(posting)
+        return {course_id for course_id in candidates if query in self.texts[course_id]}
+
+    def _search(self, query):
+        """All matching course ids for a normalized query, best first"""
+        if not query:
+            return ()
+        ranked = list(self.code_trie.lookup(query.replace(" ", "")))
+        seen = set(ranked)
+        words = WORD_PATTERN.findall(query)
+        for tier in (self._title_matches(words) if words else set(), self._infix_matches(query)):
+            extra = sorted(tier - seen)
+            ranked.extend(extra)
+            seen.update(extra)
+        return tuple(ranked)
+
+    def results(self, query, limit=10, offset=0):
+        ranked = self.search(normalize(query))
+        return len(ranked), [
+            {"course": self.codes[course_id], "title": self.titles[course_id]}
+            for course_id in ranked[offset:offset + limit]
+        ]
+
+
+_lock = threading.Lock()
+_index = None
+
+
+def get_course_index(catalog):
+    """The typeahead index for this catalog version, built on first use"""
+    global _index
+    index = _index
+    if index is not None and index[0] == catalog.version:
+        return index[1]
+    with _lock:
+        if _index is None or _index[0] != catalog.version:
+            _index = (catalog.version, CourseIndex(list(catalog.course_names), list(catalog.course_titles())))
+        return _index[1]
@@ -9,13 +9,25 @@
 
 # backApp/urls.py
 from django.urls import path
-from . import backend
+from . import async_views, backend
 
 urlpatterns = [
     path('', backend.home, name='home'),
     path('api/classNames/', backend.classNames, name='classNames'),
     path('api/minor_progress/', backend.minor_progress, name='minor_progress'),
+    path('api/minor_progress/batch/', backend.minor_progress_batch, name='minor_progress_batch'),
+    path('api/minor_plan/', backend.minor_plan, name='minor_plan'),
+    path('api/course_minors/', backend.course_minors, name='course_minors'),
+    path('api/what_if/', backend.what_if, name='what_if'),
+    path('api/what_if/add/', backend.what_if_change, {'action': 'add'}, name='what_if_add'),
+    path('api/what_if/remove/', backend.what_if_change, {'action': 'remove'}, name='what_if_remove'),
     path('api/subjectNames/', backend.subjectNames, name='subjectNames'),
+    path('api/courses/search/', backend.course_search, name='course_search'),
     path('api/job_recommendations/', backend.job_recommendations, name='job_recommendations'),
+    path('api/job_recommendations/stream/', backend.job_recommendations_stream, name='job_recommendations_stream'),
     path('api/career_insights/', backend.career_insights, name='career_insights'),
+    path('api/async/job_recommendations/', async_views.job_recommendations, name='async_job_recommendations'),
+    path('api/async/career_insights/', async_views.career_insights, name='async_career_insights'),
+    path('api/async/minor_progress/', async_views.minor_progress, name='async_minor_progress'),
+    path('metrics', backend.metrics_view, name='metrics'),
 ]
\ No newline at end of file
@@ -0,0 +1,105 @@
+"""
+Incremental minor progress for "what if I add / drop this course?".
+
+A WhatIf keeps what MinorRules.evaluate computes along the way: the
+required credits per minor, the courses matched to each elective pool and
+each pool's score. Adding or removing one course touches only the pools
+and required lists that course belongs to (MinorRules.pools_for and the
+required bitmasks). Those pools are rescored, which redoes their cap and
+exclusive-group bookkeeping, and only the affected minors' totals are
+recomputed. The state is plain JSON so it can live in the Django session;
+it records MinorRules.digest so state compiled against other rules is
+rebuilt from its course list instead of being reused.
+"""
+STATE_VERSION = 1
+
+
+class WhatIf:
+    def __init__(self, rules, credit_of, courses=(), required=None, hits=None, scores=None):
+        self.rules = rules
+        self.credit_of = credit_of
+        self.courses = list(courses)
+        self.required = required or {}
+        self.hits = hits or {}
+        self.scores = scores or {}
+        self.credits = {name: self.minor_credits(index) for index, name in enumerate(rules.names)}
+
+    @classmethod
+    def from_courses(cls, rules, credit_of, courses):
+        """Full evaluation once; later changes are incremental"""
+        courses = list(dict.fromkeys(courses))
+        required_hits, pool_hits, _ = rules.match(courses)
+        required = {index: sum(credit_of(course) for course in hits) for index, hits in required_hits.items()}
+        scores = {slot: rules.pools[slot].score(hits, credit_of) for slot, hits in pool_hits.items()}
+        return cls(rules, credit_of, courses, required, dict(pool_hits), scores)
+
+    @classmethod
+    def from_state(cls, rules, credit_of, state):
+        return cls(
+            rules, credit_of, state["courses"],
+            {int(index): credits for index, credits in state["required"].items()},
+            {int(slot): hits for slot, hits in state["hits"].items()},
+            {int(slot): tuple(score) for slot, score in state["scores"].items()},
+        )
+
+    def to_state(self, catalog_version):
+        return {
+            "v": STATE_VERSION,
+            "catalog": catalog_version,
+            "rules": self.rules.digest,
+            "courses": self.courses,
+            "required": self.required,
+            "hits": self.hits,
+            "scores": {slot: [credits, list(counted)] for slot, (credits, counted) in self.scores.items()},
+        }
+
+    def minor_credits(self, index):
+        return self.required.get(index, 0) + self.rules.elective_credits(index, self.scores)
+
+    def _required_minors(self, course):
+        minors = []
+        mask = self.rules.required_masks.get(course, 0)
+        while mask:
+            bit = mask & -mask
+            minors.append(bit.bit_length() - 1)
+            mask ^= bit
+        return minors
+
+    def _update(self, course, sign):
+        """Apply one course to its required lists and pools; returns the affected minor names"""
+        rules = self.rules
+        affected = set()
+        credits = self.credit_of(course)
+        for index in self._required_minors(course):
+            self.required[index] = self.required.get(index, 0) + sign * credits
+            affected.add(index)
+        for slot in rules.pools_for(course):
+            hits = self.hits.setdefault(slot, [])
+            if sign > 0:
+                hits.append(course)
+            elif course in hits:
+                hits.remove(course)
+            if hits:
+                self.scores[slot] = rules.pools[slot].score(hits, self.credit_of)
+            else:
+                del self.hits[slot]
+                self.scores.pop(slot, None)
+            affected.add(rules.pools[slot].minor)
+        for index in affected:
+            self.credits[rules.names[index]] = self.minor_credits(index)
+        return sorted(rules.names[index] for index in affected)
+
+    def add(self, course):
+        if course in self.courses:
+            return []
+        self.courses.append(course)
+        return self._update(course, 1)
+
+    def remove(self, course):
+        if course not in self.courses:
+            return []
+        self.courses.remove(course)
+        return self._update(course, -1)
+
+    def percentages(self):
+        return self.rules.percentages(self.credits)
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -43,6 +44,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # first, so request timings include every other middleware
+    'backApp.middleware.MetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -57,6 +60,10 @@ CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",  # Allow frontend origin
 ]
 
+# The what-if endpoints keep their state in the session cookie's session;
+# the frontend sends it with fetch(..., {credentials: "include"})
+CORS_ALLOW_CREDENTIALS = True
+
 # Alternatively, for development only
 # CORS_ALLOW_ALL_ORIGINS = True
 
@@ -99,6 +106,88 @@ DATABASES = {
 }
 
 
+# Course catalog
+# Parsed once per worker and reloaded only when the file content changes.
+
+COURSE_CATALOG_CSV = BASE_DIR / 'course-catalog.csv'
+# Built by `python manage.py build_catalog`; used instead of parsing the CSV when it is up to date
+COURSE_CATALOG_ARTIFACT = BASE_DIR / 'course-catalog.bin'
+# Serve the catalog in place from the mmapped artifact so every worker shares one copy
+COURSE_CATALOG_SHARED = os.environ.get('COURSE_CATALOG_SHARED', '') == '1'
+
+
+# Job recommendations
+# Fan Adzuna requests out across keywords and pages on a bounded per-worker thread pool
+
+ADZUNA_CONCURRENT_FETCH = True
+# Signed "load more" cursors stay valid this long
+JOB_CURSOR_MAX_AGE = 24 * 60 * 60
+# Compute the next batch in the background while the user reads the current one
+JOB_PREFETCH = True
+
+
+# Career insights
+# Validated Gemini replies, keyed by normalized (major, minor) and insights.PROMPT_VERSION.
+# Clear with `python manage.py clear_insights_cache`.
+
+CAREER_INSIGHTS_CACHE_PATH = BASE_DIR / 'insights_cache.sqlite3'
+CAREER_INSIGHTS_CACHE_TTL = 7 * 24 * 60 * 60
+CAREER_INSIGHTS_CACHE_SIZE = 1024
+
+
+# Request coalescing
+# Identical career_insights / job_recommendations calls in flight at once share one upstream call.
+# Set SINGLEFLIGHT_LOCK_DIR to also coalesce across worker processes through lock files.
+
+SINGLEFLIGHT_LOCK_DIR = os.environ.get('SINGLEFLIGHT_LOCK_DIR') or None
+
+
+# Metrics
+# Request, span, upstream and cache metrics in Prometheus format at /metrics, per worker process.
+# Off by default: the middleware removes itself and every span is a no-op. METRICS_ENABLED=1
+# turns them on. /metrics then answers only METRICS_ALLOWED_IPS (comma-separated, loopback by
+# default), or, when METRICS_TOKEN is set, only requests with "Authorization: Bearer <token>".
+
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '0') == '1'
+METRICS_ALLOWED_IPS = [ip.strip() for ip in os.environ.get('METRICS_ALLOWED_IPS', '127.0.0.1,::1').split(',') if ip.strip()]
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+
+# Logging
+# App loggers are "minorrec.<category>": adzuna, adzuna.payload, jobs, catalog, insights,
+# coalescing, ratelimit, views. Records are written as JSON lines to stderr from a background thread.
+# LOG_LEVEL sets the default and LOG_LEVELS overrides categories, e.g. "adzuna=DEBUG,catalog=WARNING".
+# Full Adzuna pages are logged at DEBUG on adzuna.payload and sampled at LOG_PAYLOAD_SAMPLE_RATE.
+
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'json': {'()': 'backApp.log.JsonFormatter'},
+    },
+    'filters': {
+        'sample_payloads': {
+            '()': 'backApp.log.SamplingFilter',
+            'rate': float(os.environ.get('LOG_PAYLOAD_SAMPLE_RATE', '0.01')),
+        },
+    },
+    'handlers': {
+        'queue': {'()': 'backApp.log.QueueingHandler', 'formatter': 'json'},
+    },
+    'loggers': {
+        'minorrec': {'handlers': ['queue'], 'level': LOG_LEVEL, 'propagate': False},
+        'minorrec.adzuna.payload': {'filters': ['sample_payloads']},
+    },
+}
+
+for item in os.environ.get('LOG_LEVELS', '').split(','):
+    category, _, level = item.partition('=')
+    if category.strip() and level.strip():
+        LOGGING['loggers'].setdefault(f'minorrec.{category.strip()}', {})['level'] = level.strip().upper()
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -17,7 +17,9 @@ interface Job {
 interface JobResponse {
   jobs: Job[];
   next_keyword_index: number | null;
-  next_page: number;
+  next_page: number | null;
+  next_offset: number | null;
+  cursor: string | null;
   has_more: boolean;
   total_keywords: number;
 }
@@ -39,8 +41,8 @@ export default function Jobs() {
   const [jobs, setJobs] = useState<Job[]>([]);
   const [isLoading, setIsLoading] = useState<boolean>(false);
   const [error, setError] = useState<string | null>(null);
-  const [nextKeywordIndex, setNextKeywordIndex] = useState<number>(0);
-  const [nextPage, setNextPage] = useState<number>(1);
+  // Opaque "load more" cursor from the server; it also remembers which jobs were already shown
+  const [cursor, setCursor] = useState<string | null>(null);
   const [hasMore, setHasMore] = useState<boolean>(true);
   const observer = useRef<IntersectionObserver | null>(null);
 
@@ -68,43 +70,38 @@ export default function Jobs() {
     }
 
     setIsLoading(true);
-    try {
-      console.log(`Fetching jobs for major: ${major}, minor: ${minor}, keywordIndex: ${nextKeywordIndex}, page: ${nextPage}`);
-      const response = await fetch('http://localhost:8000/api/job_recommendations/', {
-        method: 'POST',
-        mode: 'cors',
-        headers: {
-          'Content-Type': 'application/json',
-          'Accept': 'application/json',
-        },
-        body: JSON.stringify({
-          major,
-          minor,
-          current_keyword_index: nextKeywordIndex,
-          current_page: nextPage,
-        }),
-      });
+    console.log(`Streaming jobs for major: ${major}, minor: ${minor}, cursor: ${cursor}`);
+    const params = new URLSearchParams({ major, minor });
+    if (cursor) params.set('cursor', cursor);
+    const source = new EventSource(`http://localhost:8000/api/job_recommendations/stream/?${params}`);
+    let streamed = 0;
 
-      console.log("Response status:", response.status, response.statusText);
-      if (!response.ok) {
-        const errorText = await response.text();
-        throw new Error(`Failed to fetch jobs: ${response.status} ${response.statusText} - ${errorText}`);
-      }
+    // Show each job as soon as its page arrives...
+    source.addEventListener('job', (event) => {
+      const job: Job = JSON.parse((event as MessageEvent).data);
+      streamed += 1;
+      setJobs((prevJobs: Job[]) => [...prevJobs, job]);
+    });
 
-      const data: JobResponse = await response.json();
+    // ...then swap the batch for its ranked order and take the next cursor.
+    source.addEventListener('summary', (event) => {
+      const data: JobResponse = JSON.parse((event as MessageEvent).data);
       console.log("Fetched jobs:", data);
-
-      const newJobs: Job[] = Array.isArray(data.jobs) ? data.jobs : [];
-      setJobs((prevJobs: Job[]) => [...prevJobs, ...newJobs]);
-      setNextKeywordIndex(data.next_keyword_index ?? 0);
-      setNextPage(data.next_page ?? 1);
+      const ranked: Job[] = Array.isArray(data.jobs) ? data.jobs : [];
+      setJobs((prevJobs: Job[]) => [...prevJobs.slice(0, prevJobs.length - streamed), ...ranked]);
+      setCursor(data.cursor);
       setHasMore(data.has_more);
-    } catch (err) {
-      console.error('Error fetching jobs:', err);
+      source.close();
+      setIsLoading(false);
+    });
+
+    const fail = (event: Event) => {
+      console.error('Error streaming jobs:', event);
+      source.close();
       setError("Failed to fetch job recommendations. Please try again later.");
-    } finally {
       setIsLoading(false);
-    }
+    };
+    source.addEventListener('error', fail);
   };
 
   useEffect(() => {